@@ -15,13 +15,58 @@ Able to adapt to most Lake documents.
 __version__ = '1.0.4'
 __author__ = 'Gu Pingan'
 
+from importlib import import_module
 from .converters import LakeBaseConverter
-from .converters.md_converter import MarkdownConverter
 from .context import LakeBaseContext, LakeContext, outer
-from .examples import test_markdown
 from .utils import file, string
 
+# 较重的依赖（bs4、markdownify、asyncio、进程池等）在第一次访问对应的属性时才导入：{属性名: (模块, 属性)}
+_LAZY_ATTRIBUTES = {
+    'MarkdownConverter': ('lakedoc.converters.md_converter', 'MarkdownConverter'),
+    'TextConverter': ('lakedoc.converters.text_converter', 'TextConverter'),
+    'OutlineConverter': ('lakedoc.converters.outline_converter', 'OutlineConverter'),
+    'LakeDocument': ('lakedoc.converters.document', 'LakeDocument'),
+    'ConvertCache': ('lakedoc.context.cache', 'ConvertCache'),
+    'AssetLocalizer': ('lakedoc.context.assets', 'AssetLocalizer'),
+    'HTTPFetcher': ('lakedoc.context.assets', 'HTTPFetcher'),
+    'MappingFetcher': ('lakedoc.context.assets', 'MappingFetcher'),
+    'test_markdown': ('lakedoc.examples', 'test_markdown'),
+    'batch': ('lakedoc.context.batch', None),
+    'aio': ('lakedoc.context.aio', None),
+    'sync': ('lakedoc.context.sync', None),
+    'daemon': ('lakedoc.context.daemon', None),
+    'LakeDaemon': ('lakedoc.context.daemon', 'LakeDaemon'),
+    'DaemonClient': ('lakedoc.context.daemon', 'DaemonClient'),
+    'convert_many': ('lakedoc.context.batch', 'convert_many'),
+    'convert_tree': ('lakedoc.context.batch', 'convert_tree'),
+    'convert_archive': ('lakedoc.context.batch', 'convert_archive'),
+    'ArchiveMember': ('lakedoc.utils.archive', 'ArchiveMember'),
+    'ArchiveReader': ('lakedoc.utils.archive', 'ArchiveReader'),
+    'ArchiveWriter': ('lakedoc.utils.archive', 'ArchiveWriter'),
+    'sync_tree': ('lakedoc.context.sync', 'sync_tree'),
+    'aconvert': ('lakedoc.context.aio', 'aconvert'),
+    'aconvert_many': ('lakedoc.context.aio', 'aconvert_many'),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    value = import_module(module_name)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
+
+
 convert = outer.convert
 context = LakeContext()
-context.register('markdown', MarkdownConverter, is_cover=False)
+context.register('markdown', 'lakedoc.converters.md_converter:MarkdownConverter', is_cover=False)
+context.register('text', 'lakedoc.converters.text_converter:TextConverter', is_cover=False)
+context.register('outline', 'lakedoc.converters.outline_converter:OutlineConverter', is_cover=False)
 outer.set_context(context)
@@ -0,0 +1,536 @@
+"""
+性能基准测试
+
+运行方式：
+    python -m lakedoc.benchmarks                                # 合成文档的分阶段基准测试
+    python -m lakedoc.benchmarks --output new.json              # 保存 JSON 结果
+    python -m lakedoc.benchmarks --compare old.json             # 与旧版本的结果对比
+    python -m lakedoc.benchmarks --all                          # 同时运行各项专项基准测试
+    python -m lakedoc.benchmarks --check                        # 只运行结果校验，校验失败时退出码为 1
+"""
+
+import time
+import typing as t
+from bs4 import BeautifulSoup
+from lakedoc.utils import string
+
+
+def timeit(fn: t.Callable, repeat: t.Union[int] = 5) -> float:
+    """
+    多次执行指定的函数，返回最快的一次耗时（秒）
+
+    :param fn: 无参数的可调用对象
+    :param repeat: 执行的次数，默认：5
+    :return: 最快一次的耗时
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_single_parse(scale: t.Union[int] = 200, repeat: t.Union[int] = 5):
+    """
+    对比“序列化后重新解析”与“直接遍历 soup”两种转换流程的耗时
+
+    :param scale: 示例文档重复的次数（决定文档的大小）
+    :param repeat: 每种流程执行的次数
+    :return: 两种流程的耗时（秒）
+    """
+    from lakedoc.examples import load_example_html
+    from lakedoc.converters.md_converter import MarkdownConverter
+
+    html = load_example_html() * scale
+    results = {}
+    for reparse in (True, False):
+        label = 'reparse' if reparse else 'single-parse'
+        results[label] = timeit(lambda: MarkdownConverter(html, reparse=reparse).convert(), repeat)
+
+    size = len(html.encode('utf-8')) / 1024 / 1024
+    print(string.color_string(f'文档大小：{size:.2f} MB', 'yellow'))
+    for label, seconds in results.items():
+        print(f'{label:>14}: {seconds * 1000:.1f} ms')
+    print(string.color_string(f'节省：{(1 - results["single-parse"] / results["reparse"]) * 100:.1f}%', 'green'))
+    return results
+
+
+def bench_threads(calls: t.Union[int] = 400, workers: t.Union[int] = 16):
+    """
+    在线程池中并发执行大量携带不同选项（merge_tags、extract_tags、树构建器、标题）的转换，
+    逐个与相同选项的串行转换结果对比，校验选项之间不会互相泄露（结果不一致时抛出 AssertionError）
+
+    :param calls: 转换的总次数
+    :param workers: 线程数量
+    :return: 并发转换的耗时（秒）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from bs4.builder import builder_registry
+    import lakedoc
+
+    html = ('<p><strong>a</strong><strong>b</strong><code>c</code><code>d</code><sub>e</sub>'
+            '<span style="color: red">f</span></p>')
+    variants = [
+        {},
+        {'merge_tags': {'em'}},
+        {'merge_tags': {'em', 'strong', 'code'}},
+        {'extract_tags': {'meta', 'link', 'script', 'style', 'sub'}},
+    ]
+    builders = [name for name in ('html.parser', 'lxml') if builder_registry.lookup(name)]
+
+    def options(index):
+        return dict(variants[index % len(variants)], title=f'# title-{index}',
+                    builder=builders[index // len(variants) % len(builders)])
+
+    def job(index):
+        return lakedoc.convert(html, is_file=False, **options(index))
+
+    # 各组选项必须产生不同的结果，否则无法发现选项的泄露
+    outputs = {lakedoc.convert(html, is_file=False, **variant) for variant in variants}
+    assert len(outputs) == len(variants), f'选项组合的转换结果存在重复：{outputs}'
+    expected = [job(index) for index in range(calls)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(job, range(calls)))
+    seconds = time.perf_counter() - start
+
+    leaks = [index for index in range(calls) if results[index] != expected[index]]
+    color = 'green' if not leaks else 'red'
+    print(string.color_string(f'{calls} 次并发转换（{workers} 线程，树构建器 {builders}），'
+                              f'选项泄露 {len(leaks)} 次，耗时 {seconds:.2f}s', color))
+    assert not leaks, f'并发转换与串行转换的结果不一致：{[options(index) for index in leaks[:5]]}'
+    return seconds
+
+
+def bench_styles(paragraphs: t.Union[int] = 3000, repeat: t.Union[int] = 3):
+    """
+    针对样式密集的文档（每个段落都带有缩进、颜色样式），统计样式渲染阶段的耗时
+
+    :param paragraphs: 段落的数量
+    :param repeat: 执行的次数
+    :return: 最快一次的耗时（秒）
+    """
+    from lakedoc.converters.md_converter import MarkdownConverter
+
+    html = ''.join(
+        f'<p style="text-indent: 2em; color: #{index % 7:06x}">'
+        f'<span style="color: #F5222D; background-color: #FAFAFA">text-{index}</span>'
+        f'<span style="padding-left: 1em">tail-{index}</span></p>'
+        for index in range(paragraphs)
+    )
+
+    best = float('inf')
+    for _ in range(repeat):
+        converter = MarkdownConverter(html)
+        converter.parse()
+        start = time.perf_counter()
+        converter.prepare_soup()
+        best = min(best, time.perf_counter() - start)
+
+    print(f'{paragraphs} 个样式段落，样式渲染耗时：{best * 1000:.1f} ms')
+    return best
+
+
+def bench_merge_runs(run_length: t.Union[int] = 20000):
+    """
+    针对超长的单字符 <strong>/<em> 连续标签，统计合并耗时，并校验合并后的文档与转换得到的 Markdown
+    （结果不符时抛出 AssertionError）
+
+    :param run_length: 连续标签的数量
+    :return: 合并阶段的耗时（秒）
+    """
+    from lakedoc.converters.md_converter import MarkdownConverter
+
+    html = f'<p>{"<strong>x</strong>" * run_length}</p><p>{"<em>y</em>" * run_length}</p>'
+    converter = MarkdownConverter('<p></p>')
+    soup = BeautifulSoup(html, converter.builder)
+
+    start = time.perf_counter()
+    converter.merge_adjacent_tags(soup)
+    seconds = time.perf_counter() - start
+
+    merged = f'<p><strong>{"x" * run_length}</strong></p><p><em>{"y" * run_length}</em></p>'
+    ok = str(soup) == merged
+    color = 'green' if ok else 'red'
+    print(string.color_string(f'{run_length} 个连续标签，合并耗时：{seconds * 1000:.1f} ms，结果{"正确" if ok else "错误"}', color))
+    assert ok, f'合并结果不符：{str(soup)[:200]}'
+    md_data = MarkdownConverter(html).convert()
+    assert md_data == f'**{"x" * run_length}**\n\n*{"y" * run_length}*\n\n', f'转换结果不符：{md_data[:200]!r}'
+    return seconds
+
+
+def builder_samples() -> t.Dict[str, str]:
+    """转换器处理的各类 Lake 结构（card、列表、data-lake-indent 列表、数学公式、yuqueinline 等）的样例文档"""
+    from lakedoc.examples import load_example_html
+
+    def value(data):
+        return string.encode_card_value(data)
+
+    return {
+        'example': load_example_html(),
+        'lake-indent': '<ul data-lake-indent="0"><li>a</li></ul><ul data-lake-indent="1"><li>b</li><li>c</li></ul>'
+                       '<ol data-lake-indent="2" start="3"><li>d</li></ol><p>x</p>',
+        'lists': '<ul><li>a<ul><li>b</li></ul></li></ul><ol start="2"><li>c</li><li><p>d</p></li></ol>',
+        'math': f'<p style="text-align: center"><card type="inline" name="math" value="{value({"code": "a^2"})}">'
+                f'</card></p><p><card type="inline" name="math" value="{value({"code": "b_1"})}"></card></p>',
+        'yuqueinline': f'<p><card type="inline" name="yuqueinline" '
+                       f'value="{value({"src": "https://www.yuque.com/a", "detail": {"title": "T", "type": "doc"}})}">'
+                       f'</card></p>',
+        'cards': f'<card type="block" name="hr"></card>'
+                 f'<card type="block" name="codeblock" value="{value({"mode": "python", "code": "print(1)"})}"></card>'
+                 f'<card type="inline" name="image" value="{value({"src": "image.png"})}"></card>',
+        'inline': '<p style="text-indent: 2em"><strong>a</strong><strong>b</strong>'
+                  '<span style="color: #F5222D">c</span><em>d</em></p>',
+    }
+
+
+def bench_builders(scale: t.Union[int] = 50, repeat: t.Union[int] = 3):
+    """
+    对比已安装的各个树构建器：校验各样例的转换结果是否一致（不一致时抛出 AssertionError），并统计解析、完整转换的耗时
+
+    :param scale: 示例文档重复的次数（决定文档的大小）
+    :param repeat: 每个树构建器执行的次数
+    :return: 各树构建器的耗时 {树构建器: (解析耗时, 转换耗时)}
+    """
+    from bs4.builder import builder_registry
+    from lakedoc.examples import load_example_html
+    from lakedoc.converters.md_converter import MarkdownConverter, resolve_builder
+
+    builders = [name for name in ('html.parser', 'lxml', 'html5lib') if builder_registry.lookup(name)]
+
+    mismatches = {}
+    for name, html in builder_samples().items():
+        outputs = {builder: MarkdownConverter(html, builder=builder).convert() for builder in builders}
+        if len(set(outputs.values())) > 1:
+            mismatches[name] = outputs
+    color = 'green' if not mismatches else 'red'
+    print(string.color_string(f'树构建器 {builders} 转换结果不一致的样例：{list(mismatches) or "无"}', color))
+    assert not mismatches, f'树构建器的转换结果不一致：{mismatches}'
+
+    html = load_example_html() * scale
+    raw_data = html.replace('\n', '').replace('\r', '').strip()
+    results = {}
+    for builder in builders:
+        parse = timeit(lambda: BeautifulSoup(raw_data, builder), repeat)
+        total = timeit(lambda: MarkdownConverter(html, builder=builder).convert(), repeat)
+        results[builder] = (parse, total)
+        print(f'{builder:>12}: 解析 {parse * 1000:.1f} ms，转换 {total * 1000:.1f} ms')
+    print(string.color_string(f"builder='auto' 将使用：{resolve_builder('auto')}", 'yellow'))
+    return results
+
+
+def bench_dispatch(calls: t.Union[int] = 200000, repeat: t.Union[int] = 5):
+    """
+    测量 `lakedoc.convert` 的调用开销（分派到上下文方法的成本），与同签名的普通函数调用以及旧的 overload 分派对比
+    （上下文被替换为立即返回的空实现，因此不包含转换本身的耗时）
+
+    :param calls: 每轮调用的次数
+    :param repeat: 执行的轮数
+    :return: 每次调用的耗时（纳秒）{名称: 耗时}
+    """
+    from lakedoc.context import outer
+    from lakedoc.utils import function
+
+    class NullContext(object):
+        def content_convert(self, html, target_type, uselast, **options):
+            return html
+
+        content_convert_save = read_convert = read_convert_save = content_convert
+
+    def plain(html_or_path, save_path=None, *, target_type='markdown', uselast=False, encoding='utf-8',
+              suffix='md', is_file=True, **options):
+        return html_or_path
+
+    @function.overload
+    def overloaded(html_or_path, *, target_type='markdown', uselast=False, encoding='utf-8', is_file=True,
+                   **options):
+        return html_or_path
+
+    @function.overload
+    def overloaded(html_or_path, save_path, *, target_type='markdown', uselast=False, encoding='utf-8',
+                   suffix='md', is_file=True, **options):
+        return html_or_path
+
+    null_context = NullContext()
+
+    def direct(html, is_file):
+        return null_context.content_convert(html, 'markdown', False)
+
+    candidates = {
+        'plain function': plain,
+        'direct context': direct,
+        'lakedoc.convert': outer.convert,
+        'overload (old)': overloaded,
+    }
+    original, outer.context = outer.context, null_context
+    results = {}
+    try:
+        for label, fn in candidates.items():
+            def loop():
+                for _ in range(calls):
+                    fn('<p>a</p>', is_file=False)
+            results[label] = timeit(loop, repeat) / calls * 1e9
+    finally:
+        outer.context = original
+
+    for label, nanoseconds in results.items():
+        print(f'{label:>16}: {nanoseconds:.0f} ns/次')
+    return results
+
+
+def bench_import(statement: t.Union[str] = 'import lakedoc', repeat: t.Union[int] = 5, top: t.Union[int] = 10):
+    """
+    使用 `python -X importtime` 在新的解释器中测量执行语句时导入 lakedoc 及其依赖的耗时（取多次执行中的最快值），
+    并列出累计耗时最长的模块（不包含解释器启动时导入的模块）；语句执行失败时抛出 AssertionError
+
+    :param statement: 执行的语句，例如 'import lakedoc; lakedoc.MarkdownConverter'（访问属性时触发延迟导入）
+    :param repeat: 执行的次数，默认：5
+    :param top: 列出的模块数量，默认：10
+    :return: 导入耗时（秒）
+    """
+    import os
+    import sys
+    import subprocess
+    from pathlib import Path
+
+    env = dict(os.environ)
+    root = str(Path(__file__).parent.parent.parent)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (root, env.get('PYTHONPATH'))))
+
+    best, best_rows = float('inf'), []
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                 stderr=subprocess.PIPE, env=env, universal_newlines=True)
+        assert process.returncode == 0, f'语句 {statement!r} 执行失败：{process.stderr.strip().splitlines()[-1:]}'
+        rows = []
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative), name[1:].rstrip()))
+        # 模块在其依赖之后输出，因此从顶层的 lakedoc 开始，之后的顶层模块即为延迟导入的模块
+        names = [name for _, name in rows]
+        first = names.index('lakedoc')
+        start = max((index for index, name in enumerate(names[:first]) if not name.startswith(' ')), default=-1) + 1
+        rows = rows[start:]
+        total = sum(cumulative for cumulative, name in rows if not name.startswith(' ')) / 1e6
+        if total < best:
+            best, best_rows = total, rows
+
+    print(string.color_string(f'{statement}: {best * 1000:.1f} ms', 'yellow'))
+    for cumulative, name in sorted(best_rows, reverse=True)[:top]:
+        print(f'{cumulative / 1000:>10.1f} ms  {name.strip()}')
+    return best
+
+
+# 各阶段峰值内存的上限（文档大小的倍数）：解析阶段由 bs4 的树决定，预处理与遍历阶段不应复制整个文档
+MEMORY_LIMITS = {'parse': 40, 'prepare': 10, 'walk': 4}
+
+
+def bench_memory(blocks: t.Union[int] = 5000, seed: t.Union[int] = 0, limits: t.Dict[str, float] = None):
+    """
+    使用 tracemalloc 测量转换各阶段的内存占用（解析、预处理、markdownify 遍历），并输出数据模型的记录数量，
+    校验各阶段的峰值内存不超过文档大小的指定倍数（超过时抛出 AssertionError）
+
+    :param blocks: 合成文档的顶层块数量
+    :param seed: 随机种子
+    :param limits: 各阶段峰值内存的上限（文档大小的倍数），默认：`MEMORY_LIMITS`
+    :return: {阶段: (阶段结束时新增的内存, 阶段内的峰值内存)}（字节）
+    """
+    import gc
+    import tracemalloc
+    from lakedoc.converters import md_model
+    from lakedoc.converters.md_converter import MarkdownConverter
+    from .generator import generate_document
+
+    limits = limits or MEMORY_LIMITS
+    html = generate_document(blocks, seed=seed)
+    md_model.style_info.cache_clear()
+    results = {}
+    gc.collect()
+    tracemalloc.start()
+    try:
+        def measure(stage, fn):
+            tracemalloc.clear_traces()
+            value = fn()
+            results[stage] = tracemalloc.get_traced_memory()
+            return value
+
+        converter = MarkdownConverter(html)
+        measure('parse', converter.parse)
+        soup = measure('prepare', converter.prepare_soup)
+        measure('walk', lambda: converter.particular_converter.convert_soup(soup))
+    finally:
+        tracemalloc.stop()
+
+    size = len(html.encode('utf-8'))
+    print(string.color_string(f'文档大小：{size / 1024 / 1024:.2f} MB，{converter.model!r}，'
+                              f'style 记录：{md_model.style_info.cache_info().currsize}', 'yellow'))
+    exceeded = []
+    for stage, (current, peak) in results.items():
+        ratio = peak / size
+        if ratio > limits[stage]:
+            exceeded.append(f'{stage}（{ratio:.1f} 倍 > {limits[stage]} 倍）')
+        print(string.color_string(f'{stage:>8}: 新增 {current / 1024 / 1024:>7.2f} MB，'
+                                  f'峰值 {peak / 1024 / 1024:>7.2f} MB（{ratio:.1f} 倍）',
+                                  'red' if ratio > limits[stage] else 'green'))
+    assert not exceeded, f'峰值内存超过上限：{exceeded}'
+    return results
+
+
+def bench_multi(blocks: t.Union[int] = 1000, seed: t.Union[int] = 0, repeat: t.Union[int] = 3,
+                target_types: t.Sequence[str] = ('markdown', 'text', 'outline')):
+    """
+    对比逐个类型标签调用 `content_convert`（每个转换器各自解析一次）与 `convert_multi`（只解析一次）的耗时，
+    以及从序列化的中间文档渲染（不再解析）的耗时
+
+    :param blocks: 合成文档的顶层块数量
+    :param seed: 随机种子
+    :param repeat: 执行的次数
+    :param target_types: 需要渲染的类型标签
+    :return: 最快一次的耗时（秒）{名称: 耗时}
+    """
+    import lakedoc
+    from lakedoc.converters.document import LakeDocument
+    from .generator import generate_document
+
+    html = generate_document(blocks, seed=seed)
+    context = lakedoc.context
+    data = context.parse_document(html).dumps()
+    results = {
+        'separate': timeit(lambda: [context.content_convert(html, target_type) for target_type in target_types],
+                           repeat),
+        'convert_multi': timeit(lambda: context.convert_multi(html, target_types), repeat),
+        'from document': timeit(lambda: context.convert_multi(LakeDocument.loads(data), target_types), repeat),
+    }
+    print(string.color_string(f'类型标签：{", ".join(target_types)}，中间文档：{len(data) / 1024:.0f} KB', 'yellow'))
+    for label, seconds in results.items():
+        print(f'{label:>14}: {seconds * 1000:.1f} ms')
+    return results
+
+
+def bench_parallel(blocks: t.Union[int] = 20000, seed: t.Union[int] = 0, workers: t.Sequence[int] = (2, 4, 8),
+                   builder: t.Union[str] = 'lxml'):
+    """
+    对比串行转换与文档内并行（parallel）转换单个超大文档的耗时，并校验结果一致
+    （进程池预先启动，不计入耗时；实际的加速比受限于 CPU 核心数）
+
+    :param blocks: 合成文档的顶层块数量
+    :param seed: 随机种子
+    :param workers: 需要测试的进程数量
+    :param builder: 树构建器，默认：lxml
+    :return: 耗时（秒）{进程数量: 耗时}，串行转换的进程数量为 1
+    """
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from lakedoc.converters import md_parallel
+    from lakedoc.converters.md_converter import MarkdownConverter
+    from .generator import generate_document
+
+    html = generate_document(blocks, seed=seed)
+    chunks = md_parallel.split_html(html.replace('\n', '').replace('\r', '').strip())
+    start = time.perf_counter()
+    expected = MarkdownConverter(html, builder=builder).convert()
+    results = {1: time.perf_counter() - start}
+    for count in workers:
+        with ProcessPoolExecutor(max_workers=count) as executor:
+            list(executor.map(abs, range(count)))
+            start = time.perf_counter()
+            data = MarkdownConverter(html, builder=builder, parallel=executor).convert()
+            results[count] = time.perf_counter() - start
+        if data != expected:
+            raise AssertionError(f'parallel={count} 的转换结果与串行转换不一致')
+
+    print(string.color_string(f'文档大小：{len(html) / 1024 / 1024:.2f} MB，片段：{len(chunks)}，'
+                              f'CPU 核心数：{os.cpu_count()}', 'yellow'))
+    for count, seconds in results.items():
+        print(f'{count:>3} 进程: {seconds * 1000:.1f} ms（{results[1] / seconds:.2f}x）')
+    return results
+
+
+def bench_reuse(count: t.Union[int] = 2000, repeat: t.Union[int] = 5):
+    """
+    对比每个文档新建转换器与复用同一个转换器（`convert(raw_html)`）转换大量小片段的单文档耗时，并校验结果一致
+
+    :param count: 每轮转换的片段数量
+    :param repeat: 执行的轮数（取最快的一轮）
+    :return: 单个片段的耗时（秒）{'fresh': 新建转换器, 'reused': 复用转换器}
+    """
+    from lakedoc.converters.md_converter import MarkdownConverter
+
+    snippets = [
+        '<p>hi <strong>x</strong> <em>a</em><em>b</em></p>',
+        '<ul data-lake-indent="1"><li>one</li><li>two <code>x_y</code></li></ul>',
+        '<h2 id="t">Title</h2><p style="text-indent: 2em">text *with* _marks_</p>',
+        '<blockquote><p><span style="color: #F5222D">red</span> <del>gone</del></p></blockquote>',
+        '<pre>a  b\n  c</pre><table><tr><td>1</td><th>2</th></tr></table>',
+    ]
+    documents = [snippets[index % len(snippets)] for index in range(count)]
+    expected = [MarkdownConverter(html).convert() for html in snippets]
+    converter = MarkdownConverter()
+    if [converter.convert(html) for html in snippets] != expected:
+        raise AssertionError('复用转换器的转换结果与新建转换器不一致')
+
+    results = {
+        'fresh': timeit(lambda: [MarkdownConverter(html).convert() for html in documents], repeat) / count,
+        'reused': timeit(lambda: [converter.convert(html) for html in documents], repeat) / count,
+    }
+    print(string.color_string(f'{count} 个小片段，新建转换器：{results["fresh"] * 1e6:.1f} us/篇，'
+                              f'复用转换器：{results["reused"] * 1e6:.1f} us/篇', 'green'))
+    return results
+
+
+def bench_assets(images: t.Union[int] = 200, latency: t.Union[float] = 0.005, max_workers: t.Union[int] = 8):
+    """
+    使用 MappingFetcher（模拟每次下载的延迟）统计本地化大量图片 card 的转换耗时，并校验：同一个地址只下载一次、
+    资源按内容摘要命名（内容相同的资源只保存一份）、下载失败的资源保留远程地址、代码中相同的地址不被改写
+    （结果不符时抛出 AssertionError）
+
+    :param images: 图片地址的数量（每个地址在文档中出现两次，每两个地址的内容相同）
+    :param latency: 每次下载的模拟延迟（秒）
+    :param max_workers: 并发下载的线程数量
+    :return: 转换的耗时（秒）
+    """
+    import os
+    import hashlib
+    import tempfile
+    from collections import Counter
+    from lakedoc.context.assets import AssetLocalizer, MappingFetcher
+    from lakedoc.converters.md_converter import MarkdownConverter
+
+    urls = [f'https://cdn.example.com/{index}.png' for index in range(images)]
+    missing = 'https://cdn.example.com/missing.png'
+    mapping = {url: f'image-{index // 2}'.encode('utf-8') for index, url in enumerate(urls)}
+    fetcher = MappingFetcher(mapping)
+    calls = Counter()
+
+    def fetch(url):
+        calls[url] += 1
+        time.sleep(latency)
+        return fetcher(url)
+
+    def card(url):
+        return f'<card type="inline" name="image" value="{string.encode_card_value({"src": url})}"></card>'
+
+    html = ''.join(f'<p>{card(url)}</p><p>{card(url)}</p>' for url in urls)
+    html += f'<p>{card(missing)}</p><pre><code>{urls[0]}</code></pre><p><code>{urls[0]}</code></p>'
+    names = {url: f'{hashlib.sha256(data).hexdigest()[:32]}.png' for url, data in mapping.items()}
+
+    with tempfile.TemporaryDirectory() as directory:
+        with AssetLocalizer(directory, fetcher=fetch, prefix='assets', max_workers=max_workers) as localizer:
+            start = time.perf_counter()
+            md_data = MarkdownConverter(html, asset_localizer=localizer).convert()
+            seconds = time.perf_counter() - start
+        files = sorted(os.listdir(directory))
+
+    print(string.color_string(f'{images} 个图片地址（{max_workers} 线程，每次下载 {latency * 1000:.0f} ms），'
+                              f'本地化转换耗时：{seconds * 1000:.1f} ms', 'green'))
+    assert set(calls) == {*urls, missing} and max(calls.values()) == 1, '存在重复下载的地址'
+    assert files == sorted(set(names.values())), f'资源文件未按内容摘要命名：{files[:5]}'
+    for url in urls:
+        assert md_data.count(f'![图片未加载](assets/{names[url]})') == 4, f'`{url}`未改写为本地链接'
+    assert f'![图片未加载]({missing})' in md_data and missing in localizer.failures, '下载失败的资源未保留远程地址'
+    assert md_data.count(urls[0]) == 2, '代码中的地址被改写'
+    return seconds
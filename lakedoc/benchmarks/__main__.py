@@ -0,0 +1,74 @@
+import argparse
+from lakedoc.benchmarks import bench_single_parse, bench_styles, bench_merge_runs, bench_builders, bench_threads
+from lakedoc.benchmarks import bench_dispatch, bench_import, bench_memory, bench_multi, bench_parallel
+from lakedoc.benchmarks import bench_reuse, bench_assets
+from lakedoc.benchmarks import suite
+from lakedoc.utils import string
+
+# 以较小的规模运行带有结果校验的专项基准测试（校验失败时抛出 AssertionError）
+CHECKS = {
+    'threads': lambda: bench_threads(calls=200, workers=8),
+    'merge-runs': lambda: bench_merge_runs(run_length=5000),
+    'builders': lambda: bench_builders(scale=5, repeat=1),
+    'memory': lambda: bench_memory(blocks=1000),
+    'assets': lambda: bench_assets(images=50),
+    'import': lambda: bench_import('import lakedoc; lakedoc.MarkdownConverter', repeat=1, top=0),
+}
+
+
+def run_checks() -> int:
+    """
+    依次运行 `CHECKS` 中的各项校验
+
+    :return: 校验失败的数量
+    """
+    failures = 0
+    for name, check in CHECKS.items():
+        try:
+            check()
+        except AssertionError as e:
+            failures += 1
+            print(string.color_string(f'校验失败 [{name}]：{e}', 'red'))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m lakedoc.benchmarks', description='lakedoc 性能基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000], help='合成文档的顶层块数量')
+    parser.add_argument('--repeat', type=int, default=3, help='每个文档执行的次数')
+    parser.add_argument('--builder', default=None, help='树构建器，默认：html.parser')
+    parser.add_argument('--output', default=None, help='将结果保存为 JSON 文件')
+    parser.add_argument('--compare', default=None, help='与指定的 JSON 结果对比，存在性能退化时退出码为 1')
+    parser.add_argument('--all', action='store_true', help='同时运行各项专项基准测试')
+    parser.add_argument('--check', action='store_true', help='只运行带有结果校验的专项基准测试，校验失败时退出码为 1')
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(1 if run_checks() else 0)
+
+    results = suite.run_suite(args.sizes, args.repeat, args.builder)
+    suite.print_results(results)
+    if args.output:
+        suite.save_results(results, args.output)
+    if args.all:
+        bench_single_parse()
+        bench_styles()
+        bench_merge_runs()
+        bench_builders()
+        bench_threads()
+        bench_dispatch()
+        bench_memory()
+        bench_multi()
+        bench_parallel()
+        bench_reuse()
+        bench_assets()
+        bench_import()
+        bench_import('import lakedoc; lakedoc.MarkdownConverter')
+    if args.compare:
+        regressions = suite.compare_results(suite.load_results(args.compare), results)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
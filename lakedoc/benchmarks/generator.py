@@ -0,0 +1,115 @@
+"""
+合成 Lake 文档生成器
+
+按指定的块数量与比例生成 Lake 文档：带内联样式的段落、多级 data-lake-indent 列表、超长 em/strong 连续标签，
+以及转换器支持的全部 card 类型（value 为真实编码格式的数据）。相同的参数与随机种子总是生成相同的文档
+"""
+
+import random
+import typing as t
+from lakedoc.utils import string
+
+DEFAULT_MIX = {
+    'paragraph': 50,
+    'heading': 5,
+    'list': 15,
+    'runs': 10,
+    'card': 20,
+}
+
+COLORS = ('#F5222D', '#FA8C16', '#1890FF', '#52C41A', '#722ED1')
+WORDS = ('语雀', 'Lake', '文档', 'markdown', '转换', 'performance', '段落', 'card', '列表', 'style')
+
+
+def _value(data: t.Dict[str, t.Any]) -> str:
+    return string.encode_card_value(data)
+
+
+def _text(rng: random.Random, words: t.Union[int]) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _image_src(rng: random.Random) -> str:
+    return f'https://cdn.nlark.com/yuque/0/2024/png/{rng.randrange(10 ** 6)}/{rng.randrange(10 ** 12)}.png'
+
+
+def card_values(rng: random.Random) -> t.Dict[str, t.Callable[[], str]]:
+    """各类 card 的生成函数 {card 名称: 生成 <card> 标签的函数}"""
+
+    def card(name, data, card_type='inline'):
+        return f'<card type="{card_type}" name="{name}" value="{_value(data)}"></card>'
+
+    def image(name='image'):
+        return card(name, {'src': _image_src(rng), 'originWidth': 800, 'originHeight': 600, 'ratio': 1})
+
+    return {
+        'hr': lambda: '<card type="block" name="hr"></card>',
+        'image': lambda: f'<p>{image()}</p>',
+        'flowchart2': lambda: image('flowchart2'),
+        'board': lambda: card('board', {'src': _image_src(rng)}, 'block'),
+        'table': lambda: card('table', {'html': '<table><tr><td>a</td><td>b</td></tr></table>'}, 'block'),
+        'codeblock': lambda: card('codeblock', {'mode': 'python', 'code': f'def f():\n    return "{_text(rng, 3)}"'}),
+        'diagram': lambda: card('diagram', {'url': _image_src(rng)}, 'block'),
+        'math': lambda: f'<p style="text-align: center">{card("math", {"code": "a^2 + b^2 = c^2"})}</p>',
+        'yuqueinline': lambda: '<p>' + card('yuqueinline', {
+            'src': f'https://www.yuque.com/doc/{rng.randrange(10 ** 6)}',
+            'detail': {'title': _text(rng, 2), 'type': rng.choice(('doc', 'sheet'))},
+        }) + '</p>',
+        'bookmarkInline': lambda: '<p>' + card('bookmarkInline', {
+            'src': 'https://www.example.com/',
+            'detail': {'title': _text(rng, 2), 'icon': 'https://www.example.com/favicon.ico'},
+        }) + '</p>',
+        'imageGallery': lambda: card('imageGallery', {'imageList': [
+            {'title': _text(rng, 1), 'src': _image_src(rng), 'original': {'width': rng.randrange(100, 800)}}
+            for _ in range(3)
+        ]}, 'block'),
+        'localdoc': lambda: card('localdoc', {'src': 'https://www.yuque.com/attachments/a.pdf', 'name': 'a.pdf'},
+                                 'block'),
+    }
+
+
+def generate_document(blocks: t.Union[int] = 1000,
+                      mix: t.Optional[t.Dict[str, int]] = None,
+                      run_length: t.Union[int] = 50,
+                      seed: t.Union[int] = 0) -> str:
+    """
+    生成合成的 Lake 文档
+
+    :param blocks: 顶层块的数量（决定文档的大小）
+    :param mix: 各类块的比例权重，可选 paragraph、heading、list、runs、card，默认见 DEFAULT_MIX
+    :param run_length: runs 块中连续 em/strong 标签的数量
+    :param seed: 随机种子
+    :return: Lake 文档（HTML）
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*[(kind, weight) for kind, weight in mix.items() if weight > 0])
+    cards = card_values(rng)
+    card_names = sorted(cards)
+
+    parts = ['<!doctype lake><meta name="doc-version" content="1" />']
+    for index in range(blocks):
+        kind = rng.choices(kinds, weights)[0]
+        lake_id = f'u{index:08x}'
+        if kind == 'paragraph':
+            spans = ''.join(
+                f'<span data-lake-id="{lake_id}{i}" style="color: {rng.choice(COLORS)}; '
+                f'background-color: #FAFAFA">{_text(rng, 4)}</span><span>{_text(rng, 3)}</span>'
+                for i in range(rng.randint(1, 4))
+            )
+            parts.append(f'<p data-lake-id="{lake_id}" style="text-indent: 2em;">{spans}</p>')
+        elif kind == 'heading':
+            level = rng.randint(1, 4)
+            parts.append(f'<h{level} data-lake-id="{lake_id}"><span>{_text(rng, 3)}</span></h{level}>')
+        elif kind == 'list':
+            tag = rng.choice(('ul', 'ol'))
+            for indent in range(rng.randint(1, 4)):
+                items = ''.join(f'<li><span>{_text(rng, 3)}</span></li>' for _ in range(rng.randint(1, 3)))
+                parts.append(f'<{tag} data-lake-indent="{indent}">{items}</{tag}>')
+        elif kind == 'runs':
+            tag = rng.choice(('em', 'strong'))
+            runs = ''.join(f'<{tag}>{rng.choice(WORDS)[0]}</{tag}>' for _ in range(run_length))
+            parts.append(f'<p data-lake-id="{lake_id}">{runs}</p>')
+        else:
+            parts.append(cards[card_names[index % len(card_names)]]())
+    return ''.join(parts)
@@ -0,0 +1,164 @@
+"""
+分阶段基准测试
+
+对合成文档逐个阶段计时（解析、em/strong 合并、样式渲染、markdownify 遍历、添加标题、保存），
+结果为 JSON 结构，可保存后在不同版本之间对比
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import typing as t
+from os import PathLike
+from pathlib import Path
+from bs4 import BeautifulSoup
+from lakedoc.utils import file, string
+from .generator import generate_document
+
+STAGES = ('parse', 'merge', 'render_styles', 'walk', 'add_title', 'save')
+
+
+def run_stages(html: t.Union[str], builder: t.Union[str] = None,
+               title: t.Union[str] = '# Benchmark') -> t.Dict[str, float]:
+    """
+    按转换器的流程逐个阶段执行一次转换并计时
+
+    :param html: Lake 文档
+    :param builder: 树构建器
+    :param title: 添加的标题
+    :return: {阶段名称: 耗时（秒）}
+    """
+    from lakedoc.converters.md_converter import MarkdownConverter
+
+    converter = MarkdownConverter('<p></p>', builder=builder, title=title)
+    timings = {}
+
+    start = time.perf_counter()
+    raw_data = html.replace('\n', '').replace('\r', '').strip()
+    soup = BeautifulSoup(raw_data, converter.builder)
+    timings['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    converter.merge_adjacent_tags(soup)
+    timings['merge'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    converter.soup = soup
+    converter.prepare_soup()
+    timings['render_styles'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    md_data = converter.particular_converter.convert_soup(soup)
+    timings['walk'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    md_data = converter.add_title(md_data)
+    timings['add_title'] = time.perf_counter() - start
+
+    fd, temp = tempfile.mkstemp(suffix='.md')
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        file.savefile(md_data, temp)
+        timings['save'] = time.perf_counter() - start
+    finally:
+        os.unlink(temp)
+
+    return timings
+
+
+def run_suite(sizes: t.Sequence[int] = (100, 1000, 5000),
+              repeat: t.Union[int] = 3,
+              builder: t.Union[str] = None,
+              mix: t.Optional[t.Dict[str, int]] = None,
+              seed: t.Union[int] = 0) -> t.Dict[str, t.Any]:
+    """
+    对不同大小的合成文档执行分阶段基准测试（每个阶段取多次执行中的最快值）
+
+    :param sizes: 合成文档的顶层块数量
+    :param repeat: 每个文档执行的次数
+    :param builder: 树构建器
+    :param mix: 合成文档中各类块的比例权重
+    :param seed: 随机种子
+    :return: 可序列化为 JSON 的测试结果
+    """
+    import lakedoc
+
+    cases = []
+    for blocks in sizes:
+        html = generate_document(blocks, mix=mix, seed=seed)
+        best: t.Dict[str, float] = {}
+        for _ in range(repeat):
+            for stage, seconds in run_stages(html, builder).items():
+                best[stage] = min(best.get(stage, seconds), seconds)
+        cases.append({
+            'name': f'synthetic-{blocks}',
+            'blocks': blocks,
+            'bytes': len(html.encode('utf-8')),
+            'stages': best,
+            'total': sum(best.values()),
+        })
+
+    return {
+        'meta': {
+            'lakedoc': lakedoc.__version__,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'builder': builder or 'html.parser',
+            'repeat': repeat,
+            'seed': seed,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'cases': cases,
+    }
+
+
+def print_results(results: t.Dict[str, t.Any]):
+    """以表格形式输出测试结果（单位：毫秒）"""
+    print(string.color_string(f"lakedoc {results['meta']['lakedoc']} / python {results['meta']['python']} / "
+                              f"{results['meta']['builder']}", 'yellow'))
+    print(f"{'case':>18} {'MB':>7} " + ' '.join(f'{stage:>13}' for stage in STAGES) + f" {'total':>10}")
+    for case in results['cases']:
+        stages = ' '.join(f"{case['stages'].get(stage, 0) * 1000:>13.1f}" for stage in STAGES)
+        print(f"{case['name']:>18} {case['bytes'] / 1024 / 1024:>7.2f} {stages} {case['total'] * 1000:>10.1f}")
+
+
+def save_results(results: t.Dict[str, t.Any], path: t.Union[str, Path, PathLike]):
+    file.savefile(json.dumps(results, ensure_ascii=False, indent=2), path, suffix='json')
+
+
+def load_results(path: t.Union[str, Path, PathLike]) -> t.Dict[str, t.Any]:
+    return json.loads(file.readfile(path))
+
+
+def compare_results(baseline: t.Dict[str, t.Any], current: t.Dict[str, t.Any],
+                    threshold: t.Union[float] = 1.2) -> t.List[str]:
+    """
+    对比两次测试结果，输出各阶段的耗时比值（当前 / 基线）
+
+    :param baseline: 基线结果
+    :param current: 当前结果
+    :param threshold: 比值超过该值时视为性能退化，默认：1.2
+    :return: 性能退化的条目（case/stage）
+    """
+    baseline_cases = {case['name']: case for case in baseline['cases']}
+    regressions = []
+    for case in current['cases']:
+        old = baseline_cases.get(case['name'])
+        if old is None:
+            continue
+        cells = []
+        for stage in (*STAGES, 'total'):
+            old_seconds = old['total'] if stage == 'total' else old['stages'].get(stage)
+            new_seconds = case['total'] if stage == 'total' else case['stages'].get(stage)
+            if not old_seconds or new_seconds is None:
+                continue
+            ratio = new_seconds / old_seconds
+            if ratio > threshold:
+                regressions.append(f"{case['name']}/{stage}")
+            cells.append(string.color_string(f'{stage}={ratio:.2f}x', 'red' if ratio > threshold else 'green'))
+        print(f"{case['name']:>18}: {' '.join(cells)}")
+    return regressions
@@ -0,0 +1,306 @@
+"""
+命令行工具
+
+用法示例：
+    lakedoc ./export                                   # 转换目录中的所有 HTML 文件（输出到源文件旁边）
+    lakedoc ./export -o ./markdown -j 8                # 8 个进程并行转换，在 ./markdown 中保持相同的目录结构
+    lakedoc "./export/**/*.html" --title-from-filename # 通配符匹配，并以文件名作为标题
+    lakedoc ./export -o ./markdown --timeout 60        # 单个文档超过 60 秒时终止其工作进程，记录为失败并继续
+    lakedoc ./export.zip -o ./markdown.zip             # 直接读取压缩包中的 HTML 文件，结果写入新的压缩包（无需解压）
+    lakedoc serve -j 4                                 # 启动常驻的转换服务（预热的工作进程，见 lakedoc.context.daemon）
+    lakedoc convert ./export/page.html                 # 转换服务正在运行时交由其转换，否则在本地转换
+
+退出码：0 全部成功；1 存在转换失败的文件；2 参数错误或者没有找到需要转换的文件
+"""
+
+import sys
+import glob
+import time
+import argparse
+import typing as t
+from pathlib import Path, PurePosixPath
+from lakedoc.utils import string
+from lakedoc.utils.archive import ArchiveMember, ArchiveWriter, is_archive, open_reader, safe_name, write_format
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def has_magic(pattern: t.Union[str]) -> bool:
+    return any(char in pattern for char in '*?[')
+
+
+def collect_sources(inputs: t.Iterable[str],
+                    pattern: t.Union[str] = '*.html') -> t.Tuple[t.List[t.Tuple[t.Any, Path]], t.List[str]]:
+    """
+    展开命令行中的输入（文件、目录、通配符、压缩包），每个源文件记录其所属的根目录，用于在输出目录中保持相同的目录结构
+
+    :param inputs: 文件、目录、通配符或者压缩包（zip、tar，其中匹配的成员作为源文件，根目录为压缩包本身）
+    :param pattern: 目录或者压缩包中匹配源文件的通配符（递归匹配），默认：*.html
+    :return: ([(源文件或者压缩包成员, 根目录)], [无法匹配的输入])
+    """
+    sources: t.Dict[t.Any, Path] = {}
+    missing = []
+    for item in inputs:
+        path = Path(item)
+        if has_magic(item):
+            # 通配符之前的部分作为根目录，例如 export/**/*.html 的根目录为 export
+            static = []
+            for part in path.parts:
+                if has_magic(part):
+                    break
+                static.append(part)
+            root = Path(*static) if static else Path('.')
+            matches = [Path(match) for match in sorted(glob.glob(item, recursive=True)) if Path(match).is_file()]
+            for match in matches:
+                sources.setdefault(match, root)
+            if not matches:
+                missing.append(item)
+        elif path.is_dir():
+            for source in sorted(path.rglob(pattern)):
+                if source.is_file():
+                    sources.setdefault(source, path)
+        elif is_archive(path):
+            for member in open_reader(path).members(pattern):
+                sources.setdefault(member, path)
+        elif path.is_file():
+            sources.setdefault(path, path.parent)
+        else:
+            missing.append(item)
+    return list(sources.items()), missing
+
+
+def relative_name(source, root: Path, suffix: t.Union[str]) -> str:
+    """源文件（或者压缩包成员）相对于根目录的路径，并替换后缀"""
+    if isinstance(source, ArchiveMember):
+        name = PurePosixPath(safe_name(source.name))
+    else:
+        name = PurePosixPath(source.relative_to(root).as_posix())
+    return name.with_suffix(f'.{suffix}').as_posix()
+
+
+def target_path(source, root: Path, output_dir: t.Optional[Path], suffix: t.Union[str]) -> Path:
+    """
+    未指定输出目录时保存到源文件旁边（压缩包成员保存到与压缩包同名的目录中），
+    否则在输出目录中保持源文件相对于根目录的路径
+    """
+    if output_dir is None:
+        if isinstance(source, ArchiveMember):
+            return root.parent / root.name.split('.')[0] / relative_name(source, root, suffix)
+        return source.with_suffix(f'.{suffix}')
+    return output_dir / relative_name(source, root, suffix)
+
+
+class Progress(object):
+    """进度输出（终端中原地刷新进度行，否则只输出失败的文件）"""
+
+    def __init__(self, stream=None, quiet: t.Union[bool] = False):
+        self.stream = stream or sys.stderr
+        self.quiet = quiet
+        self.interactive = self.stream.isatty()
+        self.start = time.perf_counter()
+        self.bytes_in = 0
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: 0x{id(self):016X}>'
+
+    def __call__(self, result, done: t.Union[int], total: t.Union[int]):
+        self.bytes_in += result.bytes_in
+        if not result.ok:
+            self.write(string.color_string(f'失败：{result.source}：{result.error}', 'red'), newline=True)
+        if self.quiet or not self.interactive:
+            return
+        seconds = max(time.perf_counter() - self.start, 1e-9)
+        self.write(f'[{done}/{total}] {done / total * 100:5.1f}%  {done / seconds:.1f} 篇/秒  '
+                   f'{self.bytes_in / 1024 / 1024 / seconds:.2f} MB/秒', newline=done == total)
+
+    def write(self, text: t.Union[str], newline: t.Union[bool] = False):
+        prefix = '\r\033[K' if self.interactive else ''
+        end = '\n' if newline or not self.interactive else ''
+        self.stream.write(f'{prefix}{text}{end}')
+        self.stream.flush()
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='lakedoc', description='将语雀 Lake 文档（HTML）批量转换为 Markdown 等格式')
+    parser.add_argument('inputs', nargs='+', help='HTML 文件、目录（递归查找）、通配符（支持 **）或者 zip/tar 压缩包')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help='输出目录（保持源文件的目录结构），默认保存到源文件旁边；'
+                             '以 .zip、.tar、.tar.gz 等结尾时写入压缩包')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行转换的进程数量，默认为 CPU 核心数')
+    parser.add_argument('-t', '--target-type', default='markdown', help='转换器对应的类型标签，默认：markdown')
+    parser.add_argument('--builder', default=None,
+                        help='bs4 的树构建器（html.parser、lxml、auto 等），默认：html.parser')
+    parser.add_argument('--title', default=None, help='添加到每个文档顶部的标题（支持 md 语法）')
+    parser.add_argument('--title-from-filename', action='store_true', help='以源文件名（不含后缀）作为一级标题')
+    parser.add_argument('--pattern', default='*.html', help='目录中匹配源文件的通配符，默认：*.html')
+    parser.add_argument('--suffix', default='md', help='输出文件的后缀，默认：md')
+    parser.add_argument('--encoding', default='utf-8', help='读写文件的编码，默认：utf-8')
+    parser.add_argument('--max-size', type=float, default=None,
+                        help='单个文档的大小上限（MB），超过的文件记录为失败而不会读取，默认不限制')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='单个文档的转换超时时间（秒），超时的工作进程将被终止，该文件记录为失败，默认不限制')
+    parser.add_argument('--max-memory', type=float, default=None,
+                        help='每个工作进程的内存上限（MB，仅 POSIX），超出的文件记录为失败，默认不限制')
+    parser.add_argument('--failure-report', default=None, help='将失败的文件及其错误类型保存为 JSON 报告')
+    parser.add_argument('-q', '--quiet', action='store_true', help='不输出进度，只输出失败的文件与汇总信息')
+    parser.add_argument('--daemon', default=None,
+                        help='（lakedoc convert）转换服务的地址，默认为环境变量 LAKEDOC_DAEMON 或者当前用户的 Unix socket；'
+                             '指定 -j、--max-size、--timeout、--max-memory 或者涉及压缩包时在本地转换')
+    return parser
+
+
+def create_serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='lakedoc serve',
+                                     description='启动常驻的转换服务（预热的工作进程），lakedoc convert 将自动交由其转换')
+    parser.add_argument('--address', default=None,
+                        help='监听的地址：Unix socket 路径或者 http://127.0.0.1:端口，'
+                             '默认为环境变量 LAKEDOC_DAEMON 或者当前用户的 Unix socket')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='工作进程数量，默认为 CPU 核心数')
+    parser.add_argument('--queue-size', type=int, default=None,
+                        help='同时执行与等待执行的任务数量上限（超出时单个文档的请求响应 503），默认为工作进程数量的 4 倍')
+    parser.add_argument('--builder', default=None,
+                        help='bs4 的树构建器（html.parser、lxml、auto 等），默认：html.parser')
+    parser.add_argument('--max-size', type=float, default=None,
+                        help='单个文档的大小上限（MB），超过的文件记录为失败而不会读取，默认不限制')
+    parser.add_argument('--max-memory', type=float, default=None,
+                        help='每个工作进程的内存上限（MB，仅 POSIX），默认不限制')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出每个请求的日志')
+    return parser
+
+
+def serve(argv: t.Sequence[str]) -> int:
+    """lakedoc serve：启动转换服务，直到收到 SIGTERM/SIGINT"""
+    from lakedoc.utils import errors
+    from lakedoc.context.daemon import LakeDaemon
+
+    parser = create_serve_parser()
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('-j/--jobs 必须是正整数')
+    if args.queue_size is not None and args.queue_size < 1:
+        parser.error('--queue-size 必须是正整数')
+
+    options = {'builder': args.builder} if args.builder else {}
+    max_document_bytes = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+    max_memory = int(args.max_memory * 1024 * 1024) if args.max_memory is not None else None
+    daemon = LakeDaemon(args.address, args.jobs, args.queue_size, max_document_bytes=max_document_bytes,
+                        max_memory=max_memory, verbose=args.verbose, **options)
+    try:
+        daemon.bind()
+    except (errors.LakeDaemonError, OSError) as e:
+        daemon.close()
+        print(string.color_string(f'转换服务启动失败：{getattr(e, "error_info", e)}', 'red'), file=sys.stderr)
+        return EXIT_USAGE
+    print(string.color_string(f'转换服务已启动：{daemon.address}（{daemon.max_workers} 个工作进程，'
+                              f'队列上限 {daemon.queue_size}）', 'green'), file=sys.stderr)
+    if daemon.token is not None:
+        from lakedoc.context.daemon import token_path
+
+        print(f'访问令牌：{token_path(daemon.address)}', file=sys.stderr)
+    daemon.serve_forever()
+    return EXIT_OK
+
+
+def daemon_client(args: argparse.Namespace, pairs: t.List[t.Tuple[t.Any, t.Any, t.Dict[str, t.Any]]]):
+    """
+    lakedoc convert：返回正在运行的转换服务的客户端；参数涉及工作进程的限制、压缩包，或者服务未运行时返回 None
+    """
+    from lakedoc.context.daemon import DaemonClient
+
+    if any(value is not None for value in (args.jobs, args.max_size, args.timeout, args.max_memory)):
+        return None
+    if any(isinstance(source, ArchiveMember) or not isinstance(target, Path) for source, target, _ in pairs):
+        return None
+    client = DaemonClient(args.daemon)
+    return client if client.available() else None
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    """
+    命令行入口
+    :param argv: 命令行参数，默认为 sys.argv[1:]
+    :return: 退出码
+    """
+    from lakedoc.context import batch
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ['serve']:
+        return serve(argv[1:])
+    use_daemon = argv[:1] == ['convert']
+    if use_daemon:
+        argv = argv[1:]
+
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('-j/--jobs 必须是正整数')
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error('--timeout 必须是正数')
+    if args.max_memory is not None and args.max_memory <= 0:
+        parser.error('--max-memory 必须是正数')
+
+    sources, missing = collect_sources(args.inputs, args.pattern)
+    for item in missing:
+        print(string.color_string(f'未找到：{item}', 'red'), file=sys.stderr)
+    if not sources:
+        print(string.color_string('没有找到需要转换的文件', 'red'), file=sys.stderr)
+        return EXIT_USAGE
+
+    output_dir = Path(args.output_dir) if args.output_dir else None
+    output_archive = output_dir is not None and write_format(output_dir) is not None
+    pairs = []
+    for source, root in sources:
+        name = relative_name(source, root, args.suffix)
+        options = {'title': f'# {PurePosixPath(name).stem}'} if args.title_from_filename else {}
+        target = name if output_archive else target_path(source, root, output_dir, args.suffix)
+        pairs.append((source, target, options))
+
+    options = {}
+    if args.builder:
+        options['builder'] = args.builder
+    if args.title is not None:
+        options['title'] = args.title
+
+    max_document_bytes = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+    max_memory = int(args.max_memory * 1024 * 1024) if args.max_memory is not None else None
+    progress = Progress(quiet=args.quiet)
+    kwargs = dict(target_type=args.target_type, encoding=args.encoding, max_workers=args.jobs, progress=progress,
+                  max_document_bytes=max_document_bytes, timeout=args.timeout, max_memory=max_memory, **options)
+    client = daemon_client(args, pairs) if use_daemon else None
+    if client is not None:
+        with client:
+            report = client.convert_many(pairs, target_type=args.target_type, encoding=args.encoding,
+                                         progress=progress, **options)
+    elif output_archive:
+        with ArchiveWriter(output_dir) as writer:
+            report = batch.convert_many(pairs, writer=writer, **kwargs)
+    else:
+        report = batch.convert_many(pairs, **kwargs)
+    if args.failure_report:
+        report.save_failure_report(args.failure_report)
+
+    seconds = max(report.seconds, 1e-9)
+    color = 'green' if not report.failed else 'red'
+    print(string.color_string(
+        f'共 {len(report)} 篇，成功 {len(report.succeeded)} 篇，失败 {len(report.failed)} 篇，'
+        f'耗时 {report.seconds:.2f}s（{len(report) / seconds:.1f} 篇/秒，'
+        f'{report.bytes_in / 1024 / 1024 / seconds:.2f} MB/秒）', color), file=sys.stderr)
+    if report.failed:
+        by_type = report.failure_report()['by_type']
+        print(string.color_string('失败类型：' + '，'.join(f'{name} x{count}' for name, count in by_type.items()),
+                                  'red'), file=sys.stderr)
+
+    if report.failed or missing:
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def run():
+    """控制台脚本入口（pyproject 中的 lakedoc 命令）"""
+    sys.exit(main())
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,260 @@
+"""
+异步转换（asyncio）
+
+文件的读写在默认的线程池中执行，解析与转换（CPU 密集）在指定的执行器中执行（线程池或者进程池），
+因此转换期间不会阻塞事件循环。并发数量由信号量限制（背压），取消协程时尚未开始的转换不会再执行
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import threading
+import typing as t
+from concurrent.futures import Executor, ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+from lakedoc.utils import errors, file
+from lakedoc.utils.archive import ArchiveMember
+from .batch import BatchReport, ConvertResult, _init_worker, _fail
+
+
+def process_executor(max_workers: t.Optional[int] = None,
+                     converters: t.Optional[t.Dict[str, type]] = None,
+                     cache=None,
+                     max_document_bytes: t.Optional[int] = None,
+                     max_memory: t.Optional[int] = None,
+                     **options) -> ProcessPoolExecutor:
+    """
+    创建用于转换的进程池（工作进程在启动时导入一次 lakedoc 并注册转换器）
+
+    :param max_workers: 工作进程数量，默认为 CPU 核心数
+    :param converters: 需要在工作进程中额外注册的转换器 {类型标签: 转换器类}（转换器类必须可被导入）
+    :param cache: 转换结果缓存（ConvertCache），默认不使用缓存
+    :param max_document_bytes: 工作进程中单个文档的大小上限（字节），默认不限制
+    :param max_memory: 每个工作进程的内存（地址空间）上限（字节），默认不限制（仅 POSIX）
+    :param options: 工作进程中默认的转换选项
+    :return: 进程池
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                               initargs=(converters or {}, options, cache, max_document_bytes, max_memory))
+
+
+def _content_convert(html: t.Union[str], target_type: t.Union[str], uselast: t.Union[bool],
+                     options: t.Dict[str, t.Any]):
+    """在执行器中转换（进程池中使用工作进程自己的上下文）"""
+    from lakedoc.context import outer
+
+    return outer.context.content_convert(html, target_type, uselast, **options)
+
+
+def _read_html(read_path: t.Union[str, Path, PathLike], target_type: t.Union[str], uselast: t.Union[bool],
+               encoding: t.Union[str]) -> str:
+    from lakedoc.context import outer
+
+    return outer.context.read_html(read_path, target_type, uselast, encoding)
+
+
+def _read_sized(read_path: t.Union[str, Path, PathLike], target_type: t.Union[str], uselast: t.Union[bool],
+                encoding: t.Union[str]) -> t.Tuple[str, int]:
+    """读取 HTML 并计算其 UTF-8 编码后的字节数（在线程中执行，不在事件循环中编码整个文档）"""
+    html = _read_html(read_path, target_type, uselast, encoding)
+    return html, _utf8_size(html) if isinstance(html, str) else 0
+
+
+def _utf8_size(html: t.Union[str]) -> int:
+    return len(html.encode('utf-8'))
+
+
+def _savefile(data, save_path: t.Union[str, Path, PathLike], encoding: t.Union[str], suffix: t.Union[str]) -> int:
+    from lakedoc.context import outer
+
+    save_path = file.savepath(save_path, suffix)
+    cache = outer.context.cache
+    # 目标文件可能是旧的缓存硬链接，先删除再写入，避免改写缓存文件
+    if cache is not None and cache.link and save_path.is_file():
+        save_path.unlink()
+    return file.savefile(data, save_path, encoding, suffix)
+
+
+class _PendingSave(object):
+    """
+    批量转换中单个文件的保存：在线程中写入临时文件，转换在超时之前完成后才替换目标文件（`commit`）；
+    超时或失败时放弃（`abandon`），此时仍在线程中写入的临时文件由写入线程在结束时删除，不会留下目标文件
+    """
+
+    def __init__(self, target: t.Union[str, Path, PathLike]):
+        self.target = Path(target)
+        self.temp = self.target.with_name(f'{self.target.name}.{uuid.uuid4().hex}.tmp')
+        self._lock = threading.Lock()
+        self._written = False
+        self._abandoned = False
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.target}>'
+
+    def _remove(self):
+        if self.temp.is_file():
+            self.temp.unlink()
+
+    def save(self, data, encoding: t.Union[str], suffix: t.Union[str]) -> int:
+        """创建目标目录并写入临时文件（在线程中执行），返回写入的字节数"""
+        try:
+            self.target.parent.mkdir(parents=True, exist_ok=True)
+            written = file.savefile(data, self.temp, encoding, suffix)
+        except BaseException:
+            self._remove()
+            raise
+        with self._lock:
+            if self._abandoned:
+                self._remove()
+            else:
+                self._written = True
+        return written
+
+    def commit(self):
+        """使用临时文件替换目标文件（目标文件可能是旧的缓存硬链接，替换不会改写缓存文件）"""
+        os.replace(self.temp, self.target)
+
+    def abandon(self):
+        """放弃保存：删除已写入的临时文件，尚未写完的临时文件由写入线程删除"""
+        with self._lock:
+            self._abandoned = True
+            if self._written:
+                self._remove()
+
+
+async def _aconvert(html_or_path: t.Union[str, Path, PathLike],
+                    save_path: t.Union[str, Path, PathLike, None],
+                    target_type: t.Union[str],
+                    uselast: t.Union[bool],
+                    encoding: t.Union[str],
+                    suffix: t.Union[str],
+                    is_file: t.Union[bool],
+                    executor: t.Optional[Executor],
+                    options: t.Dict[str, t.Any],
+                    result: t.Optional[ConvertResult] = None):
+    loop = asyncio.get_running_loop()
+    size = None
+    if is_file and result is not None:
+        html, size = await loop.run_in_executor(None, _read_sized, html_or_path, target_type, uselast, encoding)
+    elif is_file:
+        html = await loop.run_in_executor(None, _read_html, html_or_path, target_type, uselast, encoding)
+    else:
+        html = html_or_path
+    if not isinstance(html, str):
+        raise errors.LakeContentTypeError('参数 html_or_path', 'str', str(type(html)))
+    if result is not None:
+        result.bytes_in = size if size is not None else await loop.run_in_executor(None, _utf8_size, html)
+
+    data = await loop.run_in_executor(executor, _content_convert, html, target_type, uselast, options)
+    if save_path is not None:
+        written = await loop.run_in_executor(None, _savefile, data, save_path, encoding, suffix)
+        if result is not None:
+            result.bytes_out = written
+    return data
+
+
+async def aconvert(html_or_path: t.Union[str, Path, PathLike],
+                   save_path: t.Union[str, Path, PathLike] = None,
+                   *,
+                   target_type: t.Union[str] = 'markdown',
+                   uselast: t.Union[bool] = False,
+                   encoding: t.Union[str] = 'utf-8',
+                   suffix: t.Union[str] = 'md',
+                   is_file: t.Union[bool] = True,
+                   executor: t.Optional[Executor] = None,
+                   semaphore: t.Optional[asyncio.Semaphore] = None,
+                   **options):
+    """
+    异步转换（参数同 `lakedoc.convert`），未指定保存路径时仅返回转换后的内容
+
+    :param html_or_path: 可以是 HTML 文件路径或者 HTML 内容（设置 is_file 为 False）
+    :param save_path: 保存的路径，支持目录或者文件，默认不保存
+    :param target_type: 转换器对应的类型标签，用于查找转换器类，默认：markdown
+    :param uselast: 开启后则使用最新 pick 的转换器类（如果没有，将自动 pick），默认不开启
+    :param encoding: 读写文件时指定的编码，默认：utf-8
+    :param suffix: 当保存路径是一个文件夹时，保存时采用的文件后缀，默认：md
+    :param is_file: 读取的通道。未开启时读取传入的内容，默认开启（读取文件）
+    :param executor: 执行转换的执行器（线程池或者 `process_executor()`），默认为事件循环的默认线程池
+    :param semaphore: 限制并发转换数量的信号量（多个调用之间共享以实现背压），默认不限制
+    :param options: 传递给转换器的参数（例如 builder、title），仅对本次调用生效
+    :return: 转换后的文本内容或者字节内容
+    """
+    args = (html_or_path, save_path, target_type, uselast, encoding, suffix, is_file, executor, options)
+    if semaphore is None:
+        return await _aconvert(*args)
+    async with semaphore:
+        return await _aconvert(*args)
+
+
+async def aconvert_many(pairs: t.Iterable[t.Sequence[t.Any]],
+                        *,
+                        target_type: t.Union[str] = 'markdown',
+                        encoding: t.Union[str] = 'utf-8',
+                        executor: t.Optional[Executor] = None,
+                        limit: t.Union[int] = 8,
+                        timeout: t.Optional[float] = None,
+                        **options) -> BatchReport:
+    """
+    异步批量转换文件，单个文件的失败（包括超时）记录在结果中而不会影响其它文件
+
+    :param pairs:
+        (读取路径, 保存路径) 的可迭代对象，保存路径必须是文件路径；
+        也可以是 (读取路径, 保存路径, 转换选项)，其中的转换选项仅对该文件生效（与 `convert_many` 一致）；
+        读取路径也可以是压缩包中的成员（ArchiveMember）
+    :param target_type: 转换器对应的类型标签，默认：markdown
+    :param encoding: 读写文件时指定的编码，默认：utf-8
+    :param executor: 执行转换的执行器（线程池或者 `process_executor()`），默认为事件循环的默认线程池
+    :param limit: 同时进行的转换数量上限，默认：8
+    :param timeout:
+        单个文件的超时时间（秒，包括读取、转换与写入），超时的文件记录为失败，默认不限制
+        （执行器中已开始的转换无法中断，会在后台运行至结束后丢弃结果；转换结果先写入临时文件，
+        只有在超时之前完成时才替换目标文件，因此超时的文件不会在之后被写入）
+    :param options: 传递给转换器的参数（例如 builder、title、extract_tags）
+    :return: 批量转换的结果报告（与 `convert_many` 一致）
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def convert_save(source, pending: _PendingSave, extra: t.Dict[str, t.Any], result: ConvertResult):
+        data = await _aconvert(source, None, target_type, False, encoding, 'md', True, executor,
+                               dict(options, **extra), result)
+        result.bytes_out = await loop.run_in_executor(None, pending.save, data, encoding, 'md')
+
+    async def convert_one(source, target: t.Union[str], extra: t.Dict[str, t.Any]) -> ConvertResult:
+        result = ConvertResult(str(source), target)
+        pending = _PendingSave(target)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(convert_save(source, pending, extra, result), timeout)
+                # 替换只修改目录项，直接在事件循环中执行，保证超时或者取消之后不会再替换目标文件
+                pending.commit()
+                result.ok = True
+            except asyncio.TimeoutError:
+                _fail(result, errors.LakeConvertTimeoutError(timeout, source))
+            except asyncio.CancelledError:
+                # Python 3.7 中 CancelledError 是 Exception 的子类，取消不能记录为文件的失败
+                raise
+            except MemoryError:
+                _fail(result, errors.LakeResourceLimitError(None, source))
+            except Exception as e:
+                _fail(result, e)
+            finally:
+                if not result.ok:
+                    pending.abandon()
+            result.seconds = time.perf_counter() - start
+        return result
+
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(convert_one(pair[0] if isinstance(pair[0], ArchiveMember) else str(pair[0]),
+                                               str(pair[1]), dict(pair[2]) if len(pair) > 2 else {}))
+             for pair in pairs]
+    try:
+        results = await asyncio.gather(*tasks)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
+    return BatchReport(list(results), time.perf_counter() - start)
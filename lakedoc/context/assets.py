@@ -0,0 +1,258 @@
+"""
+资源本地化（图片、图标、附件）
+
+转换前先收集 card 中引用的远程资源地址，通过可替换的下载器（fetcher）并发下载到本地的资源目录，
+转换时 card 处理函数直接得到本地路径（只有 card 引用的资源被替换，代码块与正文中相同的地址保持不变）。
+资源按地址去重（同一个地址只下载一次），并按内容摘要命名（内容相同的资源只保存一份）。
+下载失败的资源保留原始的远程地址，并记录在 `failures` 中
+
+下载器是任意的可调用对象：fetcher(url) -> bytes，例如：
+
+    localizer = AssetLocalizer('./assets', fetcher=MappingFetcher({url: b'...'}))
+
+AssetLocalizer 在多个文档之间复用同一个下载线程池（HTTPFetcher 的 keep-alive 连接随线程保留），
+用完后请调用 `close()` 或者使用 with 语句，关闭线程池与连接
+"""
+
+import os
+import hashlib
+import tempfile
+import mimetypes
+import threading
+import typing as t
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit, unquote
+from lakedoc.utils import errors
+
+Fetcher = t.Callable[[str], bytes]
+
+# 资源本地化只处理这些协议的地址
+REMOTE_SCHEMES = ('http://', 'https://')
+
+
+class HTTPFetcher(object):
+    def __init__(self, timeout: t.Union[float] = 30,
+                 headers: t.Optional[t.Dict[str, str]] = None,
+                 max_redirects: t.Union[int] = 5):
+        """
+        基于 http.client 的下载器，每个线程按 (协议, 主机) 复用连接（keep-alive）
+        :param timeout: 连接与读取的超时时间（秒），默认：30
+        :param headers: 额外的请求头
+        :param max_redirects: 最多跟随的重定向次数，默认：5
+        """
+        self.timeout = timeout
+        self.headers = {'User-Agent': 'lakedoc', **(headers or {})}
+        self.max_redirects = max_redirects
+        self._local = threading.local()
+        # 所有线程的连接（供 `close` 统一关闭）
+        self._pools: t.List[t.Dict[t.Tuple[str, str], http.client.HTTPConnection]] = []
+        self._pools_lock = threading.Lock()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: 0x{id(self):016X}>'
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_local', '_pools', '_pools_lock'):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._pools = []
+        self._pools_lock = threading.Lock()
+
+    def close(self):
+        """关闭所有线程中保留的连接"""
+        with self._pools_lock:
+            pools, self._pools = self._pools, []
+        for connections in pools:
+            for connection in list(connections.values()):
+                connection.close()
+            connections.clear()
+        self._local = threading.local()
+
+    def __call__(self, url: t.Union[str]) -> bytes:
+        for _ in range(self.max_redirects + 1):
+            parts = urlsplit(url)
+            path = parts.path or '/'
+            if parts.query:
+                path = f'{path}?{parts.query}'
+            response = self._request(parts.scheme, parts.netloc, path)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                response.read()
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            data = response.read()
+            if response.status != 200:
+                raise errors.LakeAssetFetchError(url, f'HTTP {response.status}')
+            return data
+        raise errors.LakeAssetFetchError(url, '重定向次数过多')
+
+    def _request(self, scheme: t.Union[str], netloc: t.Union[str], path: t.Union[str]):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+            with self._pools_lock:
+                self._pools.append(connections)
+
+        key = (scheme, netloc)
+        # 复用的连接可能已被服务端关闭，此时重新建立连接并重试一次
+        for retry in (False, True):
+            connection = connections.get(key)
+            if connection is None:
+                connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+                connection = connections[key] = connection_class(netloc, timeout=self.timeout)
+            try:
+                connection.request('GET', path, headers=self.headers)
+                return connection.getresponse()
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                connections.pop(key, None)
+                if retry:
+                    raise
+
+
+class MappingFetcher(object):
+    def __init__(self, mapping: t.Dict[str, t.Union[bytes, str, Path, PathLike]]):
+        """
+        从映射中读取资源的下载器（用于离线环境与测试）
+        :param mapping: {地址: 内容（bytes）或者本地文件路径}
+        """
+        self.mapping = mapping
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self.mapping)} urls>'
+
+    def __call__(self, url: t.Union[str]) -> bytes:
+        if url not in self.mapping:
+            raise errors.LakeAssetFetchError(url, '地址不存在')
+        data = self.mapping[url]
+        if isinstance(data, bytes):
+            return data
+        return Path(data).read_bytes()
+
+
+class AssetLocalizer(object):
+    def __init__(self, directory: t.Union[str, Path, PathLike],
+                 fetcher: t.Optional[Fetcher] = None,
+                 prefix: t.Union[str] = None,
+                 max_workers: t.Union[int] = 8):
+        """
+        资源本地化
+        :param directory: 资源的保存目录（不存在时自动创建）
+        :param fetcher: 下载器 fetcher(url) -> bytes，默认为 HTTPFetcher()
+        :param prefix: 改写后链接的前缀，例如 'assets'（Markdown 文件与资源目录同级时），默认为资源目录的绝对路径
+        :param max_workers: 并发下载的线程数量，默认：8
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fetcher = fetcher or HTTPFetcher()
+        self.prefix = (prefix if prefix is not None else self.directory.absolute().resolve().as_posix()).rstrip('/')
+        self.max_workers = max_workers
+        self.links: t.Dict[str, str] = {}
+        self.failures: t.Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor: t.Optional[ThreadPoolExecutor] = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {str(self.directory)} prefix={self.prefix}>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """关闭下载线程池，以及下载器保留的连接（下载器提供 close 方法时）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+        if hasattr(self.fetcher, 'close'):
+            self.fetcher.close()
+
+    def cache_key(self) -> t.Tuple[str, str]:
+        """影响转换结果的配置（用于增量同步的清单指纹）：资源目录与改写后的链接前缀"""
+        return self.directory.absolute().as_posix(), self.prefix
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock')
+        state['_executor'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_remote(url: t.Union[str]) -> bool:
+        return isinstance(url, str) and url.startswith(REMOTE_SCHEMES)
+
+    def localize(self, urls: t.Iterable[str]) -> t.Dict[str, str]:
+        """
+        并发下载尚未下载过的资源（已下载或已失败的地址不会重复下载）
+        :param urls: 资源地址
+        :return: 下载成功的资源 {远程地址: 本地链接}
+        """
+        urls = list(dict.fromkeys(url for url in urls if self.is_remote(url)))
+        with self._lock:
+            pending = [url for url in urls if url not in self.links and url not in self.failures]
+        if len(pending) == 1 or self.max_workers <= 1:
+            for url in pending:
+                self._download(url)
+        elif pending:
+            list(self.executor().map(self._download, pending))
+        return {url: self.links[url] for url in urls if url in self.links}
+
+    def executor(self) -> ThreadPoolExecutor:
+        """下载线程池（第一次并发下载时创建，之后在所有文档之间复用，线程中的连接也随之保留）"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='lakedoc-assets')
+            return self._executor
+
+    def link(self, url: t.Union[str]) -> str:
+        """
+        资源的本地链接（尚未下载时先下载）
+        :param url: 资源地址
+        :return: 本地链接，不是远程地址或者下载失败时返回原地址
+        """
+        return self.localize([url]).get(url, url)
+
+    def _download(self, url: t.Union[str]):
+        try:
+            data = self.fetcher(url)
+        except Exception as e:
+            with self._lock:
+                self.failures[url] = f'{e.__class__.__name__}: {getattr(e, "error_info", e)}'
+            return
+
+        name = f'{hashlib.sha256(data).hexdigest()[:32]}{self._suffix(url)}'
+        path = self.directory / name
+        if not path.is_file():
+            # 先写入临时文件再替换，并发下载相同内容时不会产生残缺的文件
+            fd, temp = tempfile.mkstemp(dir=self.directory, prefix=f'{name}.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fw:
+                    fw.write(data)
+                os.replace(temp, path)
+            except BaseException:
+                os.unlink(temp)
+                raise
+        with self._lock:
+            self.links[url] = f'{self.prefix}/{name}'
+
+    @staticmethod
+    def _suffix(url: t.Union[str]) -> str:
+        suffix = Path(unquote(urlsplit(url).path)).suffix.lower()
+        if suffix and len(suffix) <= 8 and suffix[1:].isalnum():
+            return suffix
+        guessed = mimetypes.guess_type(url)[0]
+        return (mimetypes.guess_extension(guessed) or '') if guessed else ''
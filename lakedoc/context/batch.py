@@ -0,0 +1,516 @@
+"""
+批量转换（多进程）
+
+工作进程在启动时导入一次 lakedoc 并注册转换器，之后的每个文件都复用该上下文，不再重复导入
+
+每个工作进程一次只转换一个文件，由主进程监督（故障隔离）：
+    - 超时：转换超过墙钟时间的工作进程将被终止，该文件记录为 LakeConvertTimeoutError
+    - 内存上限：通过 RLIMIT_AS 限制工作进程的地址空间（仅 POSIX），内存分配失败的文件记录为 LakeResourceLimitError
+    - 异常退出：工作进程崩溃（例如被系统终止）时，正在转换的文件记录为 LakeWorkerCrashError
+被终止或者退出的工作进程由新的工作进程替换，其余文件继续转换
+
+源文件也可以是压缩包中的成员（ArchiveMember），由工作进程各自从压缩包中读取；
+转换结果可以由主进程直接写入压缩包（ArchiveWriter），整个过程无需解压到磁盘
+"""
+
+import os
+import json
+import time
+import multiprocessing
+import typing as t
+from collections import deque
+from multiprocessing.connection import wait
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from lakedoc.utils import errors
+from lakedoc.utils.archive import ArchiveMember
+
+try:
+    import resource
+except ImportError:
+    # Windows 中不支持限制工作进程的内存
+    resource = None
+
+# 终止超时的工作进程时，等待其退出的时间（秒），超过后强制结束
+KILL_GRACE_SECONDS = 1.0
+
+_worker_context = None
+_worker_max_memory = None
+
+
+class ConvertResult(object):
+    """单个文件的转换结果"""
+
+    def __init__(self, source: t.Union[str], target: t.Union[str]):
+        self.source = source
+        self.target = target
+        self.data: t.Optional[bytes] = None  # 未指定保存路径时的转换结果（编码后），写入压缩包后清空
+        self.ok = False
+        self.error: t.Optional[str] = None
+        self.error_type: t.Optional[str] = None
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cached = False
+        self.metrics = None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'error={self.error!r}'
+        return f'<{self.__class__.__name__}: {self.source} {status} {self.seconds * 1000:.1f}ms>'
+
+
+class BatchReport(object):
+    """批量转换的结果报告（按输入顺序保存每个文件的结果）"""
+
+    def __init__(self, results: t.List[ConvertResult], seconds: t.Union[float]):
+        self.results = results
+        self.seconds = seconds
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__}: total={len(self.results)} ok={len(self.succeeded)} '
+                f'failed={len(self.failed)} {self.seconds:.2f}s>')
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def succeeded(self) -> t.List[ConvertResult]:
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> t.List[ConvertResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def bytes_in(self) -> int:
+        return sum(result.bytes_in for result in self.results)
+
+    @property
+    def bytes_out(self) -> int:
+        return sum(result.bytes_out for result in self.results)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(result.cached for result in self.results)
+
+    def failure_report(self) -> t.Dict[str, t.Any]:
+        """
+        结构化的失败报告（可以序列化为 JSON）
+        :return: {'total': 总数, 'failed': 失败数, 'by_type': {错误类型: 数量}, 'failures': [失败文件的详情]}
+        """
+        failures = [{
+            'source': result.source,
+            'target': result.target,
+            'error_type': result.error_type,
+            'error': result.error,
+            'seconds': round(result.seconds, 6),
+        } for result in self.failed]
+        by_type: t.Dict[str, int] = {}
+        for failure in failures:
+            by_type[failure['error_type']] = by_type.get(failure['error_type'], 0) + 1
+        return {'total': len(self.results), 'failed': len(failures), 'by_type': by_type, 'failures': failures}
+
+    def save_failure_report(self, path: t.Union[str, Path, PathLike]) -> int:
+        """将失败报告保存为 JSON 文件，返回失败的文件数量"""
+        report = self.failure_report()
+        Path(path).write_bytes(json.dumps(report, ensure_ascii=False, indent=1).encode('utf-8'))
+        return report['failed']
+
+    def metrics(self, slowest: t.Union[int] = 10):
+        """
+        汇总各文件的性能指标（需要在 `convert_many` 中开启 collect_metrics）
+        :param slowest: 保留耗时最长的文档数量，默认：10
+        :return: MetricsAggregator
+        """
+        from lakedoc.utils.metrics import MetricsAggregator
+
+        aggregator = MetricsAggregator(slowest)
+        for result in self.results:
+            if result.metrics is not None:
+                aggregator.add(result.metrics)
+        return aggregator
+
+
+def _limit_memory(max_memory: t.Optional[int]):
+    """限制当前进程的地址空间（字节），不支持的平台中忽略"""
+    if max_memory is None or resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_memory = min(max_memory, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_memory, hard))
+
+
+def _init_worker(converters: t.Dict[str, type], options: t.Dict[str, t.Any], cache=None,
+                 max_document_bytes: t.Optional[int] = None, max_memory: t.Optional[int] = None):
+    """
+    工作进程的初始化函数：导入 lakedoc、注册转换器并设置转换选项、缓存、文档大小上限、内存上限（每个进程仅执行一次）
+    """
+    global _worker_context, _worker_max_memory
+    import lakedoc
+
+    _worker_context = lakedoc.context
+    for target_type, converter_class in converters.items():
+        _worker_context.register(target_type, converter_class)
+    _worker_context.set_options(**options)
+    _worker_context.set_cache(cache)
+    _worker_context.set_max_document_bytes(max_document_bytes)
+    # 导入完成后再限制内存，上限只约束文档的转换
+    _limit_memory(max_memory)
+    _worker_max_memory = max_memory
+
+
+def _convert_one(source: t.Union[str], target: t.Union[str],
+                 target_type: t.Union[str], encoding: t.Union[str],
+                 collect_metrics: t.Union[bool] = False,
+                 options: t.Optional[t.Dict[str, t.Any]] = None) -> ConvertResult:
+    """
+    在工作进程中转换单个文件，异常将记录在结果中而不会抛出
+    （source 可以是压缩包中的成员；target 为 None 时不保存，编码后的转换结果记录在 result.data 中）
+    """
+    def work(result: ConvertResult):
+        result.bytes_in = _source_size(source)
+        if target is None:
+            result.data = _worker_context.read_convert(source, target_type, encoding=encoding,
+                                                       **(options or {})).encode(encoding)
+            result.bytes_out = len(result.data)
+        else:
+            Path(target).parent.mkdir(parents=True, exist_ok=True)
+            result.bytes_out = _worker_context.read_convert_stream(source, target, target_type, encoding=encoding,
+                                                                   **(options or {}))
+
+    return _run_job(ConvertResult(str(source), target), target_type, collect_metrics, work)
+
+
+def _run_job(result: ConvertResult, target_type: t.Union[str], collect_metrics: t.Union[bool],
+             work: t.Callable[[ConvertResult], t.Any]) -> ConvertResult:
+    """在工作进程中执行单个转换任务：计时、收集性能指标、记录缓存命中，异常将记录在结果中而不会抛出"""
+    from lakedoc.utils import metrics
+
+    token = None
+    if collect_metrics:
+        result.metrics = metrics.ConvertMetrics(target_type)
+        result.metrics.source = result.source
+        token = metrics.activate(result.metrics)
+    start = time.perf_counter()
+    try:
+        cache = _worker_context.cache
+        hits = cache.hits if cache is not None else 0
+        work(result)
+        result.cached = cache is not None and cache.hits > hits
+        result.ok = True
+    except MemoryError:
+        _fail(result, errors.LakeResourceLimitError(_worker_max_memory, result.source))
+    except Exception as e:
+        _fail(result, e)
+    result.seconds = time.perf_counter() - start
+    if token is not None:
+        metrics.deactivate(token)
+        result.metrics.seconds = result.seconds
+        result.metrics.error = result.error
+    return result
+
+
+def _source_size(source) -> int:
+    """源文件（或者压缩包成员解压后）的大小"""
+    if isinstance(source, (str, PathLike)):
+        return Path(source).stat().st_size
+    return source.stat_size()
+
+
+def _fail(result: ConvertResult, error: BaseException):
+    """将异常记录在结果中"""
+    result.ok = False
+    result.error_type = error.__class__.__name__
+    result.error = f'{result.error_type}: {getattr(error, "error_info", error)}'
+
+
+def _worker_main(connection, initargs: t.Tuple[t.Any, ...]):
+    """
+    隔离的工作进程：初始化完成后发送 ('ready', None)，之后逐个接收任务并发送 ('result', ConvertResult)，
+    接收到 None 或者主进程关闭连接时退出
+    """
+    try:
+        _init_worker(*initargs)
+    except Exception as e:
+        connection.send(('error', f'{e.__class__.__name__}: {getattr(e, "error_info", e)}'))
+        return
+    connection.send(('ready', None))
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        connection.send(('result', _convert_one(*task)))
+
+
+class _Worker(object):
+    """主进程中的工作进程句柄（记录正在转换的任务及其截止时间）"""
+
+    def __init__(self, mp_context, initargs: t.Tuple[t.Any, ...]):
+        self.connection, child = mp_context.Pipe()
+        self.process = mp_context.Process(target=_worker_main, args=(child, initargs), daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+        self.index: t.Optional[int] = None
+        self.task: t.Optional[t.Tuple[t.Any, ...]] = None
+        self.started = 0.0
+        self.deadline: t.Optional[float] = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: pid={self.process.pid} task={self.index}>'
+
+    @property
+    def idle(self) -> bool:
+        return self.ready and self.index is None
+
+    def submit(self, index: t.Union[int], task: t.Tuple[t.Any, ...], timeout: t.Optional[float]):
+        self.index, self.task = index, task
+        self.started = time.perf_counter()
+        self.deadline = self.started + timeout if timeout is not None else None
+        self.connection.send(task)
+
+    def release(self):
+        self.index = self.task = self.deadline = None
+
+    def stop(self):
+        """通知工作进程退出（空闲时）"""
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+
+    def kill(self):
+        """终止工作进程（先 SIGTERM，超过等待时间后 SIGKILL）"""
+        self.process.terminate()
+        self.process.join(KILL_GRACE_SECONDS)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+def _aborted_result(worker: _Worker, error: errors.LakeIsolationError) -> ConvertResult:
+    """被中止的任务的结果（工作进程可能留下了不完整的输出文件，将其删除）"""
+    source, target, target_type = worker.task[:3]
+    result = ConvertResult(str(source), target)
+    _fail(result, error)
+    result.seconds = time.perf_counter() - worker.started
+    try:
+        result.bytes_in = _source_size(source)
+    except (OSError, errors.LakeBaseError):
+        pass
+    if target is not None:
+        try:
+            Path(target).unlink()
+        except OSError:
+            pass
+    if worker.task[4]:
+        from lakedoc.utils import metrics
+
+        result.metrics = metrics.ConvertMetrics(target_type)
+        result.metrics.source = result.source
+        result.metrics.seconds = result.seconds
+        result.metrics.error = result.error
+    return result
+
+
+def _run_isolated(tasks: t.List[t.Tuple[t.Any, ...]],
+                  max_workers: t.Union[int],
+                  initargs: t.Tuple[t.Any, ...],
+                  timeout: t.Optional[float],
+                  on_result: t.Callable[[int, ConvertResult], t.Any]):
+    """在隔离的工作进程中执行任务，超时的工作进程被终止，退出的工作进程被替换"""
+    mp_context = multiprocessing.get_context()
+    pending = deque(enumerate(tasks))
+    workers = [_Worker(mp_context, initargs) for _ in range(max_workers)]
+    try:
+        while pending or any(worker.index is not None for worker in workers):
+            for worker in workers:
+                if pending and worker.idle:
+                    worker.submit(*pending.popleft(), timeout)
+
+            deadlines = [worker.deadline for worker in workers if worker.deadline is not None]
+            wait_seconds = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            wait([worker.connection for worker in workers] + [worker.process.sentinel for worker in workers],
+                 wait_seconds)
+
+            for position, worker in enumerate(workers):
+                replace = False
+                try:
+                    message = worker.connection.recv() if worker.connection.poll() else None
+                except (EOFError, OSError):
+                    message = None
+                    worker.process.join(KILL_GRACE_SECONDS)
+
+                if message is not None:
+                    kind, payload = message
+                    if kind == 'ready':
+                        worker.ready = True
+                    elif kind == 'error':
+                        raise errors.LakeContextError(f'工作进程初始化失败：{payload}')
+                    else:
+                        index = worker.index
+                        worker.release()
+                        # 内存分配失败后进程的状态不可靠，替换为新的工作进程
+                        replace = payload.error_type == errors.LakeResourceLimitError.__name__
+                        on_result(index, payload)
+                elif not worker.process.is_alive():
+                    if not worker.ready:
+                        raise errors.LakeContextError(f'工作进程初始化失败（退出码：{worker.process.exitcode}）')
+                    if worker.index is not None:
+                        error = errors.LakeWorkerCrashError(worker.process.exitcode, str(worker.task[0]))
+                        index, result = worker.index, _aborted_result(worker, error)
+                        worker.release()
+                        on_result(index, result)
+                    replace = True
+                elif worker.deadline is not None and time.perf_counter() >= worker.deadline:
+                    worker.kill()
+                    error = errors.LakeConvertTimeoutError(timeout, str(worker.task[0]))
+                    index, result = worker.index, _aborted_result(worker, error)
+                    worker.release()
+                    on_result(index, result)
+                    replace = True
+
+                if replace:
+                    if worker.process.is_alive():
+                        worker.kill()
+                    # 没有剩余的任务时不再启动新的工作进程
+                    workers[position] = _Worker(mp_context, initargs) if pending else None
+            workers = [worker for worker in workers if worker is not None]
+    finally:
+        for worker in workers:
+            if worker.idle:
+                worker.stop()
+            else:
+                worker.kill()
+        for worker in workers:
+            worker.process.join(KILL_GRACE_SECONDS)
+            if worker.process.is_alive():
+                worker.kill()
+
+
+def convert_many(pairs: t.Iterable[t.Sequence[t.Any]],
+                 target_type: t.Union[str] = 'markdown',
+                 encoding: t.Union[str] = 'utf-8',
+                 max_workers: t.Optional[int] = None,
+                 converters: t.Optional[t.Dict[str, type]] = None,
+                 cache=None,
+                 collect_metrics: t.Union[bool] = False,
+                 max_document_bytes: t.Optional[int] = None,
+                 progress: t.Optional[t.Callable[[ConvertResult, int, int], t.Any]] = None,
+                 timeout: t.Optional[float] = None,
+                 max_memory: t.Optional[int] = None,
+                 writer=None,
+                 **options) -> BatchReport:
+    """
+    使用进程池批量转换文件
+
+    :param pairs:
+        (读取路径, 保存路径) 的可迭代对象，保存路径必须是文件路径；
+        也可以是 (读取路径, 保存路径, 转换选项)，其中的转换选项仅对该文件生效（例如每个文件不同的 title）；
+        读取路径也可以是压缩包中的成员（ArchiveMember）
+    :param target_type: 转换器对应的类型标签，默认：markdown
+    :param encoding: 读写文件时指定的编码，默认：utf-8
+    :param max_workers: 工作进程数量，默认为 CPU 核心数
+    :param converters: 需要在工作进程中额外注册的转换器 {类型标签: 转换器类}（转换器类必须可被导入）
+    :param cache: 转换结果缓存（ConvertCache），命中的文件将跳过转换，默认不使用缓存
+    :param collect_metrics: 是否收集每个文件的性能指标（通过 `BatchReport.metrics()` 汇总），默认关闭
+    :param max_document_bytes: 单个文档的大小上限（字节），超过的文件记录为失败而不会读取，默认不限制
+    :param progress: 进度回调 progress(单个文件的结果, 已完成的数量, 总数)，按完成的顺序在主进程中调用
+    :param timeout: 单个文件的转换超时时间（秒），超时的工作进程将被终止，该文件记录为失败，默认不限制
+    :param max_memory: 每个工作进程的内存（地址空间）上限（字节），超出的文件记录为失败，默认不限制（仅 POSIX）
+    :param writer: 压缩包写入器（ArchiveWriter），指定后保存路径作为成员名称，转换结果由主进程写入压缩包
+    :param options: 传递给转换器的参数（例如 builder、title、extract_tags）
+    :return: 批量转换的结果报告（单个文件的失败，包括超时、超出内存上限与工作进程崩溃，都不会中止其它文件的转换）
+    """
+    pairs = [(pair[0] if isinstance(pair[0], ArchiveMember) else str(pair[0]), str(pair[1]),
+              dict(pair[2]) if len(pair) > 2 else {}) for pair in pairs]
+    results: t.List[t.Optional[ConvertResult]] = [None] * len(pairs)
+    start = time.perf_counter()
+
+    done = 0
+
+    def on_result(index: t.Union[int], result: ConvertResult):
+        nonlocal done
+        if writer is not None:
+            result.target = pairs[index][1]
+            if result.ok:
+                writer.write(result.target, result.data)
+                result.data = None
+        results[index] = result
+        done += 1
+        if progress is not None:
+            progress(result, done, len(pairs))
+
+    if pairs:
+        max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(pairs)))
+        tasks = [(source, None if writer is not None else target, target_type, encoding, collect_metrics, extra)
+                 for source, target, extra in pairs]
+        initargs = (converters or {}, options, cache, max_document_bytes, max_memory)
+        _run_isolated(tasks, max_workers, initargs, timeout, on_result)
+    return BatchReport(results, time.perf_counter() - start)
+
+
+def convert_tree(source_dir: t.Union[str, Path, PathLike],
+                 target_dir: t.Union[str, Path, PathLike],
+                 pattern: t.Union[str] = '*.html',
+                 suffix: t.Union[str] = 'md',
+                 **kwargs) -> BatchReport:
+    """
+    遍历源目录中匹配的文件并批量转换，在目标目录中保持相同的相对路径结构
+
+    :param source_dir: 源目录
+    :param target_dir: 目标目录（不存在时自动创建）
+    :param pattern: 匹配源文件的通配符（递归匹配），默认：*.html
+    :param suffix: 保存文件的后缀，默认：md
+    :param kwargs: 其余参数同 `convert_many`
+    :return: 批量转换的结果报告
+    """
+    source_dir, target_dir = Path(source_dir), Path(target_dir)
+    pairs = [
+        (source, target_dir / source.relative_to(source_dir).with_suffix(f'.{suffix}'))
+        for source in sorted(source_dir.rglob(pattern)) if source.is_file()
+    ]
+    return convert_many(pairs, **kwargs)
+
+
+def convert_archive(source: t.Union[str, Path, PathLike],
+                    target: t.Union[str, Path, PathLike],
+                    pattern: t.Union[str] = '*.html',
+                    suffix: t.Union[str] = 'md',
+                    compresslevel: t.Optional[int] = None,
+                    **kwargs) -> BatchReport:
+    """
+    批量转换压缩包（例如语雀知识库的导出文件）中匹配的成员，无需先解压到磁盘：
+    工作进程直接从压缩包中读取各自的成员，目标是压缩包时由主进程将转换结果逐个写入（全部完成后原子地替换），
+    否则保存到目标目录中，保持相同的相对路径结构
+
+    :param source: 源压缩包（zip 或者 tar，tar 支持 gz、bz2、xz 压缩），也可以是目录（同 `convert_tree`）
+    :param target: 目标压缩包（格式由后缀决定：.zip、.tar、.tar.gz/.tgz、.tar.bz2/.tbz2、.tar.xz/.txz）或者目录
+    :param pattern: 匹配成员的通配符（规则同 Path.rglob），默认：*.html
+    :param suffix: 转换结果的后缀，默认：md
+    :param compresslevel: 目标压缩包的压缩级别，默认使用各格式的默认值
+    :param kwargs: 其余参数同 `convert_many`
+    :return: 批量转换的结果报告（source 为成员的 `压缩包路径!/成员名称`）
+    """
+    from lakedoc.utils.archive import ArchiveWriter, open_reader, safe_name, write_format
+
+    source, target = Path(source), Path(target)
+    if source.is_dir():
+        names = [(item, item.relative_to(source).as_posix())
+                 for item in sorted(source.rglob(pattern)) if item.is_file()]
+    else:
+        names = [(member, safe_name(member.name)) for member in open_reader(source).members(pattern)]
+    pairs = [(item, PurePosixPath(name).with_suffix(f'.{suffix}').as_posix()) for item, name in names]
+
+    if write_format(target) is None:
+        return convert_many([(item, target / name) for item, name in pairs], **kwargs)
+    with ArchiveWriter(target, compresslevel) as writer:
+        return convert_many(pairs, writer=writer, **kwargs)
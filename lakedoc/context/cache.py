@@ -0,0 +1,274 @@
+"""
+基于内容寻址的转换缓存（磁盘）
+
+缓存键由原始 HTML、转换器类、转换器版本以及影响转换结果的转换选项（见 LakeBaseConverter.cache_options）共同计算得出，
+命中时直接复制（或硬链接）缓存的结果，完全跳过解析与转换。
+带有副作用的选项（资源本地化会下载文件）不使用缓存，否则命中时会跳过下载
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import typing as t
+from os import PathLike
+from pathlib import Path
+from lakedoc.utils import errors
+
+# 只影响转换的执行方式、不影响转换结果的选项（转换器未声明 cache_options 时从缓存键中排除）
+RUNTIME_OPTIONS = ('parallel',)
+# 带有副作用的选项，取值不为 None 时不使用缓存
+SIDE_EFFECT_OPTIONS = ('asset_localizer',)
+
+
+def _normalize(value: t.Any) -> t.Any:
+    """
+    将转换选项规整为稳定、可重复的结构（集合排序、可调用对象取其导入路径、对象取其 `cache_key()`），
+    其余无法稳定表示的对象（repr 中通常带有内存地址）抛出 LakeContentTypeError
+    """
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    if hasattr(value, 'cache_key'):
+        return [f'{type(value).__module__}.{type(value).__qualname__}', _normalize(value.cache_key())]
+    if isinstance(value, dict):
+        return sorted((str(k), _normalize(v)) for k, v in value.items())
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(_normalize(v)) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if callable(value) and hasattr(value, '__qualname__'):
+        return f'{getattr(value, "__module__", "")}.{value.__qualname__}'
+    raise errors.LakeContentTypeError('缓存键中的转换选项', 'str/int/float/bool/None、容器、函数或者类、带有 cache_key() 的对象',
+                                      str(type(value)))
+
+
+class ConvertCache(object):
+    def __init__(self, directory: t.Union[str, Path, PathLike],
+                 max_bytes: t.Union[int] = 1024 * 1024 * 1024,
+                 link: t.Union[bool] = False):
+        """
+        转换结果缓存
+        :param directory: 缓存目录（不存在时自动创建）
+        :param max_bytes: 缓存的最大容量，超出后按最近最少使用淘汰，默认：1GB
+        :param link: 命中时使用硬链接代替复制（硬链接失败时自动回退为复制），默认关闭
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: t.Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__}: {str(self.directory)} hits={self.hits} '
+                f'misses={self.misses} evictions={self.evictions}>')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock')
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def stats(self) -> t.Dict[str, int]:
+        """缓存的命中、未命中、淘汰次数以及当前的容量"""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'bytes': self.size}
+
+    @staticmethod
+    def accepts(options: t.Dict[str, t.Any]) -> bool:
+        """本次转换的选项是否可以使用缓存（带有副作用的选项，例如资源本地化，不使用缓存）"""
+        return all(options.get(name) is None for name in SIDE_EFFECT_OPTIONS)
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(entry.stat().st_size for entry in self._entries())
+        return self._size
+
+    def key(self, html: t.Union[str], converter_class: type,
+            options: t.Dict[str, t.Any], mode: t.Union[str] = 'text') -> str:
+        """
+        计算缓存键
+        :param html: 原始的 HTML 内容
+        :param converter_class: 转换器类
+        :param options:
+            实际生效的转换选项，只有转换器声明的影响转换结果的选项（cache_options）参与计算；
+            转换器的全局状态（cache_state()，例如全局注册的 card 处理函数）也参与计算
+        :param mode: 缓存内容的形式（text 或者 file:<编码>）
+        :return: 缓存键（十六进制摘要）
+        """
+        from lakedoc import __version__
+
+        names = getattr(converter_class, 'cache_options', None)
+        cache_state = getattr(converter_class, 'cache_state', None)
+        if names is None:
+            options = {name: value for name, value in options.items() if name not in RUNTIME_OPTIONS}
+        else:
+            options = {name: value for name, value in options.items() if name in names}
+
+        header = repr((
+            __version__,
+            f'{converter_class.__module__}.{converter_class.__qualname__}',
+            getattr(converter_class, 'version', ''),
+            _normalize(options),
+            _normalize(cache_state()) if cache_state is not None else None,
+            mode,
+        ))
+        digest = hashlib.sha256(header.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(html.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key: t.Union[str]) -> Path:
+        return self.directory / key[:2] / key
+
+    def load_text(self, key: t.Union[str]) -> t.Optional[str]:
+        """读取缓存的文本内容，未命中时返回 None"""
+        path = self.path(key)
+        try:
+            data = path.read_bytes().decode('utf-8')
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        self._touch(path)
+        self._count(hit=True)
+        return data
+
+    def store_text(self, key: t.Union[str], data: t.Union[str]):
+        """缓存文本内容"""
+        self._store(key, lambda fw: fw.write(data.encode('utf-8')))
+
+    def load_document(self, key: t.Union[str]):
+        """读取缓存的中间文档（LakeDocument），未命中时返回 None"""
+        from lakedoc.converters.document import LakeDocument
+
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+        self._touch(path)
+        self._count(hit=True)
+        return LakeDocument.loads(data)
+
+    def store_document(self, key: t.Union[str], document):
+        """缓存中间文档（以 JSON 形式保存，读取时不会执行任何代码）"""
+        self._store(key, lambda fw: fw.write(document.dumps()))
+
+    def fetch(self, key: t.Union[str], target: t.Union[str, Path, PathLike]) -> t.Optional[int]:
+        """
+        将缓存的文件复制（或硬链接）到目标路径
+        :return: 文件的字节数，未命中时返回 None
+        """
+        path, target = self.path(key), Path(target)
+        if not path.is_file():
+            self._count(hit=False)
+            return None
+
+        # 先删除目标文件，避免覆盖写入到旧的硬链接（即缓存文件本身）
+        if target.is_file():
+            target.unlink()
+        try:
+            if not self.link:
+                raise OSError
+            os.link(path, target)
+        except OSError:
+            shutil.copyfile(path, target)
+        self._touch(path)
+        self._count(hit=True)
+        return target.stat().st_size
+
+    def store_file(self, key: t.Union[str], source: t.Union[str, Path, PathLike]):
+        """将转换结果文件存入缓存"""
+        with open(source, 'rb') as fr:
+            self._store(key, lambda fw: shutil.copyfileobj(fr, fw))
+
+    def clear(self):
+        """清空缓存（使所有缓存失效），计数器同时清零"""
+        for entry in self._entries():
+            entry.unlink()
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+            self._size = 0
+
+    def invalidate(self, key: t.Union[str]):
+        """使指定的缓存失效"""
+        path = self.path(key)
+        if path.is_file():
+            size = path.stat().st_size
+            path.unlink()
+            with self._lock:
+                if self._size is not None:
+                    self._size -= size
+
+    def _entries(self) -> t.List[Path]:
+        return [entry for entry in self.directory.glob('??/*') if entry.is_file() and '.tmp' not in entry.name]
+
+    def _count(self, hit: t.Union[bool]):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _touch(path: Path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _store(self, key: t.Union[str], write: t.Callable[[t.BinaryIO], t.Any]):
+        """原子地写入缓存文件（先写临时文件再替换），并在超出容量时淘汰旧的缓存"""
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f'{key}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fw:
+                write(fw)
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+        size = path.stat().st_size
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """按最近使用时间淘汰缓存，直到容量降到上限的 90% 以下"""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort(key=lambda item: item[0])
+
+        size = sum(item[1] for item in entries)
+        limit = self.max_bytes * 0.9
+        evicted = 0
+        for _, entry_size, entry in entries:
+            if size <= limit:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            evicted += 1
+
+        with self._lock:
+            self._size = size
+            self.evictions += evicted
@@ -0,0 +1,721 @@
+"""
+常驻的转换服务（lakedoc serve）
+
+每次在命令行中调用 lakedoc 都需要启动解释器、导入 bs4/markdownify 并创建上下文，转换小文档时这部分开销远大于转换本身。
+转换服务常驻后台，维持一组已预热的工作进程（导入 lakedoc、注册转换器、设置转换选项各一次），
+通过本地的 Unix socket 或者 localhost 的 HTTP 接收转换任务：
+
+    GET  /health      服务状态（进程号、工作进程数量、队列占用）
+    GET  /metrics     累计的任务数量与性能指标（MetricsAggregator 的汇总）
+    POST /convert     转换单个文档：{"html": 内容} 或者 {"source": 文件路径, "target": 保存路径}，
+                      未指定保存路径时响应体即为转换结果，否则响应 JSON 格式的转换结果
+    POST /batch       批量转换：{"jobs": [{"source", "target", "options"}, ...]}，
+                      响应为逐行的 JSON（NDJSON），每完成一个文件输出一行（按完成的顺序，index 为任务的序号）
+
+同时执行与等待执行的任务数量不超过 queue_size（背压）：/convert 在队列已满时立即响应 503，由客户端稍后重试；
+/batch 在队列已满时暂停提交，等待已提交的任务完成。
+
+文件路径由工作进程直接读写，因此只有启动服务的用户可以调用：
+    - 默认的 Unix socket 与令牌文件位于按用户区分的运行时目录（见 `runtime_dir`，只允许当前用户访问）
+    - Unix socket 创建时即只允许当前用户读写（0600）；客户端连接之前、读取令牌之前确认文件属于当前用户且其他用户无法访问，
+      防止其他用户抢先创建同名的 socket 接收文档内容与路径
+    - HTTP 只监听本机的地址，每个请求都必须携带启动时生成的令牌（Authorization: Bearer，令牌保存在只允许当前用户读取的文件中，
+      见 `token_path`），并且 Host 必须是监听的地址（防止 DNS rebinding）
+    - POST 请求的 Content-Type 必须是 application/json（浏览器无法在不经过预检的情况下跨站发送）
+"""
+
+import os
+import hmac
+import json
+import time
+import queue
+import signal
+import secrets
+import socket
+import stat
+import tempfile
+import threading
+import typing as t
+import http.client
+import socketserver
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+from lakedoc.utils import errors, metrics
+from . import batch
+from .batch import BatchReport, ConvertResult, _convert_one, _fail, _run_job
+
+# 转换服务地址的环境变量（Unix socket 路径，或者 http://127.0.0.1:端口）
+ADDRESS_ENV = 'LAKEDOC_DAEMON'
+# 单个请求体的大小上限（字节）
+MAX_REQUEST_BYTES = 256 * 1024 * 1024
+# 队列已满时建议客户端重试的间隔（秒）
+RETRY_AFTER_SECONDS = 1
+# 只接受本机的连接
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+
+def _user_id() -> str:
+    if hasattr(os, 'getuid'):
+        return str(os.getuid())
+    import getpass
+
+    return getpass.getuser()
+
+
+def runtime_dir() -> Path:
+    """
+    按用户区分的运行时目录：$XDG_RUNTIME_DIR/lakedoc，否则为临时目录中的 lakedoc-{uid}（不存在时创建，只允许当前用户访问）
+    （其他用户抢先创建的目录将在使用时被 `check_directory` 拒绝）
+    """
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    path = Path(base) / 'lakedoc' if base else Path(tempfile.gettempdir()) / f'lakedoc-{_user_id()}'
+    try:
+        path.mkdir(mode=0o700, exist_ok=True)
+    except OSError:
+        pass
+    return path
+
+
+def check_directory(directory: t.Union[str, Path], address: t.Union[str]):
+    """
+    确认目录中的文件无法被其他用户替换：目录属于当前用户（或者 root）且其他用户不可写，或者设置了粘滞位（例如 /tmp），
+    否则抛出 LakeDaemonError（不支持 os.getuid 的平台不检查）
+    :param directory: 目录
+    :param address: 服务地址（用于错误信息）
+    """
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.stat(directory)
+    if info.st_uid not in (os.getuid(), 0) or (info.st_mode & 0o022 and not info.st_mode & stat.S_ISVTX):
+        raise errors.LakeDaemonError(address, f'目录`{directory}`不属于当前用户或者可以被其他用户修改')
+
+
+def check_private(path: t.Union[str, Path], address: t.Union[str]):
+    """
+    确认转换服务的文件（Unix socket、令牌文件）属于当前用户、其他用户无法访问（0600）并且所在的目录安全，
+    否则抛出 LakeDaemonError（不支持 os.getuid 的平台不检查）
+    :param path: 文件路径（不存在时抛出 FileNotFoundError）
+    :param address: 服务地址（用于错误信息）
+    """
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.lstat(path)
+    if info.st_uid != os.getuid() or stat.S_ISLNK(info.st_mode) or info.st_mode & 0o077:
+        raise errors.LakeDaemonError(address, f'`{path}`不属于当前用户或者其他用户可以访问')
+    check_directory(os.path.dirname(os.path.abspath(path)), address)
+
+
+def default_address() -> str:
+    """默认的服务地址：环境变量 LAKEDOC_DAEMON，否则为运行时目录中的 Unix socket（不支持时使用 localhost 的 HTTP）"""
+    address = os.environ.get(ADDRESS_ENV)
+    if address:
+        return address
+    if not hasattr(socket, 'AF_UNIX'):
+        return 'http://127.0.0.1:8765'
+    return str(runtime_dir() / 'lakedoc.sock')
+
+
+def token_path(address: t.Union[str]) -> Path:
+    """HTTP 地址的令牌文件：运行时目录中按端口区分，服务启动时写入（0600），客户端从中读取"""
+    _, (_, port) = parse_address(address)
+    return runtime_dir() / f'lakedoc-{port}.token'
+
+
+def write_token(path: t.Union[str, Path]) -> str:
+    """
+    生成新的令牌并写入只允许当前用户读写的文件（已存在的旧文件先删除，避免沿用他人创建的文件）
+    :param path: 令牌文件路径
+    :return: 令牌
+    """
+    token = secrets.token_urlsafe(32)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        f.write(token)
+    return token
+
+
+def read_token(path: t.Union[str, Path], address: t.Union[str] = None) -> t.Optional[str]:
+    """读取令牌文件，不存在时返回 None；文件不属于当前用户或者其他用户可以访问时抛出 LakeDaemonError"""
+    try:
+        check_private(path, address or str(path))
+        return Path(path).read_text(encoding='ascii').strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def parse_address(address: t.Union[str]) -> t.Tuple[str, t.Any]:
+    """
+    解析服务地址
+    :param address: Unix socket 路径，或者 http://主机:端口
+    :return: ('unix', 路径) 或者 ('tcp', (主机, 端口))
+    """
+    if address.startswith('http://'):
+        parts = urlsplit(address)
+        return 'tcp', (parts.hostname or '127.0.0.1', parts.port or 80)
+    return 'unix', address
+
+
+def _convert_content(html: t.Union[str], target_type: t.Union[str], encoding: t.Union[str],
+                     options: t.Optional[t.Dict[str, t.Any]] = None) -> ConvertResult:
+    """在工作进程中转换 HTML 内容，编码后的转换结果记录在 result.data 中"""
+    def work(result: ConvertResult):
+        result.bytes_in = len(html.encode('utf-8'))
+        result.data = batch._worker_context.content_convert(html, target_type, **(options or {})).encode(encoding)
+        result.bytes_out = len(result.data)
+
+    return _run_job(ConvertResult(None, None), target_type, True, work)
+
+
+def result_to_dict(result: ConvertResult, index: t.Optional[int] = None) -> t.Dict[str, t.Any]:
+    """转换结果的 JSON 表示（不含转换结果的内容与性能指标）"""
+    data = {
+        'source': result.source,
+        'target': None if result.target is None else str(result.target),
+        'ok': result.ok,
+        'error': result.error,
+        'error_type': result.error_type,
+        'seconds': round(result.seconds, 6),
+        'bytes_in': result.bytes_in,
+        'bytes_out': result.bytes_out,
+        'cached': result.cached,
+    }
+    if index is not None:
+        data['index'] = index
+    return data
+
+
+def result_from_dict(data: t.Dict[str, t.Any]) -> ConvertResult:
+    """从 JSON 表示中恢复转换结果"""
+    result = ConvertResult(data['source'], data['target'])
+    result.ok = data['ok']
+    result.error = data['error']
+    result.error_type = data['error_type']
+    result.seconds = data['seconds']
+    result.bytes_in = data['bytes_in']
+    result.bytes_out = data['bytes_out']
+    result.cached = data['cached']
+    return result
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'lakedoc'
+
+    @property
+    def daemon(self) -> 'LakeDaemon':
+        return self.server.lake_daemon
+
+    def address_string(self):
+        # Unix socket 的客户端地址为空字符串
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.daemon.verbose:
+            super().log_message(format, *args)
+
+    def authorize(self) -> bool:
+        """
+        校验 HTTP 请求的 Host 与令牌（Unix socket 由文件权限保护，无需校验），不通过时响应错误并关闭连接
+        :return: 是否通过校验
+        """
+        token = self.daemon.token
+        if token is None:
+            return True
+        if self.headers.get('Host', '').lower() not in self.daemon.allowed_hosts:
+            status, message = 403, 'Host 必须是转换服务监听的地址'
+        elif not hmac.compare_digest(self.headers.get('Authorization', '').encode('utf-8'),
+                                     f'Bearer {token}'.encode('utf-8')):
+            status, message = 401, '缺少或者错误的令牌'
+        else:
+            return True
+        # 未读取的请求体会破坏后续的请求，因此关闭连接
+        self.close_connection = True
+        self.send_json(status, {'error': message})
+        return False
+
+    def do_GET(self):
+        if not self.authorize():
+            return
+        if self.path == '/health':
+            self.send_json(200, self.daemon.health())
+        elif self.path == '/metrics':
+            self.send_json(200, self.daemon.metrics())
+        else:
+            self.send_json(404, {'error': f'未知的路径：{self.path}'})
+
+    def do_POST(self):
+        if not self.authorize():
+            return
+        if self.headers.get('Content-Type', '').split(';')[0].strip().lower() != 'application/json':
+            self.close_connection = True
+            self.send_json(415, {'error': 'Content-Type 必须是 application/json'})
+            return
+        try:
+            request = self.read_json()
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        if self.path == '/convert':
+            self.handle_convert(request)
+        elif self.path == '/batch':
+            self.handle_batch(request)
+        else:
+            self.send_json(404, {'error': f'未知的路径：{self.path}'})
+
+    def read_json(self) -> t.Dict[str, t.Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_BYTES:
+            # 未读取的请求体会破坏后续的请求，因此关闭连接
+            self.close_connection = True
+            raise ValueError(f'请求体超过了 {MAX_REQUEST_BYTES} 字节')
+        request = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        if not isinstance(request, dict):
+            raise ValueError('请求体必须是 JSON 对象')
+        return request
+
+    def send_json(self, status: t.Union[int], data: t.Any, headers: t.Dict[str, str] = None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, body, 'application/json; charset=utf-8', headers)
+
+    def send_body(self, status: t.Union[int], body: t.Union[bytes], content_type: t.Union[str],
+                  headers: t.Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_convert(self, request: t.Dict[str, t.Any]):
+        """转换单个文档，队列已满时响应 503"""
+        if 'html' not in request and not request.get('source'):
+            self.send_json(400, {'error': '需要指定 html 或者 source'})
+            return
+        if not self.daemon.acquire(block=False):
+            self.send_json(503, {'error': '队列已满，请稍后重试'}, {'Retry-After': str(RETRY_AFTER_SECONDS)})
+            return
+        target_type = request.get('target_type') or 'markdown'
+        encoding = request.get('encoding') or 'utf-8'
+        options = request.get('options') or {}
+        if 'html' in request:
+            future = self.daemon.submit(_convert_content, request['html'], target_type, encoding, options)
+        else:
+            target = request.get('target')
+            future = self.daemon.submit(_convert_one, request.get('source'), target, target_type, encoding,
+                                        True, options)
+        result = self.daemon.result(future)
+        if not result.ok:
+            self.send_json(422, result_to_dict(result))
+        elif result.data is not None:
+            self.send_body(200, result.data, f'text/plain; charset={encoding}')
+        else:
+            self.send_json(200, result_to_dict(result))
+
+    def handle_batch(self, request: t.Dict[str, t.Any]):
+        """批量转换，按完成的顺序逐行（NDJSON）输出结果，队列已满时暂停提交"""
+        jobs = request.get('jobs') or []
+        target_type = request.get('target_type') or 'markdown'
+        encoding = request.get('encoding') or 'utf-8'
+        options = request.get('options') or {}
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        finished: 'queue.Queue[t.Tuple[int, Future]]' = queue.Queue()
+        written = 0
+
+        def write(index: t.Union[int], future: Future):
+            line = json.dumps(result_to_dict(self.daemon.result(future), index), ensure_ascii=False) + '\n'
+            self.write_chunk(line.encode('utf-8'))
+
+        for index, job in enumerate(jobs):
+            self.daemon.acquire(block=True)
+            future = self.daemon.submit(_convert_one, job.get('source'), job.get('target'), target_type, encoding,
+                                        True, {**options, **(job.get('options') or {})})
+            future.add_done_callback(lambda done, index=index: finished.put((index, done)))
+            while not finished.empty():
+                write(*finished.get_nowait())
+                written += 1
+        while written < len(jobs):
+            write(*finished.get())
+            written += 1
+        self.write_chunk(b'')
+
+    def write_chunk(self, data: t.Union[bytes]):
+        self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+class LakeDaemon(object):
+    def __init__(self, address: t.Union[str] = None,
+                 max_workers: t.Optional[int] = None,
+                 queue_size: t.Optional[int] = None,
+                 converters: t.Optional[t.Dict[str, type]] = None,
+                 cache=None,
+                 max_document_bytes: t.Optional[int] = None,
+                 max_memory: t.Optional[int] = None,
+                 verbose: t.Union[bool] = False,
+                 **options):
+        """
+        常驻的转换服务
+        :param address: 监听的地址（Unix socket 路径，或者 http://127.0.0.1:端口），默认见 `default_address`
+        :param max_workers: 工作进程数量，默认为 CPU 核心数
+        :param queue_size: 同时执行与等待执行的任务数量上限，默认为工作进程数量的 4 倍
+        :param converters: 需要在工作进程中额外注册的转换器 {类型标签: 转换器类}（转换器类必须可被导入）
+        :param cache: 转换结果缓存（ConvertCache），默认不使用缓存
+        :param max_document_bytes: 单个文档的大小上限（字节），默认不限制
+        :param max_memory: 每个工作进程的内存（地址空间）上限（字节），默认不限制（仅 POSIX）
+        :param verbose: 是否输出每个请求的日志，默认关闭
+        :param options: 工作进程中默认的转换选项（例如 builder）
+        """
+        self.address = address or default_address()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.max_workers * 4
+        self.verbose = verbose
+        self.started = time.time()
+        self.jobs = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.aggregator = metrics.MetricsAggregator()
+        self._executor_args = (converters, cache, max_document_bytes, max_memory, options)
+        self._executor = self.create_executor()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._server: t.Optional[socketserver.BaseServer] = None
+        # HTTP 的令牌与允许的 Host（绑定后生成），Unix socket 时为 None
+        self.token: t.Optional[str] = None
+        self.allowed_hosts: t.Set[str] = set()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.address} workers={self.max_workers} jobs={self.jobs}>'
+
+    def create_executor(self):
+        """创建进程池，并让每个工作进程完成启动（导入 lakedoc、注册转换器）"""
+        from .aio import process_executor
+
+        converters, cache, max_document_bytes, max_memory, options = self._executor_args
+        executor = process_executor(self.max_workers, converters, cache, max_document_bytes, max_memory, **options)
+        for future in [executor.submit(os.getpid) for _ in range(self.max_workers)]:
+            future.result()
+        return executor
+
+    def acquire(self, block: t.Union[bool] = True) -> bool:
+        """占用队列中的一个位置，队列已满且不等待时返回 False"""
+        if self._slots.acquire(blocking=block):
+            with self._lock:
+                self.in_flight += 1
+            return True
+        with self._lock:
+            self.rejected += 1
+        return False
+
+    def submit(self, fn: t.Callable, *args) -> Future:
+        """提交任务（必须先通过 `acquire` 占用位置，任务完成后自动释放）"""
+        try:
+            future = self._executor.submit(fn, *args)
+        except BrokenProcessPool:
+            future = Future()
+            future.set_exception(BrokenProcessPool('进程池已损坏'))
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def result(self, future: Future) -> ConvertResult:
+        """
+        等待任务完成并记录性能指标；工作进程异常退出导致进程池损坏时，重建进程池，该任务记录为失败
+        """
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            result = ConvertResult(None, None)
+            _fail(result, errors.LakeWorkerCrashError(None))
+            self.replace_executor()
+        with self._lock:
+            self.jobs += 1
+            self.failed += not result.ok
+            if result.metrics is not None:
+                self.aggregator.add(result.metrics)
+                result.metrics = None
+        return result
+
+    def replace_executor(self):
+        with self._lock:
+            broken = self._executor
+            if not getattr(broken, '_broken', False):
+                return
+            self._executor = self.create_executor()
+        broken.shutdown(wait=False)
+
+    def health(self) -> t.Dict[str, t.Any]:
+        import lakedoc
+
+        return {
+            'status': 'ok',
+            'version': lakedoc.__version__,
+            'pid': os.getpid(),
+            'workers': self.max_workers,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'uptime': round(time.time() - self.started, 3),
+        }
+
+    def metrics(self) -> t.Dict[str, t.Any]:
+        with self._lock:
+            return {
+                'jobs': self.jobs,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'in_flight': self.in_flight,
+                'queue_size': self.queue_size,
+                'uptime': round(time.time() - self.started, 3),
+                'aggregate': self.aggregator.summary(),
+            }
+
+    def bind(self) -> socketserver.BaseServer:
+        """绑定监听的地址（Unix socket 已存在时，确认没有服务在使用后删除）"""
+        kind, location = parse_address(self.address)
+        if kind == 'tcp':
+            host, port = location
+            if host not in LOOPBACK_HOSTS:
+                raise errors.LakeDaemonError(self.address, f'只能监听本机的地址（{", ".join(LOOPBACK_HOSTS)}）')
+            path = token_path(self.address)
+            check_directory(path.parent, self.address)
+            server = _TCPHTTPServer(location, _RequestHandler)
+            # http.client 在默认端口时省略 Host 中的端口
+            name = f'[{host}]' if ':' in host else host
+            self.allowed_hosts = {f'{name}:{port}'.lower()} | ({name.lower()} if port == 80 else set())
+            self.token = write_token(path)
+        else:
+            check_directory(os.path.dirname(os.path.abspath(location)), self.address)
+            if os.path.exists(location):
+                if DaemonClient(self.address, timeout=1).available():
+                    raise errors.LakeDaemonError(self.address, '已有转换服务正在运行')
+                os.unlink(location)
+            # socket 文件在绑定时即创建，先收紧 umask，避免绑定后到修改权限之前的间隙中被其他用户连接
+            umask = os.umask(0o177)
+            try:
+                server = _UnixHTTPServer(location, _RequestHandler)
+            finally:
+                os.umask(umask)
+        server.lake_daemon = self
+        self._server = server
+        return server
+
+    def serve_forever(self):
+        """启动服务直到收到 SIGTERM/SIGINT（或者调用 `shutdown`），退出时关闭工作进程并删除 Unix socket"""
+        server = self._server or self.bind()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def close(self):
+        if self._server is not None:
+            self._server.server_close()
+            kind, location = parse_address(self.address)
+            if kind == 'unix' and os.path.exists(location):
+                os.unlink(location)
+            if self.token is not None and read_token(token_path(self.address), self.address) == self.token:
+                os.unlink(token_path(self.address))
+            self._server = None
+        self._executor.shutdown()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: t.Union[str], timeout: t.Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        # 连接之前确认 socket 由当前用户创建，不向其他用户的进程发送文档内容与路径
+        check_private(self.unix_path, self.unix_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class DaemonClient(object):
+    def __init__(self, address: t.Union[str] = None, timeout: t.Optional[float] = None,
+                 token: t.Optional[str] = None):
+        """
+        转换服务的客户端（每个客户端复用一个连接，请勿在多个线程中共享）
+        :param address: 服务地址，默认见 `default_address`
+        :param timeout: 连接与读取的超时时间（秒），默认不限制
+        :param token: HTTP 地址的令牌，默认从服务启动时写入的令牌文件（见 `token_path`）中读取
+        """
+        self.address = address or default_address()
+        self.timeout = timeout
+        self.token = token
+        self._connection: t.Optional[http.client.HTTPConnection] = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.address}>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def connection(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            kind, location = parse_address(self.address)
+            if kind == 'tcp':
+                self._connection = http.client.HTTPConnection(*location, timeout=self.timeout)
+            else:
+                self._connection = _UnixHTTPConnection(location, timeout=self.timeout)
+        return self._connection
+
+    def request(self, method: t.Union[str], path: t.Union[str], data: t.Any = None) -> http.client.HTTPResponse:
+        """发送请求（复用的连接已被服务端关闭时重新连接一次）"""
+        body = None if data is None else json.dumps(data, ensure_ascii=False).encode('utf-8')
+        headers = {} if body is None else {'Content-Type': 'application/json; charset=utf-8'}
+        if parse_address(self.address)[0] == 'tcp':
+            # 服务可能已重启（令牌随之更新），因此未指定令牌时每次都重新读取
+            token = self.token or read_token(token_path(self.address), self.address)
+            if token is not None:
+                headers['Authorization'] = f'Bearer {token}'
+        reused = self._connection is not None
+        try:
+            return self._send(method, path, body, headers)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self.close()
+            if not reused:
+                raise errors.LakeDaemonError(self.address, f'无法连接：{e}')
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise errors.LakeDaemonError(self.address, f'无法连接：{e}')
+        try:
+            return self._send(method, path, body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            raise errors.LakeDaemonError(self.address, f'无法连接：{e}')
+
+    def _send(self, method: t.Union[str], path: t.Union[str], body: t.Optional[bytes],
+              headers: t.Dict[str, str]) -> http.client.HTTPResponse:
+        connection = self.connection()
+        connection.request(method, path, body, headers)
+        return connection.getresponse()
+
+    def get_json(self, path: t.Union[str]) -> t.Dict[str, t.Any]:
+        response = self.request('GET', path)
+        return json.loads(response.read().decode('utf-8'))
+
+    def available(self) -> bool:
+        """转换服务是否正在运行"""
+        try:
+            return self.health().get('status') == 'ok'
+        except (errors.LakeDaemonError, ValueError):
+            return False
+
+    def health(self) -> t.Dict[str, t.Any]:
+        return self.get_json('/health')
+
+    def metrics(self) -> t.Dict[str, t.Any]:
+        return self.get_json('/metrics')
+
+    def convert(self, html: t.Union[str] = None, source: t.Union[str, Path, os.PathLike] = None,
+                target: t.Union[str, Path, os.PathLike] = None,
+                target_type: t.Union[str] = 'markdown',
+                encoding: t.Union[str] = 'utf-8',
+                **options) -> t.Union[str, ConvertResult]:
+        """
+        转换单个文档（HTML 内容或者文件路径，路径由服务端读写，因此会转换为绝对路径）
+        :return: 未指定保存路径时返回转换后的内容，否则返回转换结果（ConvertResult）
+        """
+        data: t.Dict[str, t.Any] = {'target_type': target_type, 'encoding': encoding, 'options': options}
+        if html is not None:
+            data['html'] = html
+        else:
+            data['source'] = str(Path(source).absolute())
+            data['target'] = None if target is None else str(Path(target).absolute())
+        response = self.request('POST', '/convert', data)
+        body = response.read()
+        if response.status == 503:
+            raise errors.LakeDaemonBusyError(self.address, '队列已满，请稍后重试')
+        if response.status == 422:
+            result = result_from_dict(json.loads(body.decode('utf-8')))
+            raise errors.LakeDaemonError(self.address, result.error)
+        if response.status != 200:
+            raise errors.LakeDaemonError(self.address, f'HTTP {response.status}：{body.decode("utf-8", "replace")}')
+        if response.getheader('Content-Type', '').startswith('application/json'):
+            return result_from_dict(json.loads(body.decode('utf-8')))
+        return body.decode(encoding)
+
+    def iter_batch(self, pairs: t.Iterable[t.Sequence[t.Any]],
+                   target_type: t.Union[str] = 'markdown',
+                   encoding: t.Union[str] = 'utf-8',
+                   **options) -> t.Iterator[t.Tuple[int, ConvertResult]]:
+        """
+        批量转换文件，按完成的顺序产出 (序号, 转换结果)
+        :param pairs: 同 `convert_many`（读取路径, 保存路径[, 转换选项]）
+        """
+        jobs = [{
+            'source': str(Path(pair[0]).absolute()),
+            'target': str(Path(pair[1]).absolute()),
+            'options': dict(pair[2]) if len(pair) > 2 else {},
+        } for pair in pairs]
+        data = {'jobs': jobs, 'target_type': target_type, 'encoding': encoding, 'options': options}
+        response = self.request('POST', '/batch', data)
+        if response.status != 200:
+            raise errors.LakeDaemonError(self.address, f'HTTP {response.status}：{response.read().decode()}')
+        for line in response:
+            if line.strip():
+                data = json.loads(line.decode('utf-8'))
+                yield data['index'], result_from_dict(data)
+
+    def convert_many(self, pairs: t.Iterable[t.Sequence[t.Any]],
+                     target_type: t.Union[str] = 'markdown',
+                     encoding: t.Union[str] = 'utf-8',
+                     progress: t.Optional[t.Callable[[ConvertResult, int, int], t.Any]] = None,
+                     **options) -> BatchReport:
+        """与 `convert_many` 相同，由转换服务的工作进程执行，返回批量转换的结果报告"""
+        pairs = list(pairs)
+        results: t.List[t.Optional[ConvertResult]] = [None] * len(pairs)
+        start = time.perf_counter()
+        for done, (index, result) in enumerate(self.iter_batch(pairs, target_type, encoding, **options), 1):
+            # 服务端使用绝对路径，结果中保留调用方传入的路径
+            result.source, result.target = str(pairs[index][0]), str(pairs[index][1])
+            results[index] = result
+            if progress is not None:
+                progress(result, done, len(pairs))
+        if None in results:
+            raise errors.LakeDaemonError(self.address, '批量转换的结果不完整（连接中断）')
+        return BatchReport(results, time.perf_counter() - start)
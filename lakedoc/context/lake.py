@@ -1,24 +1,82 @@
+import time
 import typing as t
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib import import_module
+from inspect import getfullargspec
 from os import PathLike
 from pathlib import Path
-from lakedoc.utils import errors, file
+from lakedoc.utils import errors, file, metrics
 from lakedoc.converters import LakeBaseConverter
 from .base import LakeBaseContext
 
 
+@lru_cache(maxsize=None)
+def accepted_options(converter_class: type) -> t.Optional[t.FrozenSet[str]]:
+    """
+    转换器构造函数接受的选项名（用于从共享的转换选项中筛选出该转换器支持的部分）
+    :param converter_class: 转换器类
+    :return: 选项名的集合，接受任意关键字参数（**options）时返回 None
+    """
+    spec = getfullargspec(converter_class.__init__)
+    if spec.varkw is not None:
+        return None
+    return frozenset(spec.args[2:] + spec.kwonlyargs)
+
+if t.TYPE_CHECKING:
+    from lakedoc.converters.document import LakeDocument
+    from .cache import ConvertCache
+
+
 class LakeContext(LakeBaseContext):
     def __init__(self):
         self.options = {}
-        self.converter_classes: t.Dict[str, LakeBaseConverter] = dict()
+        self.converter_classes: t.Dict[str, t.Union[type(LakeBaseConverter), str]] = dict()
         self.converter_class: t.Optional[type(LakeBaseConverter)] = None
+        self.cache: t.Optional['ConvertCache'] = None
+        self.hooks: t.List[t.Callable[[metrics.ConvertMetrics], t.Any]] = []
+        self.max_document_bytes: t.Optional[int] = None
+
+    def set_cache(self, cache: t.Optional['ConvertCache']):
+        """
+        设置转换结果缓存（传入 None 则关闭缓存）
+        :param cache: ConvertCache 对象
+        """
+        self.cache = cache
+
+    def set_max_document_bytes(self, max_document_bytes: t.Optional[int]):
+        """
+        设置单个文档的大小上限（文件按字节数，已在内存中的内容按字符数），
+        超过时抛出 LakeDocumentTooLargeError 而不会读取或者转换（传入 None 则不限制）
+        :param max_document_bytes: 文档大小的上限
+        """
+        self.max_document_bytes = max_document_bytes
 
     def set_options(self, **options):
+        """
+        设置当前上下文的默认转换选项（全局共享，每次转换时传入的 options 会覆盖这些默认值）
+        """
         self.options.update(options)
 
+    def cache_for(self, options: t.Dict[str, t.Any]) -> t.Optional['ConvertCache']:
+        """本次转换使用的转换缓存：未设置缓存，或者选项带有副作用（例如资源本地化）时为 None"""
+        if self.cache is None or not self.cache.accepts(options):
+            return None
+        return self.cache
+
+    def merge_options(self, options: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        """
+        合并默认选项与本次调用的选项，返回新的字典（不修改上下文，可在多线程中并发调用）
+        :param options: 本次调用的转换选项
+        :return: 本次调用实际生效的转换选项
+        """
+        return {**self.options, **options}
+
     def pick(self, target_type: t.Union[str]):
         """
         为当前上下文挑选指定的转换器类，该类将设置为属性 `converter_class` 的值
         :param target_type: 转换器对应的类型标签
+        :return: 挑选出的转换器类
         """
         if not isinstance(target_type, str):
             raise errors.LakeContentTypeError('参数 target_type', 'str', str(type(target_type)))
@@ -26,59 +84,329 @@ class LakeContext(LakeBaseContext):
         if target_type not in self.converter_classes:
             raise errors.LakePickNotFoundError(target_type)
 
-        self.converter_class = self.converter_classes[target_type]
+        converter_class = self.converter_classes[target_type]
+        if isinstance(converter_class, str):
+            # 以导入路径注册的转换器在第一次使用时才导入，之后替换为转换器类本身
+            module_name, _, class_name = converter_class.partition(':')
+            converter_class = getattr(import_module(module_name), class_name)
+            self.converter_classes[target_type] = converter_class
+
+        self.converter_class = converter_class
+        return self.converter_class
+
+    def resolve(self, target_type: t.Union[str], uselast: t.Union[bool] = False):
+        """
+        获取本次转换使用的转换器类（开启 uselast 时优先使用最新 pick 的转换器类）
+        :param target_type: 转换器对应的类型标签
+        :param uselast: 是否使用最新 pick 的转换器类
+        :return: 转换器类
+        """
+        converter_class = self.converter_class
+        if not converter_class or not uselast:
+            converter_class = self.pick(target_type)
+        return converter_class
 
     def content_convert(self, html: t.Union[str],
                         target_type: t.Union[str] = 'markdown',
-                        uselast: t.Union[bool] = False):
-        """将 HTML 内容通过指定的转换器转换为对应的内容"""
-        if not html.strip():
-            raise errors.LakeHTMLEmptyError
+                        uselast: t.Union[bool] = False,
+                        **options):
+        """将 HTML 内容通过指定的转换器转换为对应的内容（options 仅对本次调用生效）"""
+        with self.measure(target_type) as current:
+            converter_class, options = self.prepare(html, target_type, uselast, options, current)
+            cache = self.cache_for(options)
+            if cache is None:
+                data = converter_class(html, **options).convert()
+            else:
+                key = cache.key(html, converter_class, options)
+                data = cache.load_text(key)
+                if data is None:
+                    data = converter_class(html, **options).convert()
+                    if isinstance(data, str):
+                        cache.store_text(key, data)
+                elif current is not None:
+                    current.cached = True
 
-        if not self.converter_class or not uselast:
-            self.pick(target_type)
+            if current is not None:
+                current.bytes_out = len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+            return data
 
-        return self.converter_class(html, **self.options).convert()
+    def content_convert_iter(self, html: t.Union[str],
+                             target_type: t.Union[str] = 'markdown',
+                             uselast: t.Union[bool] = False,
+                             **options):
+        """将 HTML 内容通过指定的转换器逐块转换，返回内容块的迭代器"""
+        converter_class, options = self.prepare(html, target_type, uselast, options, metrics.current())
+        return converter_class(html, **options).iter_convert()
+
+    def content_convert_stream(self, html: t.Union[str],
+                               save_path: t.Union[str, Path, PathLike] = None,
+                               target_type: t.Union[str] = 'markdown',
+                               uselast: t.Union[bool] = False,
+                               encoding: t.Union[str] = 'utf-8',
+                               suffix: t.Union[str] = 'md',
+                               **options):
+        """将 HTML 内容逐块转换并边转换边保存（不在内存中拼接完整的结果），返回写入的字节数"""
+        with self.measure(target_type) as current:
+            save_path = file.savepath(save_path or Path('./'), suffix)
+            converter_class, options = self.prepare(html, target_type, uselast, options, current)
+            cache = self.cache_for(options)
+            written = None
+            key = None
+            if cache is not None:
+                key = cache.key(html, converter_class, options, mode=f'file:{encoding}')
+                written = cache.fetch(key, save_path)
+                if current is not None:
+                    current.cached = written is not None
+
+            if written is None:
+                # 目标文件可能是旧的缓存硬链接，先删除再写入，避免改写缓存文件
+                if self.cache is not None and self.cache.link and save_path.is_file():
+                    save_path.unlink()
+                # 逐块转换与写入交替进行，因此 markdownify 遍历与保存合并统计为 stream 阶段
+                with metrics.stage('stream'):
+                    chunks = converter_class(html, **options).iter_convert()
+                    written = file.savefile(chunks, save_path, encoding, suffix)
+                if key is not None:
+                    cache.store_file(key, save_path)
+
+            if current is not None:
+                current.bytes_out = written
+            return written
+
+    def read_convert_stream(self, read_path: t.Union[str, Path, PathLike],
+                            save_path: t.Union[str, Path, PathLike] = None,
+                            target_type: t.Union[str] = 'markdown',
+                            uselast: t.Union[bool] = False,
+                            encoding: t.Union[str] = 'utf-8',
+                            suffix: t.Union[str] = 'md',
+                            **options):
+        """从 HTML 文件路径中读取内容，逐块转换并保存到指定的路径，返回写入的字节数"""
+        with self.measure(target_type, source=read_path):
+            with metrics.stage('read'):
+                html = self.read_html(read_path, target_type, uselast, encoding)
+            return self.content_convert_stream(html, save_path, target_type, uselast, encoding, suffix, **options)
 
     def content_convert_save(self, html: t.Union[str],
                              save_path: t.Union[str, Path, PathLike] = None,
                              target_type: t.Union[str] = 'markdown',
                              uselast: t.Union[bool] = False,
                              encoding: t.Union[str] = 'utf-8',
-                             suffix: t.Union[str] = 'md', ):
+                             suffix: t.Union[str] = 'md',
+                             **options):
         """将 HTML 内容通过指定的转换器转换为对应的内容并保存"""
-        data = self.content_convert(html, target_type, uselast)
-        save_path = save_path or Path('./')
-        file.savefile(data, save_path, encoding, suffix)
-        return data
+        with self.measure(target_type) as current:
+            data = self.content_convert(html, target_type, uselast, **options)
+            save_path = file.savepath(save_path or Path('./'), suffix)
+            if self.cache is not None and self.cache.link and save_path.is_file():
+                save_path.unlink()
+            with metrics.stage('save'):
+                written = file.savefile(data, save_path, encoding, suffix)
+            if current is not None:
+                current.bytes_out = written
+            return data
 
     def read_convert(self, read_path: t.Union[str, Path, PathLike],
                      target_type: t.Union[str] = 'markdown',
                      uselast: t.Union[bool] = False,
-                     encoding: t.Union[str] = 'utf-8'):
+                     encoding: t.Union[str] = 'utf-8',
+                     **options):
         """从 HTML 文件路径中读取内容并转换"""
-        html = file.readfile(read_path, encoding=encoding)
-        return self.content_convert(html, target_type, uselast)
+        with self.measure(target_type, source=read_path):
+            with metrics.stage('read'):
+                html = self.read_html(read_path, target_type, uselast, encoding)
+            return self.content_convert(html, target_type, uselast, **options)
 
     def read_convert_save(self, read_path: t.Union[str, Path, PathLike],
                           save_path: t.Union[str, Path, PathLike] = None,
                           target_type: t.Union[str] = 'markdown',
                           uselast: t.Union[bool] = False,
                           encoding: t.Union[str] = 'utf-8',
-                          suffix: t.Union[str] = 'md', ):
+                          suffix: t.Union[str] = 'md',
+                          **options):
         """从 HTML 文件路径中读取内容，通过转换后，保存到指定的路径"""
-        data = self.read_convert(read_path, target_type, uselast, encoding)
-        save_path = save_path or Path('./')
-        file.savefile(data, save_path, encoding, suffix)
-        return data
+        with self.measure(target_type, source=read_path):
+            with metrics.stage('read'):
+                html = self.read_html(read_path, target_type, uselast, encoding)
+            return self.content_convert_save(html, save_path, target_type, uselast, encoding, suffix, **options)
+
+    def read_html(self, read_path: t.Union[str, Path, PathLike],
+                  target_type: t.Union[str] = 'markdown',
+                  uselast: t.Union[bool] = False,
+                  encoding: t.Union[str] = 'utf-8') -> str:
+        """
+        读取 HTML 文件（检查文档大小的上限；转换器会删除换行符时，在解码的同时删除，避免额外的完整副本）
+        :return: HTML 内容
+        """
+        converter_class = self.resolve(target_type, uselast)
+        return file.readfile(read_path, encoding, self.max_document_bytes,
+                             getattr(converter_class, 'strip_newlines', False))
+
+    def prepare(self, html: t.Union[str], target_type: t.Union[str], uselast: t.Union[bool],
+                options: t.Dict[str, t.Any], current: t.Optional[metrics.ConvertMetrics] = None):
+        """
+        校验 HTML 内容，获取本次转换的转换器类与实际生效的转换选项
+        :return: (转换器类, 转换选项)
+        """
+        self.check_html(html)
+        converter_class = self.resolve(target_type, uselast)
+        if current is not None:
+            current.converter = converter_class.__name__
+            current.bytes_in = current.bytes_in or len(html.encode('utf-8'))
+        return converter_class, self.merge_options(options)
+
+    def check_html(self, html: t.Union[str]):
+        """校验 HTML 内容（不能为空，不能超过文档大小的上限）"""
+        if not html.strip():
+            raise errors.LakeHTMLEmptyError
+        # 已在内存中的内容按字符数检查（避免为了计算字节数而编码出完整的副本）
+        if self.max_document_bytes is not None and len(html) > self.max_document_bytes:
+            raise errors.LakeDocumentTooLargeError(len(html), self.max_document_bytes)
+
+    def parse_document(self, html: t.Union[str], **options) -> 'LakeDocument':
+        """
+        解析并预处理 HTML 内容，得到中间文档（可以交由多个转换器渲染，也可以序列化后缓存）
+        设置了转换缓存时，相同的内容与预处理选项只解析一次
+
+        :param html: HTML 内容
+        :param options: 转换选项，只有预处理选项（builder、extract_tags、merge_tags）生效
+        :return: 中间文档
+        """
+        from lakedoc.converters.document import LakeDocument, PREPROCESS_OPTIONS
+
+        self.check_html(html)
+        options = self.merge_options(options)
+        options = {name: options[name] for name in PREPROCESS_OPTIONS if name in options}
+        if self.cache is None:
+            return LakeDocument.parse(html, **options)
+
+        key = self.cache.key(html, LakeDocument, options, mode='document')
+        document = self.cache.load_document(key)
+        if document is None:
+            document = LakeDocument.parse(html, **options)
+            self.cache.store_document(key, document)
+        return document
+
+    def convert_multi(self, html_or_document: t.Union[str, 'LakeDocument'],
+                      target_types: t.Union[t.Iterable[str], t.Dict[str, t.Dict[str, t.Any]]],
+                      **options) -> t.Dict[str, t.Union[str, bytes]]:
+        """
+        只解析与预处理一次，由多个转换器分别渲染，例如：convert_multi(html, ['markdown', 'text', 'outline'])
+
+        :param html_or_document: HTML 内容，或者中间文档（`parse_document` 的结果，例如反序列化得到的）
+        :param target_types: 转换器的类型标签列表，也可以是 {类型标签: 仅对该转换器生效的渲染选项}
+        :param options:
+            所有转换器共享的转换选项（builder、extract_tags、merge_tags 只影响共享的预处理），
+            每个转换器只接收其支持的部分（例如 reparse、parallel 只传递给 Markdown 转换器）
+        :return: {类型标签: 转换后的内容}，顺序与 target_types 一致
+        """
+        from lakedoc.converters.document import LakeDocument
+
+        if not isinstance(target_types, dict):
+            target_types = {target_type: {} for target_type in target_types}
+        with self.measure(','.join(target_types)) as current:
+            document = html_or_document if isinstance(html_or_document, LakeDocument) else None
+            if document is None:
+                self.check_html(html_or_document)
+            options = self.merge_options(options)
+            renders = {}
+            for target_type, extra in target_types.items():
+                converter_class = self.pick(target_type)
+                names = accepted_options(converter_class)
+                shared = options if names is None else {k: v for k, v in options.items() if k in names}
+                renders[target_type] = (converter_class, {**shared, **extra})
+            if current is not None:
+                current.converter = ','.join(converter_class.__name__ for converter_class, _ in renders.values())
+                if document is None:
+                    current.bytes_in = current.bytes_in or len(html_or_document.encode('utf-8'))
+
+            results: t.Dict[str, t.Union[str, bytes]] = {}
+            keys: t.Dict[str, str] = {}
+            if self.cache is not None and document is None:
+                # 与 content_convert 使用相同的缓存键，全部命中时不再解析
+                for target_type, (converter_class, render_options) in renders.items():
+                    if not self.cache.accepts(render_options):
+                        continue
+                    keys[target_type] = self.cache.key(html_or_document, converter_class, render_options)
+                    data = self.cache.load_text(keys[target_type])
+                    if data is not None:
+                        results[target_type] = data
+
+            for target_type, (converter_class, render_options) in renders.items():
+                if target_type in results:
+                    continue
+                if document is None:
+                    document = self.parse_document(html_or_document, **options)
+                data = results[target_type] = converter_class.from_document(document, **render_options).convert()
+                if target_type in keys and isinstance(data, str):
+                    self.cache.store_text(keys[target_type], data)
+
+            if current is not None:
+                # 传入 HTML 内容且没有解析，说明全部命中缓存
+                current.cached = document is None
+                current.bytes_out = sum(len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+                                        for data in results.values())
+            return {target_type: results[target_type] for target_type in renders}
+
+    def read_convert_multi(self, read_path: t.Union[str, Path, PathLike],
+                           target_types: t.Union[t.Iterable[str], t.Dict[str, t.Dict[str, t.Any]]],
+                           encoding: t.Union[str] = 'utf-8',
+                           **options) -> t.Dict[str, t.Union[str, bytes]]:
+        """从 HTML 文件路径中读取内容，只解析一次，由多个转换器分别渲染（参数同 `convert_multi`）"""
+        if not isinstance(target_types, dict):
+            target_types = {target_type: {} for target_type in target_types}
+        with self.measure(','.join(target_types), source=read_path):
+            with metrics.stage('read'):
+                # 预处理会删除换行符，因此在解码的同时删除
+                html = file.readfile(read_path, encoding, self.max_document_bytes, True)
+            return self.convert_multi(html, target_types, **options)
+
+    def add_hook(self, hook: t.Callable[[metrics.ConvertMetrics], t.Any]):
+        """
+        添加转换钩子：每次转换结束后（包括失败）都会以本次的性能指标 ConvertMetrics 调用钩子，
+        未添加任何钩子时不会收集性能指标
+        :param hook: 可调用对象，例如 `metrics.MetricsAggregator()`
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: t.Callable[[metrics.ConvertMetrics], t.Any]):
+        """移除转换钩子"""
+        self.hooks.remove(hook)
+
+    @contextmanager
+    def measure(self, target_type: t.Union[str] = None, source: t.Union[str, Path, PathLike] = None):
+        """
+        在一次转换的范围内收集性能指标，结束后调用所有钩子（嵌套调用时复用最外层的性能指标）
+        :return: 本次转换的性能指标，未添加钩子时为 None
+        """
+        current = metrics.current()
+        if current is not None or not self.hooks:
+            yield current
+            return
+
+        current = metrics.ConvertMetrics(target_type)
+        current.source = None if source is None else str(source)
+        token = metrics.activate(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f'{e.__class__.__name__}: {getattr(e, "error_info", e)}'
+            raise
+        finally:
+            current.seconds = time.perf_counter() - start
+            metrics.deactivate(token)
+            for hook in list(self.hooks):
+                hook(current)
 
     def register(self, target_type: t.Union[str],
-                 converter_class: t.Union[type(LakeBaseConverter)],
+                 converter_class: t.Union[type(LakeBaseConverter), str],
                  is_cover: t.Union[bool] = True):
         """
         注册外部的转换器
         :param target_type: 转换器类对应的类型标签，用于查找转换器类（pick/convert）
-        :param converter_class: 外部的转换器类（继承于 LakeBaseConverter）
+        :param converter_class:
+            外部的转换器类（继承于 LakeBaseConverter），
+            也可以是 'module:ClassName' 形式的导入路径（第一次使用时才导入）
         :param is_cover: 开启后，类型标签一致的旧转换器类将直接被覆盖，默认开启
         """
         if not isinstance(target_type, str):
@@ -0,0 +1,217 @@
+"""
+增量同步（目录镜像）
+
+在目标目录中保存一份清单（manifest），记录每个源文件的相对路径、修改时间、大小、内容摘要以及输出路径。
+再次同步时只转换新增或者发生变化的文件，删除源文件已不存在（或者不再匹配）的输出以及名称已变化的旧输出；
+修改时间与大小都未变化的文件不会被读取，因此未变化的大型目录可以在数秒内完成同步
+
+输出文件与源文件保持相同的相对路径（仅替换后缀），先写入临时文件，转换成功后再原子地替换
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import typing as t
+from os import PathLike
+from pathlib import Path
+from lakedoc.utils import string
+from .batch import BatchReport, convert_many
+from .cache import RUNTIME_OPTIONS, _normalize
+
+MANIFEST_NAME = '.lakedoc-manifest.json'
+MANIFEST_VERSION = 1
+TEMP_SUFFIX = '.lakedoc-tmp'
+# 不影响转换结果的 convert_many 参数（不参与配置指纹的计算）
+RUNTIME_ARGUMENTS = ('max_workers', 'cache', 'collect_metrics', 'max_document_bytes', 'progress', 'timeout',
+                     'max_memory')
+
+
+class SyncReport(object):
+    """增量同步的结果报告（路径均为相对于源目录的路径）"""
+
+    def __init__(self):
+        self.added: t.List[str] = []
+        self.changed: t.List[str] = []
+        self.unchanged: t.List[str] = []
+        self.removed: t.List[str] = []
+        self.batch: t.Optional[BatchReport] = None
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__}: added={len(self.added)} changed={len(self.changed)} '
+                f'unchanged={len(self.unchanged)} removed={len(self.removed)} '
+                f'failed={len(self.failed)} {self.seconds:.2f}s>')
+
+    @property
+    def failed(self):
+        return self.batch.failed if self.batch is not None else []
+
+
+def file_digest(path: t.Union[str, Path, PathLike]) -> str:
+    """分块计算文件内容的 SHA-256 摘要"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fr:
+        for block in iter(lambda: fr.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(path: t.Union[str, Path, PathLike]) -> t.Dict[str, t.Any]:
+    """读取清单，不存在、已损坏或者版本不一致时返回空清单"""
+    try:
+        manifest = json.loads(Path(path).read_bytes().decode('utf-8'))
+    except (OSError, ValueError):
+        return {'version': MANIFEST_VERSION, 'fingerprint': None, 'entries': {}}
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'fingerprint': None, 'entries': {}}
+    return manifest
+
+
+def save_manifest(manifest: t.Dict[str, t.Any], path: t.Union[str, Path, PathLike]):
+    """原子地保存清单（先写临时文件再替换）"""
+    path = Path(path)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f'{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fw:
+            fw.write(json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8'))
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def fingerprint(target_type: t.Union[str], options: t.Dict[str, t.Any], suffix: t.Union[str] = 'md') -> str:
+    """
+    计算本次同步的转换配置指纹（lakedoc 版本、转换器及其版本与全局状态、转换选项、输出文件的后缀），
+    指纹变化时所有文件都需要重新转换
+    """
+    import lakedoc
+
+    converter_class = (options.get('converters') or {}).get(target_type)
+    converter_class = converter_class or lakedoc.context.resolve(target_type, False)
+    header = repr((
+        lakedoc.__version__,
+        f'{converter_class.__module__}.{converter_class.__qualname__}',
+        getattr(converter_class, 'version', ''),
+        _normalize(converter_class.cache_state()) if hasattr(converter_class, 'cache_state') else None,
+        target_type,
+        _normalize(options),
+        suffix,
+    ))
+    return hashlib.sha256(header.encode('utf-8')).hexdigest()
+
+
+def sync_tree(source_dir: t.Union[str, Path, PathLike],
+              target_dir: t.Union[str, Path, PathLike],
+              pattern: t.Union[str] = '*.html',
+              suffix: t.Union[str] = 'md',
+              manifest_path: t.Union[str, Path, PathLike] = None,
+              target_type: t.Union[str] = 'markdown',
+              force: t.Union[bool] = False,
+              **kwargs) -> SyncReport:
+    """
+    将源目录增量地同步（转换）到目标目录
+
+    :param source_dir: 源目录
+    :param target_dir: 目标目录（不存在时自动创建）
+    :param pattern: 匹配源文件的通配符（递归匹配），默认：*.html
+    :param suffix: 输出文件的后缀，默认：md
+    :param manifest_path: 清单的保存路径，默认为目标目录中的 .lakedoc-manifest.json
+    :param target_type: 转换器对应的类型标签，默认：markdown
+    :param force: 开启后忽略清单，重新转换所有文件，默认关闭
+    :param kwargs: 其余参数同 `convert_many`（例如 max_workers、cache、title、builder）
+    :return: 增量同步的结果报告
+    """
+    start = time.perf_counter()
+    source_dir, target_dir = Path(source_dir), Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = Path(manifest_path) if manifest_path else target_dir / MANIFEST_NAME
+
+    manifest = load_manifest(manifest_path)
+    options = {key: value for key, value in kwargs.items() if key not in RUNTIME_ARGUMENTS and key not in RUNTIME_OPTIONS}
+    current_fingerprint = fingerprint(target_type, options, suffix)
+    # 清单中的记录总是用于删除源文件已不存在的输出；强制转换或者转换选项变化时不再据此判断文件是否未变化
+    reuse = not force and manifest['fingerprint'] == current_fingerprint
+    old_entries: t.Dict[str, t.Dict[str, t.Any]] = manifest['entries']
+    entries: t.Dict[str, t.Dict[str, t.Any]] = {}
+
+    report = SyncReport()
+    pending: t.List[t.Tuple[str, Path, Path, t.Dict[str, t.Any]]] = []
+    for source in sorted(source_dir.rglob(pattern)):
+        if not source.is_file():
+            continue
+        relative = source.relative_to(source_dir).as_posix()
+        output = source.relative_to(source_dir).with_suffix(f'.{suffix}').as_posix()
+        stat = source.stat()
+        entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': None, 'output': output}
+        old = old_entries.get(relative)
+        output_exists = (target_dir / output).is_file()
+
+        if reuse and old is not None and output_exists and old['output'] == output:
+            # 修改时间与大小均未变化时不读取文件；只是修改时间变化而内容相同时也无需重新转换
+            if old['mtime_ns'] == entry['mtime_ns'] and old['size'] == entry['size']:
+                entries[relative] = old
+                report.unchanged.append(relative)
+                continue
+            entry['sha256'] = file_digest(source)
+            if old['sha256'] == entry['sha256']:
+                entries[relative] = entry
+                report.unchanged.append(relative)
+                continue
+        else:
+            entry['sha256'] = file_digest(source)
+
+        (report.changed if old is not None else report.added).append(relative)
+        pending.append((relative, source, target_dir / output, entry))
+
+    # 不再属于本次同步的旧输出：名称已变化的输出，以及源文件已删除或者不再匹配 pattern 的输出
+    stale: t.List[str] = []
+    if pending:
+        pairs = [(source, target.with_name(f'{target.name}{TEMP_SUFFIX}')) for _, source, target, _ in pending]
+        report.batch = convert_many(pairs, target_type=target_type, **kwargs)
+        for (relative, _, target, entry), result in zip(pending, report.batch.results):
+            temp = Path(result.target)
+            if result.ok:
+                os.replace(temp, target)
+                entries[relative] = entry
+                old = old_entries.get(relative)
+                # 输出文件的名称变化时（例如更换了后缀），删除旧的输出
+                if old is not None and old['output'] != entry['output']:
+                    stale.append(old['output'])
+            else:
+                # 转换失败时保留旧的输出与清单记录，下次同步时重试
+                if temp.is_file():
+                    temp.unlink()
+                if relative in old_entries:
+                    old = old_entries[relative]
+                    # 旧的输出来自不同的转换选项时，清空文件状态，保证下次同步时重新转换
+                    entries[relative] = old if reuse else dict(old, mtime_ns=None, sha256=None)
+
+    for relative, old in old_entries.items():
+        if relative in entries:
+            continue
+        stale.append(old['output'])
+        report.removed.append(relative)
+
+    outputs = {entry['output'] for entry in entries.values()}
+    for output in stale:
+        # 其它源文件的输出可能恰好使用了同一个名称
+        if output not in outputs and (target_dir / output).is_file():
+            (target_dir / output).unlink()
+
+    manifest['fingerprint'] = current_fingerprint
+    manifest['entries'] = entries
+    save_manifest(manifest, manifest_path)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def print_report(report: SyncReport):
+    """输出增量同步的结果摘要"""
+    print(string.color_string(f'新增 {len(report.added)}，变化 {len(report.changed)}，'
+                              f'未变化 {len(report.unchanged)}，删除 {len(report.removed)}，'
+                              f'耗时 {report.seconds:.2f}s', 'green'))
+    for result in report.failed:
+        print(string.color_string(f'{result.source}: {result.error}', 'red'))
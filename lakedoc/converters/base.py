@@ -1,8 +1,17 @@
+import io
+import codecs
 import typing as t
 from pathlib import Path
 
 
 class LakeBaseConverter(object):
+    # 转换器的版本号，转换结果的格式发生变化时应当递增（用于使转换缓存失效）
+    version = '1'
+    # 开启后，从文件读取时会在解码的同时删除换行符并去除首尾空白（转换器本身会做相同的处理时才应开启）
+    strip_newlines = False
+    # 影响转换结果的选项名（用于计算转换缓存的键），None 表示除 parallel 等运行时选项外的所有选项
+    cache_options: t.Optional[t.Tuple[str, ...]] = None
+
     def __init__(self, raw_html: t.Union[str]):
         self.raw_html = raw_html
         self.assets = Path(__file__).parent.parent / 'assets'
@@ -10,5 +19,53 @@ class LakeBaseConverter(object):
     def __repr__(self):
         return f'<{self.__class__.__name__}: 0x{id(self):016X}>'
 
+    @classmethod
+    def cache_state(cls) -> t.Any:
+        """
+        影响转换结果的全局状态（例如全局注册的处理函数），与 cache_options 一起参与转换缓存键的计算
+        :return: 可稳定表示的对象（同缓存键中的转换选项），默认：None
+        """
+        return None
+
+    @classmethod
+    def from_document(cls, document, **options) -> 'LakeBaseConverter':
+        """
+        从中间文档（LakeDocument）创建转换器，默认传入预处理后的 HTML 内容（子类可重写以直接复用预处理后的树）
+        :param document: 中间文档
+        :param options: 转换选项
+        :return: 转换器对象
+        """
+        return cls(document.html(), **options)
+
     def convert(self) -> t.Union[str, bytes]:
         raise NotImplementedError
+
+    def iter_convert(self) -> t.Iterator[t.Union[str, bytes]]:
+        """
+        分块产出转换后的内容，拼接后与 `convert` 的结果一致（子类可重写以真正地分块转换）
+        :return: 内容块的迭代器
+        """
+        yield self.convert()
+
+    def convert_to(self, stream: t.Union[t.IO], encoding: t.Union[str] = 'utf-8') -> int:
+        """
+        将转换后的内容逐块写入文件对象，不在内存中拼接完整的结果
+        :param stream: 文本或者二进制的文件对象（二进制对象将进行增量编码）
+        :param encoding: 写入二进制对象时的编码，默认：utf-8
+        :return: 写入的字符数（文本对象）或者字节数（二进制对象）
+        """
+        is_text = isinstance(stream, io.TextIOBase)
+        encoder = None if is_text else codecs.getincrementalencoder(encoding)()
+        written = 0
+        for chunk in self.iter_convert():
+            if not is_text and isinstance(chunk, str):
+                chunk = encoder.encode(chunk)
+            if chunk:
+                stream.write(chunk)
+                written += len(chunk)
+        if encoder is not None:
+            tail = encoder.encode('', final=True)
+            if tail:
+                stream.write(tail)
+                written += len(tail)
+        return written
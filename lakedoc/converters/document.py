@@ -0,0 +1,155 @@
+"""
+中间文档（解析与预处理一次，由多个转换器渲染）
+
+LakeDocument 保存 Lake 文档经过解析与预处理（合并相邻标签、渲染样式、插入缩进、删除标签）之后的树结构，
+多个转换器可以直接从中渲染，无需重复解析。树结构以扁平的事件列表保存：
+    - str: 文本节点
+    - None: 结束标签
+    - (标签名, 属性字典): 开始标签
+    - (字符串类名, 文本): 注释、doctype 等特殊的字符串节点
+
+事件列表不含嵌套（序列化时不会因为文档嵌套过深而递归），可以通过 pickle 或者 `dumps`（JSON）序列化后缓存，
+之后直接按事件重建树结构（不再解析 HTML）或者逐个事件渲染
+"""
+
+import json
+import typing as t
+from bs4 import BeautifulSoup, CData, Comment, Declaration, Doctype, NavigableString, ProcessingInstruction, Tag
+from lakedoc.utils import errors
+
+# 中间文档的格式版本，事件列表或者预处理的结果发生变化时应当递增（用于使缓存的中间文档失效）
+DOCUMENT_VERSION = 1
+
+# 影响预处理结果的转换选项，其余选项只影响渲染
+PREPROCESS_OPTIONS = ('builder', 'extract_tags', 'merge_tags')
+
+# 需要在事件中记录类型的字符串节点（其余节点的类型由所在的标签决定，例如 script 中的 Script）
+STRING_CLASSES = {cls.__name__: cls for cls in (Comment, Doctype, CData, ProcessingInstruction, Declaration)}
+
+Event = t.Union[str, None, t.Tuple[str, t.Any]]
+
+
+def soup_events(soup: t.Union[BeautifulSoup, Tag]) -> t.List[Event]:
+    """
+    将 soup 对象（不含其自身）转换为扁平的事件列表
+    :param soup: BeautifulSoup 对象或者标签
+    :return: 事件列表
+    """
+    events: t.List[Event] = []
+    stack: t.List[Tag] = []
+    for el in soup.descendants:
+        while stack and el.parent is not stack[-1]:
+            stack.pop()
+            events.append(None)
+        if isinstance(el, Tag):
+            # 多值属性（例如 class）转换为普通的列表，便于序列化
+            attrs = {name: list(value) if isinstance(value, list) else value for name, value in el.attrs.items()}
+            events.append((el.name, attrs))
+            stack.append(el)
+        elif type(el).__name__ in STRING_CLASSES:
+            events.append((type(el).__name__, str(el)))
+        else:
+            events.append(str(el))
+    events.extend(None for _ in stack)
+    return events
+
+
+def build_soup(events: t.Iterable[Event], builder: t.Union[str]) -> BeautifulSoup:
+    """
+    按事件列表重建 soup 对象（通过树构建器的接口逐个添加节点，不解析 HTML，也不会递归）
+    :param events: 事件列表
+    :param builder: bs4 的树构建器
+    :return: BeautifulSoup 对象
+    """
+    soup = BeautifulSoup('', builder)
+    names: t.List[str] = []
+    for event in events:
+        if event is None:
+            soup.handle_endtag(names.pop())
+        elif type(event) is str:
+            # 直接添加字符串节点，避免 endData 将纯空白的文本规整为单个空格
+            soup.object_was_parsed(soup.string_container()(event))
+        elif type(event[1]) is dict:
+            name, attrs = event
+            soup.handle_starttag(name, None, None, dict(attrs))
+            names.append(name)
+        else:
+            class_name, text = event
+            soup.object_was_parsed(STRING_CLASSES[class_name](text))
+    soup.endData()
+    return soup
+
+
+class LakeDocument(object):
+    # 参与缓存键的计算（与转换器的 version 作用相同）
+    version = str(DOCUMENT_VERSION)
+
+    def __init__(self, events: t.List[Event], builder: t.Union[str] = 'html.parser',
+                 soup: t.Optional[BeautifulSoup] = None):
+        """
+        中间文档，通常由 `LakeDocument.parse` 或者 `LakeContext.parse_document` 创建
+        :param events: 预处理后的树结构的事件列表
+        :param builder: 重建树结构时使用的 bs4 树构建器
+        :param soup: 与事件列表一致的 soup 对象（解析时得到的树，第一次 `create_soup` 时直接交出）
+        """
+        self.events = events
+        self.builder = builder
+        self._soup = soup
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self.events)} events builder={self.builder}>'
+
+    def __getstate__(self):
+        return {'version': DOCUMENT_VERSION, 'builder': self.builder, 'events': self.events}
+
+    def __setstate__(self, state):
+        if state.get('version') != DOCUMENT_VERSION:
+            raise errors.LakeContextError(f'中间文档的版本`{state.get("version")}`与当前版本`{DOCUMENT_VERSION}`不一致')
+        self.builder = state['builder']
+        self.events = state['events']
+        self._soup = None
+
+    @classmethod
+    def parse(cls, html: t.Union[str], builder: t.Union[str] = None,
+              extract_tags: t.Set[str] = None,
+              merge_tags: t.Set[str] = None) -> 'LakeDocument':
+        """
+        解析并预处理 HTML 内容（与 Markdown 转换器的预处理一致）
+        :param html: 未经过处理的 HTML 内容
+        :param builder: bs4 的树构建器，默认为 'html.parser'，'auto' 表示自动挑选已安装的最快的树构建器
+        :param extract_tags: 需要删除的标签，默认为 {'meta', 'link', 'script', 'style'}
+        :param merge_tags: 需要合并的紧邻同名行内标签，默认为 {'em', 'strong'}
+        :return: 中间文档
+        """
+        from .md_converter import MarkdownConverter
+
+        converter = MarkdownConverter(html, builder=builder, extract_tags=extract_tags, merge_tags=merge_tags)
+        soup = converter.prepare_soup()
+        return cls(soup_events(soup), converter.builder, soup)
+
+    def create_soup(self) -> BeautifulSoup:
+        """
+        创建预处理后的 soup 对象，每次调用都返回一棵独立的树（转换器可以随意修改），
+        第一次调用时直接交出解析得到的树，之后按事件列表重建
+        """
+        soup, self._soup = self._soup, None
+        if soup is None:
+            soup = build_soup(self.events, self.builder)
+        return soup
+
+    def html(self) -> str:
+        """预处理后的 HTML 内容"""
+        if self._soup is not None:
+            return str(self._soup)
+        return str(build_soup(self.events, self.builder))
+
+    def dumps(self) -> bytes:
+        """序列化为 JSON（UTF-8 编码的字节串）"""
+        return json.dumps(self.__getstate__(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def loads(cls, data: t.Union[bytes, str]) -> 'LakeDocument':
+        """从 `dumps` 的结果中恢复中间文档"""
+        document = cls.__new__(cls)
+        document.__setstate__(json.loads(data))
+        return document
@@ -0,0 +1,173 @@
+"""
+Markdown 转换器的 card 处理器
+
+每种 card（<card name="xxx">）对应一个处理函数，签名为 handler(converter, el, card_data) -> str：
+    - converter: 当前的 ParticularConverter 对象（可通过 converter.parent_converter 访问 MarkdownConverter）
+    - el: card 标签
+    - card_data: 解码后的 card value（缓存共享的数据，请勿修改）
+
+扩展方式（无需继承转换器）：
+
+    from lakedoc.converters.md_cards import registry
+
+    @registry.register('mycard')
+    def card_mycard(converter, el, card_data):
+        return card_data.get('text', '')
+
+注册表中的名称与处理函数（导入路径）参与转换缓存键的计算，注册新的处理函数后缓存中的旧结果不再命中
+（修改已注册函数的实现而不改变其名称时，需要递增转换器的 version 或者清空缓存）
+
+引用远程资源（图片、图标、附件）的处理函数应通过 `converter.parent_converter.collect_asset(url)` 获取链接，
+开启资源本地化（asset_localizer 参数）时返回本地路径。开启后处理函数会先以收集模式执行一次（输出被丢弃），
+因此处理函数不应有副作用
+"""
+
+import typing as t
+from functools import lru_cache
+from lakedoc.utils import string, errors
+
+CARD_CACHE_SIZE = 1024
+
+CardHandler = t.Callable[[t.Any, t.Any, t.Dict[str, t.Any]], str]
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def decode_card(value: t.Union[str]) -> t.Dict[str, t.Any]:
+    """
+    解码 card value，并按原始值缓存结果（重复出现的图片、图标等 card 只解码一次）
+    :param value: 原始 value 值
+    :return: 字典类型的数据（缓存共享，请勿修改）
+    """
+    return string.decode_card_value(value) if value else {}
+
+
+class CardRegistry(object):
+    def __init__(self, handlers: t.Dict[str, CardHandler] = None):
+        self.handlers: t.Dict[str, CardHandler] = dict(handlers or {})
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {len(self.handlers)} handlers>'
+
+    def __contains__(self, name):
+        return name in self.handlers
+
+    def register(self, name: t.Union[str],
+                 handler: t.Optional[CardHandler] = None,
+                 is_cover: t.Union[bool] = True):
+        """
+        注册 card 处理函数，也可以作为装饰器使用
+        :param name: card 的名称（<card name="xxx"> 中的 xxx）
+        :param handler: 处理函数，签名为 handler(converter, el, card_data) -> str
+        :param is_cover: 开启后，名称一致的旧处理函数将直接被覆盖，默认开启
+        """
+        if not isinstance(name, str):
+            raise errors.LakeContentTypeError('参数 name', 'str', str(type(name)))
+
+        def decorator(fn: CardHandler):
+            if is_cover:
+                self.handlers[name] = fn
+            else:
+                self.handlers.setdefault(name, fn)
+            return fn
+
+        if handler is None:
+            return decorator
+        return decorator(handler)
+
+    def cache_key(self) -> t.Dict[str, CardHandler]:
+        """参与转换缓存键的计算：card 名称与处理函数（缓存键中取其导入路径）"""
+        return self.handlers
+
+    def get(self, name: t.Union[str]) -> t.Optional[CardHandler]:
+        return self.handlers.get(name)
+
+    def copy(self, handlers: t.Dict[str, CardHandler] = None) -> 'CardRegistry':
+        """复制当前的注册表，并追加（覆盖）指定的处理函数"""
+        return CardRegistry({**self.handlers, **(handlers or {})})
+
+
+registry = CardRegistry()
+
+
+@registry.register('hr')
+def card_hr(converter, el, card_data):
+    return '---\n'
+
+
+@registry.register('image')
+@registry.register('flowchart2')
+@registry.register('board')
+def card_image(converter, el, card_data):
+    src = converter.parent_converter.collect_asset(card_data.get('src', ''))
+    return f'![图片未加载]({src})\n'
+
+
+@registry.register('table')
+def card_table(converter, el, card_data):
+    return f'{card_data["html"]}\n'
+
+
+@registry.register('codeblock')
+def card_codeblock(converter, el, card_data):
+    mode = card_data.get('mode', '')
+    code = card_data.get('code', '')
+    return f'\n```{mode}\n{code}\n```\n'
+
+
+@registry.register('diagram')
+def card_diagram(converter, el, card_data):
+    src = converter.parent_converter.collect_asset(card_data.get('url', ''))
+    return f'![图片未加载]({src})\n'
+
+
+@registry.register('math')
+def card_math(converter, el, card_data):
+    code = card_data.get('code', '')
+    if 'center' in el.parent.get("style", ''):
+        return f'$$\n{code}\n$$'
+    return f'$${code}$$'
+
+
+@registry.register('yuqueinline')
+def card_yuqueinline(converter, el, card_data):
+    src = card_data.get('src', '')
+    title = card_data.get('detail', {}).get('title', '未获取到超链接显示名')
+    elicit_type = card_data.get('detail', {}).get('type', 'doc')
+    if elicit_type.lower() == 'doc':
+        doc_icon = str((converter.parent_converter.assets / 'doc-type-default.svg').absolute().resolve())
+        return f'![图标]({doc_icon})[{title}]({src})'
+    return f'[{title}]({src})'
+
+
+@registry.register('bookmarkInline')
+def card_bookmark_inline(converter, el, card_data):
+    src = card_data.get('src', '')
+    title = card_data.get('detail', {}).get('title', '未获取到超链接显示名')
+    icon_url = converter.parent_converter.collect_asset(card_data.get('detail', {}).get('icon'))
+    if icon_url:
+        return f'![图标]({icon_url})[{title}]({src})'
+    return f'[{title}]({src})'
+
+
+@registry.register('imageGallery')
+def card_image_gallery(converter, el, card_data):
+    image_list = card_data.get('imageList', [])
+    image_gallery = []
+    total_width = sum(image.get('original', {}).get('width', 0) for image in image_list)
+    for image in image_list:
+        image_title = image.get('title', '图片无标题')
+        image_src = converter.parent_converter.collect_asset(image.get('src'))
+        width = image.get('original', {}).get('width', 0)
+        if not width or total_width <= 0:
+            image_gallery.append(f'![图片-{image_title}]({image_src})')
+        else:
+            width_percent = int((width / total_width) * 100) - 1
+            image_gallery.append(f'<img src="{image_src}" alt="{image_title}"  width="{width_percent}%"/>')
+    return f"{''.join(image_gallery)}\n"
+
+
+@registry.register('localdoc')
+def card_localdoc(converter, el, card_data):
+    src = converter.parent_converter.collect_asset(card_data.get('src', ''))
+    name = card_data.get('name', '文件')
+    return f'[{name}]({src})\n'
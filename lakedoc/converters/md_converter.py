@@ -16,96 +16,225 @@ Markdown 转换器
 """
 
 import typing as t
-from bs4 import BeautifulSoup, FeatureNotFound
-from markdownify import MarkdownConverter as MDConverter
-from lakedoc.utils import string, errors
+import warnings
+from collections import Counter
+from functools import lru_cache
+from bs4 import BeautifulSoup, FeatureNotFound, Comment, Doctype, NavigableString, Tag
+from bs4.builder import builder_registry
+from markdownify import MarkdownConverter as MDConverter, chomp, convert_heading_re, html_heading_re, whitespace_re
+from lakedoc.utils import errors, metrics
 from .base import LakeBaseConverter
+from .document import PREPROCESS_OPTIONS
+from . import md_cards, md_model, md_parallel
+
+
+# builder='auto' 时按顺序挑选第一个已安装的树构建器（html5lib 远慢于 html.parser，因此不参与挑选）
+AUTO_BUILDERS = ('lxml', 'html.parser')
+
+# markdownify 中子元素按行内方式转换的标签（标题另按 html_heading_re 匹配）
+CELL_TAGS = frozenset({'td', 'th'})
+# markdownify 中会删除首尾及相邻的空白文本节点的嵌套结构标签
+NESTED_TAGS = frozenset({'ol', 'ul', 'li', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'})
+# 这些祖先标签中的文本不转义特殊字符（pre 中的文本还保留原有的空白）
+CODE_TAGS = frozenset({'pre', 'code', 'kbd', 'samp'})
+
+
+@lru_cache(maxsize=None)
+def resolve_builder(builder: t.Union[str]) -> str:
+    """
+    解析树构建器名称，'auto' 将挑选已安装的最快的树构建器
+    :param builder: 树构建器名称或者 'auto'
+    :return: 实际使用的树构建器名称
+    """
+    if builder != 'auto':
+        return builder
+    for name in AUTO_BUILDERS:
+        if builder_registry.lookup(name) is not None:
+            return name
+    return 'html.parser'
+
+
+def code_context(el) -> t.Tuple[bool, bool]:
+    """
+    只向上遍历一次祖先节点（不包括元素自身），判断元素所处的代码环境，
+    与 markdownify 中的 find_parent('pre')、find_parent(CODE_TAGS) 一致
+    :param el: bs4 中的 PageElement 对象
+    :return: (是否在 pre 中, 是否在 pre/code/kbd/samp 中)
+    """
+    in_code = False
+    for parent in el.parents:
+        if parent.name == 'pre':
+            return True, True
+        if parent.name in CODE_TAGS:
+            in_code = True
+    return False, in_code
+
+
+def inline_conversion(markup_fn: t.Callable[[t.Any], str]) -> t.Callable:
+    """与 markdownify 的 abstract_inline_conversion 一致，通过 `code_context` 判断是否处于代码中"""
+    def implementation(self, el, text, convert_as_inline):
+        markup_prefix = markup_fn(self)
+        if markup_prefix.startswith('<') and markup_prefix.endswith('>'):
+            markup_suffix = '</' + markup_prefix[1:]
+        else:
+            markup_suffix = markup_prefix
+        if code_context(el)[1]:
+            return text
+        prefix, suffix, text = chomp(text)
+        if not text:
+            return ''
+        return f'{prefix}{markup_prefix}{text}{markup_suffix}{suffix}'
+    return implementation
 
 
 class MarkdownConverter(LakeBaseConverter):
+    INDENT_CHAR = '\u2003'  # &#8195;，用于还原段落缩进
+    strip_newlines = True  # create_bs4soup 会删除换行符，读取文件时提前处理可以避免额外的完整副本
+    # parallel 只影响执行方式；asset_localizer 有副作用，设置时不使用缓存
+    cache_options = ('builder', 'title', 'extract_tags', 'merge_tags', 'card_handlers', 'reparse')
+
+    @classmethod
+    def cache_state(cls) -> t.Any:
+        # 全局注册的 card 处理函数会改变转换结果
+        return md_cards.registry
+
     class ParticularConverter(MDConverter):
         def __init__(self, parent_converter: 'MarkdownConverter'):
             """
             针对部分标签特殊转换
             处理方法中必须含有三个参数 el, text, convert_as_inline
+
+            标签名到转换方法的分派表按类预先解析（第一次创建时），转换时不再逐个标签 getattr 与匹配正则，
+            同一个对象可以转换任意多个文档
             """
             super().__init__()
             self.parent_converter = parent_converter
+            if 'dispatch_table' not in type(self).__dict__:
+                # 转换选项（strip、convert）只来自类属性，因此分派表可以由同一个类的所有对象共享
+                type(self).dispatch_table = {}
+                for attr in dir(type(self)):
+                    if attr.startswith('convert_'):
+                        self.dispatch(attr[len('convert_'):])
+                for n in range(1, 7):
+                    self.dispatch(f'h{n}')
+
+        # 这些标签在 markdownify 中会改变子元素的转换方式，不能向下拆分
+        TRANSPARENT_EXCLUDED = {'ol', 'ul', 'li', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}
+
+        # 行内标签的转换不再通过 find_parent 查找祖先（每次调用都会创建 bs4 的过滤器）
+        convert_b = convert_strong = inline_conversion(lambda self: 2 * self.options['strong_em_symbol'])
+        convert_em = convert_i = inline_conversion(lambda self: self.options['strong_em_symbol'])
+        convert_del = convert_s = inline_conversion(lambda self: '~~')
+        _convert_code = inline_conversion(lambda self: '`')
+
+        def convert_code(self, el, text, convert_as_inline):
+            if el.parent.name == 'pre':
+                return text
+            return self._convert_code(el, text, convert_as_inline)
+
+        convert_kbd = convert_samp = convert_code
 
         def convert_font(self, el, text, convert_as_inline):
             return str(el) if text else ''
 
         def convert_card(self, el, text, convert_as_inline):
-            card_type = el.attrs['name']
-            if card_type == 'hr':
-                return '---\n'
-            elif card_type in ('image', 'flowchart2', 'board'):
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                src = card_data.get('src', '')
-                return f'![图片未加载]({src})\n'
-            elif card_type == 'table':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                return f'{card_data["html"]}\n'
-            elif card_type == 'codeblock':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                mode = card_data.get('mode', '')
-                code = card_data.get('code', '')
-                return f'\n```{mode}\n{code}\n```\n'
-            elif card_type == 'diagram':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                src = card_data.get('url', '')
-                return f'![图片未加载]({src})\n'
-            elif card_type == 'math':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                code = card_data.get('code', '')
-                if 'center' in el.parent.get("style", ''):
-                    return f'$$\n{code}\n$$'
-                return f'$${code}$$'
-            elif card_type == 'yuqueinline':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                src = card_data.get('src', '')
-                title = card_data.get('detail', {}).get('title', '未获取到超链接显示名')
-                elicit_type = card_data.get('detail', {}).get('type', 'doc')
-                if elicit_type.lower() == 'doc':
-                    doc_icon = str((self.parent_converter.assets / 'doc-type-default.svg').absolute().resolve())
-                    return f'![图标]({doc_icon})[{title}]({src})'
-                return f'[{title}]({src})'
-            elif card_type == 'bookmarkInline':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                src = card_data.get('src', '')
-                title = card_data.get('detail', {}).get('title', '未获取到超链接显示名')
-                icon_url = card_data.get('detail', {}).get('icon')
-                if icon_url:
-                    return f'![图标]({icon_url})[{title}]({src})'
-                return f'[{title}]({src})'
-            elif card_type == 'imageGallery':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                image_list = card_data.get('imageList', [])
-                image_gallery = []
-                total_width = sum(image.get('original', {}).get('width', 0) for image in image_list)
-                for image in image_list:
-                    image_title = image.get('title', '图片无标题')
-                    image_src = image.get('src')
-                    width = image.get('original', {}).get('width', 0)
-                    if not width or total_width <= 0:
-                        image_gallery.append(f'![图片-{image_title}]({image_src})')
-                    else:
-                        width_percent = int((width / total_width) * 100) - 1
-                        image_gallery.append(f'<img src="{image_src}" alt="{image_title}"  width="{width_percent}%"/>')
-                return f"{''.join(image_gallery)}\n"
-            elif card_type == 'localdoc':
-                card_data = string.decode_card_value(el.attrs.get('value', ''))
-                src = card_data.get('src', '')
-                name = card_data.get('name', '文件')
-                return f'[{name}]({src})\n'
-            return ''
+            record = self.parent_converter.model.card(el)
+            current = metrics.current()
+            if current is not None:
+                current.cards[record.name] += 1
+            if record.handler is None:
+                self.parent_converter.unknown_cards[record.name] += 1
+                return ''
+            return record.handler(self, el, record.data)
+
+        def dispatch(self, name: t.Union[str]) -> t.Tuple[t.Optional[t.Callable], bool, bool]:
+            """
+            查找标签的转换方式（与 markdownify 的 process_tag 的判断一致），结果记录到分派表中
+            :param name: 标签名
+            :return: (未绑定的转换函数（没有或者不转换时为 None）, 子元素是否按行内方式转换, 是否是嵌套结构标签)
+            """
+            entry = self.dispatch_table.get(name)
+            if entry is None:
+                handler = getattr(type(self), f'convert_{name}', None)
+                match = convert_heading_re.match(f'convert_{name}')
+                if handler is None and match is not None:
+                    # markdownify 通过 __getattr__ 为任意 h<n> 标签生成转换方法
+                    def handler(converter, el, text, convert_as_inline, n=int(match.group(1))):
+                        return converter.convert_hn(n, el, text, convert_as_inline)
+                if handler is not None and not self.should_convert_tag(name):
+                    handler = None
+                inline = html_heading_re.match(name) is not None or name in CELL_TAGS
+                entry = self.dispatch_table[name] = (handler, inline, name in NESTED_TAGS)
+            return entry
+
+        def process_tag(self, node, convert_as_inline, children_only=False):
+            """与 markdownify 的 process_tag 一致，标签的转换方式从分派表中查找"""
+            handler, inline, nested = self.dispatch(node.name)
+            convert_children_as_inline = convert_as_inline or (inline and not children_only)
+
+            if nested:
+                # 删除首尾的、或者与嵌套结构标签相邻的空白文本节点
+                for el in node.children:
+                    if isinstance(el, NavigableString) and str(el).strip() == '' and (
+                            not el.previous_sibling or not el.next_sibling
+                            or el.previous_sibling.name in NESTED_TAGS or el.next_sibling.name in NESTED_TAGS):
+                        el.extract()
+
+            parts = []
+            for el in node.children:
+                if isinstance(el, (Comment, Doctype)):
+                    continue
+                elif isinstance(el, NavigableString):
+                    parts.append(self.process_text(el))
+                else:
+                    parts.append(self.process_tag(el, convert_children_as_inline))
+            text = ''.join(parts)
+
+            if not children_only and handler is not None:
+                text = handler(self, node, text, convert_as_inline)
+            return text
+
+        def process_text(self, el):
+            """与 markdownify 的 process_text 一致，只向上遍历一次祖先节点"""
+            text = str(el) or ''
+
+            in_pre, in_code = code_context(el)
+            if not in_pre:
+                text = whitespace_re.sub(' ', text)
+            if not in_code:
+                text = self.escape(text)
+
+            # 列表项中的最后一个文本节点、或者其后紧跟嵌套列表时，去除末尾的空白
+            if el.parent.name == 'li' and (not el.next_sibling or el.next_sibling.name in md_model.LIST_TAGS):
+                text = text.rstrip()
+            return text
+
+        def iter_convert_soup(self, node) -> t.Iterator[str]:
+            """
+            逐个顶层块转换节点的子元素，拼接后与 `convert_soup` 的结果一致
+            没有专门转换方法的容器标签（html、body、div 等）会继续向下拆分
+            """
+            for el in node.children:
+                if isinstance(el, (Comment, Doctype)):
+                    continue
+                elif isinstance(el, NavigableString):
+                    yield self.process_text(el)
+                elif self.is_transparent(el):
+                    yield from self.iter_convert_soup(el)
+                else:
+                    yield self.process_tag(el, convert_as_inline=False)
+
+        def is_transparent(self, el) -> bool:
+            """判断标签的转换结果是否就是其子元素转换结果的直接拼接"""
+            if el.name in self.TRANSPARENT_EXCLUDED:
+                return False
+            handler, inline, _ = self.dispatch(el.name)
+            return handler is None and not inline
 
         def convert_li(self, el, text, convert_as_inline):
             indent = 0
-            if el.parent and el.parent.name in ('ul', 'ol'):
-                if 'data-lake-indent' in el.parent.attrs:
-                    indent = int(el.parent.attrs['data-lake-indent'])
-                    # print(el.parent, indent)
+            if el.parent and el.parent.name in md_model.LIST_TAGS:
+                indent = self.parent_converter.model.list_indent(el.parent)
 
             prefix = "\t" * indent
 
@@ -122,42 +251,234 @@ class MarkdownConverter(LakeBaseConverter):
         def convert_sup(self, el, text, convert_as_inline):
             return str(el)
 
-    def __init__(self, raw_html: t.Union[str], builder: t.Union[str] = None,
+    def __init__(self, raw_html: t.Union[str] = '', builder: t.Union[str] = None,
                  title: t.Union[str] = None,
-                 extract_tags: t.Set[str] = None):
+                 extract_tags: t.Set[str] = None,
+                 merge_tags: t.Set[str] = None,
+                 card_handlers: t.Dict[str, md_cards.CardHandler] = None,
+                 reparse: t.Union[bool] = False,
+                 asset_localizer=None,
+                 document=None,
+                 parallel=None):
         """
         Lake Doc -> Markdown Doc
-        :param raw_html: 未经过处理的 HTML 内容（最原生的）
-        :param builder: bs4 的树构建器，默认为 'html.parser'（options 参数）
+
+        创建时不解析 HTML（转换时才解析），转换器可以复用：配置一次后通过 `convert(raw_html)` 依次转换多个文档，
+        树构建器、标签的分派表等只解析一次
+        :param raw_html: 未经过处理的 HTML 内容（最原生的），复用转换器时可以留空，转换时再传入
+        :param builder:
+            bs4 的树构建器，默认为 'html.parser'，'auto' 表示自动挑选已安装的最快的树构建器（options 参数）
         :param title: 指定设置转换后 Markdown内容顶行的标题，默认为 None（options 参数）
         :param extract_tags:
             处理 html 时应该删除哪些标签，默认为 {'meta', 'link', 'script', 'style'}（options 参数）
+        :param merge_tags:
+            需要合并的紧邻同名行内标签，默认为 {'em', 'strong'}，可追加 'u'、'del'、'code' 等（options 参数）
+        :param card_handlers:
+            额外的 card 处理函数 {card 名称: 处理函数}，仅对当前转换器生效，
+            全局扩展请使用 `md_cards.registry.register`（options 参数）
+        :param reparse:
+            开启后先将 soup 序列化为 HTML 再交由 markdownify 重新解析（旧流程），
+            默认关闭，即直接遍历已加工的 soup 对象（options 参数）
+        :param asset_localizer:
+            资源本地化（lakedoc.AssetLocalizer），开启后 card 中引用的图片、图标、附件将下载到本地，
+            链接改写为本地路径，默认关闭（options 参数）
+        :param document:
+            中间文档（LakeDocument），指定后直接使用其中已预处理的树，不再解析 raw_html，
+            此时 builder、extract_tags、merge_tags 不再生效（请使用 `from_document`）
+        :param parallel:
+            文档内并行：在顶层块的边界处切分超大的文档，各片段在进程池中转换后按顺序拼接（结果与串行转换一致），
+            可以是进程数量、True（CPU 核心数）或者复用的进程池（concurrent.futures.Executor），
+            card_handlers 必须可被序列化（模块级函数）。默认关闭；小于两个片段（见 md_parallel.PARALLEL_CHUNK_SIZE）的文档、
+            html5lib 树构建器、reparse 与 asset_localizer 不切分，直接串行转换（options 参数）
         """
         super().__init__(raw_html)
-        self.builder = builder or 'html.parser'
+        self.builder = resolve_builder(builder or 'html.parser')
         self.title = title
         self.extract_tags = extract_tags or {'meta', 'link', 'script', 'style'}
-        self.soup = self.create_bs4soup()
+        self.merge_tags = merge_tags or {'em', 'strong'}
+        self.card_handlers = card_handlers
+        self.card_registry = md_cards.registry.copy(card_handlers) if card_handlers else md_cards.registry
+        self.reparse = reparse
+        self.asset_localizer = asset_localizer
+        self.parallel = parallel
+        self.particular_converter = self.ParticularConverter(self)
+        self.reset(raw_html, document)
+
+    def reset(self, raw_html: t.Union[str], document=None):
+        """
+        切换到新的文档（保留转换器的配置与分派表），HTML 在转换时才解析
+        :param raw_html: 未经过处理的 HTML 内容
+        :param document: 中间文档（LakeDocument），指定后直接使用其中已预处理的树，不再解析 raw_html
+        """
+        self.raw_html = raw_html
+        self.document = document
+        self.soup: t.Optional[BeautifulSoup] = None
+        self.unknown_cards: t.Counter[str] = Counter()
+        self.asset_urls: t.List[str] = []
+        self.collecting_assets = False
+        self.model = md_model.DocumentModel(self.card_registry)
+        self.pending_indents: t.List[t.Tuple[Tag, t.List[Tag]]] = []
+        self.prepared = document is not None
+        # 各片段在工作进程中解析，需要完整的树时（例如 create_html）再解析
+        self.chunks = self.split_chunks() if document is None else None
+
+    @classmethod
+    def from_document(cls, document, **options) -> 'MarkdownConverter':
+        """从中间文档创建转换器（直接使用其中已预处理的树，跳过解析与预处理）"""
+        options = {name: value for name, value in options.items() if name not in PREPROCESS_OPTIONS}
+        return cls('', builder=document.builder, document=document, **options)
 
-    def convert(self) -> t.Union[str]:
-        html_data = self.create_html()
-        md_data = self.ParticularConverter(self).convert(html_data)
-        md_data = self.add_title(md_data)
+    def convert(self, raw_html: t.Union[str] = None) -> t.Union[str]:
+        """
+        转换为 Markdown 内容
+        :param raw_html: 新的文档的 HTML 内容，指定后先切换到该文档（复用转换器），默认转换当前的文档
+        :return: Markdown 内容
+        """
+        if raw_html is not None:
+            self.reset(raw_html)
+        if self.asset_localizer is not None:
+            soup = self.prepare_soup()
+            with metrics.stage('assets'):
+                self.prefetch_assets(soup)
+        if self.reparse:
+            html_data = self.create_html()
+            with metrics.stage('walk'):
+                md_data = self.particular_converter.convert(html_data)
+        elif self.chunks is not None:
+            with metrics.stage('parallel'):
+                md_data = ''.join(self.convert_chunks())
+        else:
+            soup = self.prepare_soup()
+            with metrics.stage('walk'):
+                md_data = self.particular_converter.convert_soup(soup)
+        with metrics.stage('add_title'):
+            md_data = self.add_title(md_data)
+        if self.unknown_cards:
+            warnings.warn(errors.LakeUnknownCardWarning(self.unknown_cards), stacklevel=2)
         return md_data
 
-    def create_html(self) -> t.Union[str]:
+    def iter_convert(self, raw_html: t.Union[str] = None) -> t.Iterator[str]:
         """
-        处理、创建 更加合法的 HTML 内容
+        按顶层块逐块产出 Markdown 内容，拼接后与 `convert` 的结果完全一致
+        :param raw_html: 新的文档的 HTML 内容，指定后先切换到该文档（复用转换器），默认转换当前的文档
+        :return: Markdown 内容块的迭代器
+        """
+        if raw_html is not None:
+            self.reset(raw_html)
+        if self.asset_localizer is not None:
+            # 资源本地化需要在转换前收集并下载全部资源
+            yield self.convert()
+            return
 
-        :return: HTML 字符串内容
+        if self.chunks is not None:
+            chunks = self.convert_chunks()
+        else:
+            chunks = self.particular_converter.iter_convert_soup(self.prepare_soup())
+        # add_title 需要根据开头的两个字符判断换行，因此先缓冲到至少两个字符
+        head = ''
+        for chunk in chunks:
+            if head is None:
+                if chunk:
+                    yield chunk
+                continue
+            head += chunk
+            if len(head) >= 2:
+                yield self.add_title(head)
+                head = None
+        if head is not None:
+            yield self.add_title(head)
+        if self.unknown_cards:
+            warnings.warn(errors.LakeUnknownCardWarning(self.unknown_cards), stacklevel=2)
+
+    def split_chunks(self) -> t.Optional[t.List[str]]:
+        """
+        文档内并行：在顶层块的边界处切分原始 HTML
+        :return: 片段列表，未开启、不支持或者无法切分时返回 None
         """
-        for tag in self.soup.find_all(True):
-            self.render_styles(tag)
+        parallel = self.parallel
+        if not parallel or (type(parallel) is int and parallel < 2):
+            return None
+        if self.reparse or self.asset_localizer is not None or not md_parallel.can_split(self.builder):
+            return None
+
+        with metrics.stage('split'):
+            raw_data = self.raw_html.replace('\n', '').replace('\r', '').strip()
+            chunks = md_parallel.split_html(raw_data, md_parallel.PARALLEL_CHUNK_SIZE, self.merge_tags,
+                                            self.extract_tags)
+        return chunks if len(chunks) > 1 else None
+
+    def convert_chunks(self) -> t.Iterator[str]:
+        """在进程池中转换各片段（不添加标题），按顺序产出转换结果"""
+        options = {
+            'builder': self.builder,
+            'extract_tags': self.extract_tags,
+            'merge_tags': self.merge_tags,
+            'card_handlers': self.card_handlers,
+        }
+        for text, unknown_cards in md_parallel.map_chunks(self.chunks, options, self.parallel):
+            self.unknown_cards.update(unknown_cards)
+            yield text
 
-            if tag.name in self.extract_tags:
+    def prepare_soup(self) -> t.Union[BeautifulSoup]:
+        """
+        就地加工 soup 对象（渲染样式、删除标签），并规整文本节点，
+        使其与“序列化后重新解析”得到的树结构保持一致
+
+        :return: 加工后的 BeautifulSoup 对象
+        """
+        soup = self.parse()
+        # 已加工过的树（例如来自中间文档）不能重复加工，否则缩进会被重复插入
+        if self.prepared:
+            return soup
+
+        with metrics.stage('render_styles') as current:
+            tags = [el for el in soup.descendants if isinstance(el, Tag)]
+            if current is not None:
+                current.nodes += len(tags)
+
+            extracted = []
+            for tag in tags:
+                # 已改写为 font 的元素等价于被替换，无需再删除
+                if self.render_styles(tag):
+                    continue
+
+                if tag.name in self.extract_tags:
+                    extracted.append(tag)
+                elif not self.reparse:
+                    # 重新解析时 markdownify 遍历的是新的元素，记录将在转换时按需创建
+                    self.model.add(tag)
+
+            # 先插入缩进再删除标签，保证被删除标签前的缩进依旧保留
+            self.insert_indents()
+            for tag in extracted:
                 tag.extract()
 
-        return str(self.soup)
+            # 序列化时 doctype 会携带换行符，重新解析时相邻的文本节点会合并、空文本节点会消失，这里提前处理
+            for doctype in self.soup.find_all(string=lambda s: isinstance(s, Doctype)):
+                doctype.insert_after(NavigableString('\n'))
+            self.soup.smooth()
+            for text_node in self.soup.find_all(string=''):
+                text_node.extract()
+
+        self.prepared = True
+        return self.soup
+
+    def parse(self) -> t.Union[BeautifulSoup]:
+        """
+        解析当前的文档（转换时会按需调用，已解析时直接返回）
+        :return: BeautifulSoup 对象，来自中间文档时是已预处理的树
+        """
+        if self.soup is None:
+            self.soup = self.create_bs4soup() if self.document is None else self.document.create_soup()
+        return self.soup
+
+    def create_html(self) -> t.Union[str]:
+        """
+        处理、创建 更加合法的 HTML 内容
+
+        :return: HTML 字符串内容
+        """
+        return str(self.prepare_soup())
 
     def create_bs4soup(self) -> t.Union[BeautifulSoup]:
         """
@@ -165,58 +486,157 @@ class MarkdownConverter(LakeBaseConverter):
 
         :return: BeautifulSoup 对象
         """
+        # 内容已经处理过时（例如通过 file.readfile(strip_newlines=True) 读取），replace 与 strip 直接返回原对象，不会复制
         raw_data = self.raw_html.replace('\n', '').replace('\r', '').strip()
         try:
-            soup = BeautifulSoup(raw_data, self.builder)
-
-            # feature: 合并相邻的 em 标签，防止转换后出现 *ab**cd* 这种难以解析的 md 语法
-            for em_tag in soup.find_all('em'):
-                next_sibling = em_tag.find_next_sibling()
-                # 如果存在相邻<em>标签
-                while next_sibling and next_sibling.name == 'em':
-                    # 将其子元素拓展到到第1个<em>标签中
-                    em_tag.extend(next_sibling.contents)
-                    next_sibling.extract()
-                    next_sibling = em_tag.find_next_sibling()
-
-            for strong_tag in soup.find_all('strong'):
-                next_sibling = strong_tag.find_next_sibling()
-                while next_sibling and next_sibling.name == 'strong':
-                    strong_tag.extend(next_sibling.contents)
-                    next_sibling.extract()
-                    next_sibling = strong_tag.find_next_sibling()
+            with metrics.stage('parse'):
+                soup = BeautifulSoup(raw_data, self.builder)
+
+            # feature: 合并相邻的 em/strong 等标签，防止转换后出现 *ab**cd* 这种难以解析的 md 语法
+            with metrics.stage('merge'):
+                self.merge_adjacent_tags(soup)
 
             return soup
         except FeatureNotFound:
             raise errors.LakeBuilderNotFoundError(self.builder)
 
+    def merge_adjacent_tags(self, soup: t.Union[BeautifulSoup]):
+        """
+        合并紧邻的同名行内标签（由 `merge_tags` 指定），例如 <em>a</em><em>b</em> -> <em>ab</em>
+
+        先找出存在紧邻同名标签的父节点，再逐个重建其子节点列表，耗时与节点数量成正比
+        :param soup: 待处理的 BeautifulSoup 对象
+        """
+        parents: t.Dict[int, Tag] = {}
+        for tag in soup.descendants:
+            if tag.name not in self.merge_tags:
+                continue
+            previous = tag.previous_sibling
+            if previous is not None and previous.name == tag.name:
+                parents[id(tag.parent)] = tag.parent
+
+        for parent in parents.values():
+            self.merge_children(parent)
+
+    def merge_children(self, parent: t.Union[Tag]):
+        """
+        合并某个节点下紧邻的同名行内标签（只扫描一次子节点列表）
+        :param parent: 待处理的节点
+        """
+        children = []
+        heads = []
+        for child in parent.contents:
+            head = children[-1] if children else None
+            if head is not None and child.name in self.merge_tags and head.name == child.name:
+                if not heads or heads[-1] is not head:
+                    heads.append(head)
+                # 将其子元素拓展到第1个标签中
+                head.extend(child.contents)
+            else:
+                children.append(child)
+
+        if not heads:
+            return None
+
+        parent.clear()
+        parent.extend(children)
+        # 合并后的标签内部可能产生新的紧邻标签，例如 <strong><em>a</em></strong><strong><em>b</em></strong>
+        for head in heads:
+            self.merge_children(head)
+
+    def parse_style(self, raw_style: t.Union[str]) -> t.Dict[str, str]:
+        """
+        解析 style 属性为字典，相同的 style 字符串只解析一次
+        :param raw_style: 原始的 style 属性值
+        :return: 样式字典（共享缓存，请勿修改）
+        """
+        return md_model.style_info(raw_style).styles
+
+    def create_indent_spans(self, count: t.Union[int]) -> t.List[Tag]:
+        """
+        创建指定数量的缩进标签 `<span>&#8195;</span>`
+        :param count: 缩进的数量
+        :return: span 标签列表
+        """
+        spans = []
+        for _ in range(count):
+            span = self.soup.new_tag('span')
+            span.append(NavigableString(self.INDENT_CHAR))
+            spans.append(span)
+        return spans
+
     def render_styles(self, el):
         """
-        根据 element 对象，渲染出对应的合法样式
+        根据 element 对象，渲染出对应的合法样式（缩进标签由 `insert_indents` 统一插入）
         :param el: bs4 中的 PageElement 对象
+        :return: 元素被就地改写为 font 标签时返回 True
         """
         if 'style' not in el.attrs:
-            return None
+            return False
 
         raw_style = el.attrs['style']
-        raw_styles = [si.strip() for si in raw_style.split(';') if ':' in si]
-        styles: t.Dict[str, str] = {si.split(':', 1)[0].strip(): si.split(':', 1)[-1].strip() for si in raw_styles}
-        if 'color' in styles or 'background-color' in styles:
-            if el.parent and el in el.parent.contents and el.string:
-                new_tag = BeautifulSoup(f'<font style="{raw_style}">{el.string}</font>',
-                                        self.builder).font
-                el.replace_with(new_tag)
-
-        if 'text-indent' in styles:
-            text_indent = string.extract_integer(styles['text-indent'])
-            prefix = "<span>&#8195;</span>" * text_indent
-            if el.parent:
-                el.insert_before(BeautifulSoup(prefix, self.builder))
-        elif 'padding-left' in styles:
-            text_indent = string.extract_integer(styles['padding-left'])
-            prefix = "<span>&#8195;</span>" * text_indent
-            if el.parent:
-                el.insert_before(BeautifulSoup(prefix, self.builder))
+        style = md_model.style_info(raw_style)
+        if style.colored:
+            text = el.string
+            if el.parent and text:
+                # 就地改写为 <font>，避免 replace_with 在兄弟节点中线性查找位置
+                el.name = 'font'
+                el.attrs = {'style': raw_style}
+                el.clear()
+                el.append(NavigableString(text))
+                return True
+
+        if el.parent and style.indent:
+            self.pending_indents.append((el, self.create_indent_spans(style.indent)))
+        return False
+
+    def insert_indents(self):
+        """
+        批量插入 `render_styles` 产生的缩进标签：按父节点分组，每个父节点只重建一次子节点列表，
+        避免逐个 insert_before 时在大量兄弟节点中线性查找位置
+        """
+        groups: t.Dict[int, t.Tuple[Tag, t.Dict[int, t.List[Tag]]]] = {}
+        for el, spans in self.pending_indents:
+            if el.parent is not None:
+                groups.setdefault(id(el.parent), (el.parent, {}))[1][id(el)] = spans
+        self.pending_indents.clear()
+
+        for parent, indents in groups.values():
+            children = []
+            for child in parent.contents:
+                children.extend(indents.get(id(child), ()))
+                children.append(child)
+            parent.clear()
+            parent.extend(children)
+
+    def prefetch_assets(self, soup: t.Union[BeautifulSoup]):
+        """
+        资源本地化的预取：以收集模式执行文档中各个 card 的处理函数（只记录资源地址，输出被丢弃），
+        再并发下载收集到的全部资源，之后的转换中 `collect_asset` 直接返回本地链接
+        :param soup: 加工后的 BeautifulSoup 对象
+        """
+        self.collecting_assets = True
+        try:
+            for el in soup.find_all('card'):
+                record = self.model.card(el)
+                if record.handler is not None:
+                    record.handler(self.particular_converter, el, record.data)
+        finally:
+            self.collecting_assets = False
+        self.asset_localizer.localize(self.asset_urls)
+
+    def collect_asset(self, url: t.Optional[str]) -> t.Optional[str]:
+        """
+        获取资源的链接（供 card 处理函数调用），未开启资源本地化时原样返回
+        :param url: 资源地址
+        :return: 本地链接；未开启资源本地化、不是远程地址或者下载失败时返回原地址（预取阶段只记录地址并原样返回）
+        """
+        if self.asset_localizer is None or not url:
+            return url
+        if self.collecting_assets:
+            self.asset_urls.append(url)
+            return url
+        return self.asset_localizer.link(url)
 
     def add_title(self, data: t.Union[str]):
         """
@@ -0,0 +1,116 @@
+"""
+Markdown 转换器的紧凑数据模型
+
+转换前的预处理阶段（prepare_soup）将文档中需要反复解析的原始字符串转换为紧凑的记录：
+    - StyleInfo: 解析后的 style 属性（按原始字符串驻留，不同文档之间共享）
+    - CardRecord: card 的名称、处理函数以及解码后的 value
+    - 列表（ul/ol）的缩进层级，每个列表只解析一次
+
+渲染阶段（样式渲染、card 转换、列表项转换）直接读取这些记录，不再重复解析属性字符串
+"""
+
+import typing as t
+from functools import lru_cache
+from lakedoc.utils import string
+from . import md_cards
+
+STYLE_CACHE_SIZE = 4096
+
+LIST_TAGS = ('ul', 'ol')
+
+
+class StyleInfo(object):
+    __slots__ = ('raw', 'styles', 'colored', 'indent')
+
+    def __init__(self, raw: t.Union[str]):
+        """
+        解析后的 style 属性（只读，不同元素之间共享）
+        :param raw: 原始的 style 属性值
+        """
+        styles = {}
+        for item in raw.split(';'):
+            if ':' in item:
+                name, value = item.split(':', 1)
+                styles[name.strip()] = value.strip()
+
+        self.raw = raw
+        self.styles = styles
+        # 存在前景色或者背景色时，元素需要渲染为 <font>
+        self.colored = 'color' in styles or 'background-color' in styles
+        # 段落缩进的数量（text-indent 优先，其次 padding-left）
+        if 'text-indent' in styles:
+            self.indent = string.extract_integer(styles['text-indent'])
+        elif 'padding-left' in styles:
+            self.indent = string.extract_integer(styles['padding-left'])
+        else:
+            self.indent = 0
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.raw!r}>'
+
+
+@lru_cache(maxsize=STYLE_CACHE_SIZE)
+def style_info(raw: t.Union[str]) -> StyleInfo:
+    """
+    解析 style 属性，并按原始字符串缓存结果（相同的 style 在所有文档中只解析一次）
+    :param raw: 原始的 style 属性值
+    :return: StyleInfo 对象（缓存共享，请勿修改）
+    """
+    return StyleInfo(raw)
+
+
+class CardRecord(object):
+    __slots__ = ('name', 'handler', 'data')
+
+    def __init__(self, name: t.Union[str], handler: t.Optional[md_cards.CardHandler], data: t.Dict[str, t.Any]):
+        """
+        :param name: card 的名称
+        :param handler: card 的处理函数，未适配的 card 类型为 None
+        :param data: 解码后的 card value（未适配的 card 类型不解码，为空字典）
+        """
+        self.name = name
+        self.handler = handler
+        self.data = data
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self.name}>'
+
+
+class DocumentModel(object):
+    __slots__ = ('card_registry', 'cards', 'list_indents')
+
+    def __init__(self, card_registry: md_cards.CardRegistry):
+        """
+        单个文档的数据模型（按元素记录，键为元素的 id，元素必须在转换期间保持存活）
+        :param card_registry: 查找 card 处理函数的注册表
+        """
+        self.card_registry = card_registry
+        self.cards: t.Dict[int, CardRecord] = {}
+        self.list_indents: t.Dict[int, int] = {}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: cards={len(self.cards)} lists={len(self.list_indents)}>'
+
+    def add(self, tag):
+        """预处理阶段登记元素（仅 card 与列表标签会产生记录）"""
+        if tag.name == 'card':
+            self.card(tag)
+        elif tag.name in LIST_TAGS:
+            self.list_indent(tag)
+
+    def card(self, el) -> CardRecord:
+        """获取 card 标签的记录（未登记的元素，例如重新解析得到的元素，将在此时创建记录）"""
+        record = self.cards.get(id(el))
+        if record is None:
+            name = el.attrs.get('name', '')
+            handler = self.card_registry.get(name)
+            data = md_cards.decode_card(el.attrs.get('value', '')) if handler is not None else {}
+            record = self.cards[id(el)] = CardRecord(name, handler, data)
+        return record
+
+    def list_indent(self, el) -> int:
+        """获取列表标签（ul/ol）的缩进层级（data-lake-indent），不存在时为 0"""
+        indent = self.list_indents.get(id(el))
+        if indent is None:
+            indent = self.list_indents[id(el)] = int(el.attrs.get('data-lake-indent', 0))
+        return indent
@@ -0,0 +1,167 @@
+"""
+Markdown 转换器的文档内并行（通过 parallel 参数开启）
+
+超大的单个文档（例如数十 MB 的会议记录、以 table card 导出的表格）串行转换时只能使用一个 CPU 核心。
+开启后，原始 HTML 在顶层块的边界处切分为多个片段，各片段在进程池中分别解析、预处理与转换，再按顺序拼接，
+结果与串行转换完全一致：
+    - 只在两个紧邻的顶层标签之间切分（切分点两侧都不是文本，不会影响文本节点的合并与空白的规整）
+    - 切分点两侧不是需要合并的行内标签（merge_tags）或者需要删除的标签（extract_tags），
+      左侧不是列表（markdownify 转换列表时会检查其后的兄弟节点）
+    - 列表的缩进层级（data-lake-indent）与编号（start）记录在各自的 ol/ul 标签上，不受切分的影响
+    - 标题（add_title）在拼接后统一添加，开头换行的处理与串行转换相同
+无法可靠地确定顶层结构时（标签不配对、非空元素自闭合等）不切分，回退为串行转换
+"""
+
+import os
+import re
+import typing as t
+from collections import Counter
+from itertools import repeat
+from lakedoc.utils import metrics
+
+if t.TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# 每个片段的大小（字符数），小于两个片段的文档不切分
+PARALLEL_CHUNK_SIZE = 512 * 1024
+
+# 支持切分的树构建器（html5lib 会根据 doctype 切换解析模式，片段的解析结果可能与完整的文档不同）
+PARALLEL_BUILDERS = ('html.parser', 'lxml')
+
+# 这些标签不作为切分点两侧的标签（列表会检查其后的兄弟节点；文档头部的标签在片段开头时可能被移入 head）
+UNSPLITTABLE_TAGS = frozenset({
+    'ul', 'ol', 'html', 'head', 'body', 'title', 'base', 'link', 'meta', 'style', 'script', 'noscript', 'template',
+})
+
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+})
+
+# 内容不按 HTML 解析的标签（其中的 < 不是标签）
+RAW_TEXT_TAGS = frozenset({'script', 'style', 'textarea', 'title'})
+
+TOKEN_RE = re.compile(r'''<!--.*?-->|<[!?][^>]*>|<(/?)([a-zA-Z][^\s/>]*)((?:[^>"']+|"[^"]*"|'[^']*')*)>''', re.S)
+
+
+def split_html(html: t.Union[str], chunk_size: t.Union[int] = PARALLEL_CHUNK_SIZE,
+               merge_tags: t.Set[str] = frozenset(),
+               extract_tags: t.Set[str] = frozenset()) -> t.List[str]:
+    """
+    在顶层块的边界处将 HTML 切分为大小约为 chunk_size 的片段
+    :param html: 已删除换行符的 HTML 内容
+    :param chunk_size: 每个片段的最小大小（字符数）
+    :param merge_tags: 需要合并的紧邻同名行内标签（不作为切分点两侧的标签）
+    :param extract_tags: 需要删除的标签（不作为切分点两侧的标签）
+    :return: 片段列表，无法切分时只有一个片段（即原始内容）
+    """
+    if len(html) < chunk_size * 2:
+        return [html]
+
+    excluded = UNSPLITTABLE_TAGS | set(merge_tags) | set(extract_tags)
+    cuts = [0]
+    stack: t.List[str] = []
+    # 最近一个在顶层结束的标签：(标签名, 结束位置)
+    closed: t.Tuple[t.Optional[str], int] = (None, -1)
+    position = 0
+    while True:
+        match = TOKEN_RE.search(html, position)
+        if match is None:
+            break
+        position = match.end()
+        slash, name = match.group(1), match.group(2)
+        if name is None:
+            # 注释、doctype、处理指令
+            continue
+        name = name.lower()
+
+        if slash:
+            if not stack or stack[-1] != name:
+                return [html]
+            stack.pop()
+            if not stack:
+                closed = (name, position)
+            continue
+
+        if not stack and closed[1] == match.start() and closed[0] not in excluded and name not in excluded \
+                and match.start() - cuts[-1] >= chunk_size:
+            cuts.append(match.start())
+
+        if name in VOID_TAGS:
+            if not stack:
+                closed = (name, position)
+        elif match.group(3).rstrip().endswith('/'):
+            # 非空元素的自闭合写法在不同的树构建器中含义不同
+            return [html]
+        elif name in RAW_TEXT_TAGS:
+            end = re.compile(f'</{name}\\s*>', re.I).search(html, position)
+            if end is None:
+                return [html]
+            position = end.end()
+            if not stack:
+                closed = (name, position)
+        else:
+            stack.append(name)
+
+    if stack:
+        return [html]
+    # 最后一个片段过小时并入前一个片段
+    if len(cuts) > 1 and len(html) - cuts[-1] < chunk_size:
+        cuts.pop()
+    return [html[start:end] for start, end in zip(cuts, cuts[1:] + [len(html)])]
+
+
+def can_split(builder: t.Union[str]) -> bool:
+    """当前的树构建器与进程是否支持文档内并行（进程池中的工作进程不能再创建子进程）"""
+    import multiprocessing
+
+    return builder in PARALLEL_BUILDERS and not multiprocessing.current_process().daemon
+
+
+def convert_chunk(html: t.Union[str],
+                  options: t.Dict[str, t.Any]) -> t.Tuple[str, t.Dict[str, int], metrics.ConvertMetrics]:
+    """
+    在工作进程中转换单个片段（不添加标题）
+    :param html: 片段的 HTML 内容
+    :param options: 转换器的预处理选项（builder、extract_tags、merge_tags、card_handlers）
+    :return: (Markdown 内容, 未适配的 card 数量, 性能指标)
+    """
+    from .md_converter import MarkdownConverter
+
+    current = metrics.ConvertMetrics('markdown', MarkdownConverter.__name__)
+    token = metrics.activate(current)
+    try:
+        converter = MarkdownConverter(html, **options)
+        soup = converter.prepare_soup()
+        with metrics.stage('walk'):
+            text = converter.particular_converter.convert_soup(soup)
+    finally:
+        metrics.deactivate(token)
+    return text, dict(converter.unknown_cards), current
+
+
+def map_chunks(chunks: t.List[str], options: t.Dict[str, t.Any],
+               parallel: t.Union[bool, int, 'Executor']) -> t.Iterator[t.Tuple[str, t.Dict[str, int]]]:
+    """
+    在进程池中转换各片段，按片段的顺序产出结果，并将各片段的节点与 card 数量汇总到当前的性能指标中
+    :param chunks: 片段列表
+    :param options: 转换器的预处理选项
+    :param parallel: 进程数量（True 表示 CPU 核心数），或者复用的进程池（concurrent.futures.Executor）
+    :return: (Markdown 内容, 未适配的 card 数量) 的迭代器
+    """
+    from concurrent.futures import Executor, ProcessPoolExecutor
+
+    current = metrics.current()
+    if isinstance(parallel, Executor):
+        executor, owned = parallel, False
+    else:
+        workers = (os.cpu_count() or 1) if parallel is True else int(parallel)
+        executor, owned = ProcessPoolExecutor(max_workers=max(1, min(workers, len(chunks)))), True
+    try:
+        for text, unknown_cards, chunk_metrics in executor.map(convert_chunk, chunks, repeat(options)):
+            if current is not None:
+                current.nodes += chunk_metrics.nodes
+                current.cards.update(chunk_metrics.cards)
+            yield text, Counter(unknown_cards)
+    finally:
+        if owned:
+            executor.shutdown()
@@ -0,0 +1,74 @@
+"""
+大纲转换器
+
+直接遍历中间文档（LakeDocument）的事件列表，按标题（h1 ~ h6）的层级输出 JSON 格式的文档大纲：
+
+    {"title": "文档标题", "headings": [{"level": 1, "text": "一级标题", "id": "u1a2b", "children": [...]}]}
+"""
+
+import json
+import typing as t
+from lakedoc.utils import metrics
+from .base import LakeBaseConverter
+from .document import LakeDocument, PREPROCESS_OPTIONS
+from .text_converter import iter_blocks, normalize_lines
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+
+class OutlineConverter(LakeBaseConverter):
+    strip_newlines = True  # 预处理（LakeDocument.parse）会删除换行符
+    cache_options = ('builder', 'title', 'extract_tags', 'merge_tags', 'indent')
+
+    def __init__(self, raw_html: t.Union[str], builder: t.Union[str] = None,
+                 title: t.Union[str] = None,
+                 extract_tags: t.Set[str] = None,
+                 merge_tags: t.Set[str] = None,
+                 indent: t.Optional[int] = 2,
+                 document: LakeDocument = None):
+        """
+        Lake Doc -> 文档大纲（JSON）
+        :param raw_html: 未经过处理的 HTML 内容（最原生的）
+        :param builder: bs4 的树构建器，默认为 'html.parser'（options 参数）
+        :param title: 大纲中的文档标题，Markdown 的标题标记（#）会被去除，默认为 None（options 参数）
+        :param extract_tags: 处理 html 时应该删除哪些标签，默认为 {'meta', 'link', 'script', 'style'}（options 参数）
+        :param merge_tags: 需要合并的紧邻同名行内标签，默认为 {'em', 'strong'}（options 参数）
+        :param indent: JSON 的缩进，None 表示输出紧凑的单行 JSON，默认：2（options 参数）
+        :param document: 中间文档（LakeDocument），指定后不再解析 raw_html（请使用 `from_document`）
+        """
+        super().__init__(raw_html)
+        self.title = title
+        self.indent = indent
+        if document is None:
+            document = LakeDocument.parse(raw_html, builder, extract_tags, merge_tags)
+        self.document = document
+
+    @classmethod
+    def from_document(cls, document: LakeDocument, **options) -> 'OutlineConverter':
+        """从中间文档创建转换器（直接遍历其中的事件列表）"""
+        options = {name: value for name, value in options.items() if name not in PREPROCESS_OPTIONS}
+        return cls('', document=document, **options)
+
+    def outline(self) -> t.Dict[str, t.Any]:
+        """
+        按标题的层级构建大纲（层级跳跃的标题挂在最近的更高层级的标题之下）
+        :return: {'title': 文档标题, 'headings': [{'level', 'text', 'id', 'children'}]}
+        """
+        title = ' '.join(normalize_lines(self.title.lstrip('#'))) if self.title is not None else None
+        root: t.Dict[str, t.Any] = {'level': 0, 'children': []}
+        stack = [root]
+        with metrics.stage('walk'):
+            for name, attrs, text in iter_blocks(self.document.events):
+                if name not in HEADING_TAGS:
+                    continue
+                level = int(name[1])
+                heading = {'level': level, 'text': ' '.join(normalize_lines(text)), 'id': attrs.get('id'),
+                           'children': []}
+                while stack[-1]['level'] >= level:
+                    stack.pop()
+                stack[-1]['children'].append(heading)
+                stack.append(heading)
+        return {'title': title, 'headings': root['children']}
+
+    def convert(self) -> t.Union[str]:
+        return json.dumps(self.outline(), ensure_ascii=False, indent=self.indent)
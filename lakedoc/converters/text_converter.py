@@ -0,0 +1,124 @@
+"""
+纯文本转换器
+
+直接遍历中间文档（LakeDocument）的事件列表，按块（段落、标题、列表项、表格行等）输出文本，每块一行，
+适合用作搜索索引的正文。行内的空白（包括缩进）会被规整为单个空格，代码块保留原有的行
+"""
+
+import typing as t
+from lakedoc.utils import metrics
+from .base import LakeBaseConverter
+from .document import LakeDocument, PREPROCESS_OPTIONS, Event
+from . import md_cards
+
+# 这些标签的开始与结束都是块的边界
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'ul', 'ol', 'blockquote', 'pre',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'br', 'hr', 'body', 'html',
+})
+# 这些标签的文本与相邻的文本之间以空格分隔
+SPACED_TAGS = frozenset({'td', 'th'})
+
+
+def card_text(name: t.Union[str], card_data: t.Dict[str, t.Any]) -> str:
+    """
+    card 中可供检索的文本（代码、公式、链接标题、附件名称），其余 card 没有文本
+    :param name: card 的名称
+    :param card_data: 解码后的 card value
+    :return: 文本内容
+    """
+    if name in ('codeblock', 'math'):
+        return card_data.get('code', '')
+    if name in ('yuqueinline', 'bookmarkInline'):
+        return card_data.get('detail', {}).get('title', '')
+    if name == 'localdoc':
+        return card_data.get('name', '')
+    return ''
+
+
+def iter_blocks(events: t.Iterable[Event]) -> t.Iterator[t.Tuple[str, t.Dict[str, t.Any], str]]:
+    """
+    逐块产出事件列表中的文本（块的文本不包含其中嵌套的块）
+    :param events: 中间文档的事件列表
+    :return: (块的标签名, 块的属性, 文本) 的迭代器，不属于任何块的文本的标签名为空字符串
+    """
+    blocks: t.List[t.Tuple[str, t.Dict[str, t.Any]]] = [('', {})]
+    names: t.List[str] = []
+    parts: t.List[str] = []
+    for event in events:
+        if event is None:
+            name = names.pop()
+            if name in BLOCK_TAGS:
+                yield (*blocks.pop(), ''.join(parts))
+                parts = []
+        elif type(event) is str:
+            parts.append(event)
+        elif type(event[1]) is dict:
+            name, attrs = event
+            names.append(name)
+            if name in BLOCK_TAGS:
+                if parts:
+                    yield (*blocks[-1], ''.join(parts))
+                    parts = []
+                blocks.append((name, attrs))
+            elif name in SPACED_TAGS:
+                parts.append(' ')
+            elif name == 'card':
+                card_name = attrs.get('name', '')
+                parts.append(card_text(card_name, md_cards.decode_card(attrs.get('value', ''))))
+    if parts:
+        yield (*blocks[-1], ''.join(parts))
+
+
+def normalize_lines(text: t.Union[str]) -> t.List[str]:
+    """将文本按行规整空白，并去除空行"""
+    lines = []
+    for line in text.split('\n'):
+        line = ' '.join(line.split())
+        if line:
+            lines.append(line)
+    return lines
+
+
+class TextConverter(LakeBaseConverter):
+    strip_newlines = True  # 预处理（LakeDocument.parse）会删除换行符
+    cache_options = ('builder', 'title', 'extract_tags', 'merge_tags')
+
+    def __init__(self, raw_html: t.Union[str], builder: t.Union[str] = None,
+                 title: t.Union[str] = None,
+                 extract_tags: t.Set[str] = None,
+                 merge_tags: t.Set[str] = None,
+                 document: LakeDocument = None):
+        """
+        Lake Doc -> 纯文本
+        :param raw_html: 未经过处理的 HTML 内容（最原生的）
+        :param builder: bs4 的树构建器，默认为 'html.parser'（options 参数）
+        :param title: 添加到第一行的标题，Markdown 的标题标记（#）会被去除，默认为 None（options 参数）
+        :param extract_tags: 处理 html 时应该删除哪些标签，默认为 {'meta', 'link', 'script', 'style'}（options 参数）
+        :param merge_tags: 需要合并的紧邻同名行内标签，默认为 {'em', 'strong'}（options 参数）
+        :param document: 中间文档（LakeDocument），指定后不再解析 raw_html（请使用 `from_document`）
+        """
+        super().__init__(raw_html)
+        self.title = title
+        if document is None:
+            document = LakeDocument.parse(raw_html, builder, extract_tags, merge_tags)
+        self.document = document
+
+    @classmethod
+    def from_document(cls, document: LakeDocument, **options) -> 'TextConverter':
+        """从中间文档创建转换器（直接遍历其中的事件列表）"""
+        options = {name: value for name, value in options.items() if name not in PREPROCESS_OPTIONS}
+        return cls('', document=document, **options)
+
+    def convert(self) -> t.Union[str]:
+        return ''.join(self.iter_convert())
+
+    def iter_convert(self) -> t.Iterator[str]:
+        """逐行产出纯文本内容"""
+        if self.title is not None:
+            for line in normalize_lines(self.title.lstrip('#')):
+                yield f'{line}\n'
+        with metrics.stage('walk'):
+            for _, _, text in iter_blocks(self.document.events):
+                for line in normalize_lines(text):
+                    yield f'{line}\n'
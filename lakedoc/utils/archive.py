@@ -0,0 +1,287 @@
+"""
+压缩包（zip、tar、tar.gz 等）的读写
+
+语雀知识库的导出文件通常是压缩包，这里直接从压缩包中按成员读取内容，转换结果也可以直接写入新的压缩包，
+无需先解压到磁盘再重新打包：
+    - ArchiveMember: 压缩包中的单个成员，可以代替文件路径传入 `lakedoc.convert`、`readfile`、`convert_many`，
+      对象很轻（只记录压缩包路径、成员名称、大小与数据偏移量），可以发送到工作进程中各自读取
+    - ArchiveReader: 列出并读取压缩包中的成员（每个进程按路径复用已打开的压缩包）
+    - ArchiveWriter: 逐个写入成员，完成后原子地替换目标文件
+"""
+
+import io
+import os
+import tarfile
+import time
+import tempfile
+import zipfile
+import threading
+import typing as t
+from fnmatch import fnmatchcase
+from os import PathLike
+from pathlib import Path, PurePosixPath
+from lakedoc.utils import errors
+
+# 按后缀确定写入的格式：{后缀: (格式, tarfile 的写入模式)}
+WRITE_FORMATS = {
+    '.zip': ('zip', None),
+    '.tar': ('tar', 'w'),
+    '.tar.gz': ('tar', 'w:gz'),
+    '.tgz': ('tar', 'w:gz'),
+    '.tar.bz2': ('tar', 'w:bz2'),
+    '.tbz2': ('tar', 'w:bz2'),
+    '.tar.xz': ('tar', 'w:xz'),
+    '.txz': ('tar', 'w:xz'),
+}
+
+_readers: t.Dict[str, 'ArchiveReader'] = {}
+_readers_pid: t.Optional[int] = None
+_readers_lock = threading.Lock()
+
+
+def write_format(path: t.Union[str, Path, PathLike]) -> t.Optional[t.Tuple[str, t.Optional[str]]]:
+    """根据后缀判断写入的压缩包格式，不是压缩包时返回 None"""
+    name = Path(path).name.lower()
+    for suffix, value in WRITE_FORMATS.items():
+        if name.endswith(suffix):
+            return value
+    return None
+
+
+def is_archive(path: t.Union[str, Path, PathLike]) -> bool:
+    """判断路径是否是可以读取的压缩包文件（按内容判断）"""
+    path = Path(path)
+    return path.is_file() and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+
+def safe_name(name: t.Union[str]) -> t.Optional[str]:
+    """规整成员名称，绝对路径或者包含 .. 的名称（解压时会越出目标目录）返回 None"""
+    path = PurePosixPath(name.replace('\\', '/'))
+    if path.is_absolute() or '..' in path.parts:
+        return None
+    return path.as_posix()
+
+
+def match(name: t.Union[str], pattern: t.Union[str]) -> bool:
+    """与 Path.rglob 一致：通配符不含 / 时只匹配文件名，否则匹配完整的成员名称"""
+    if '/' not in pattern:
+        return fnmatchcase(PurePosixPath(name).name, pattern)
+    return fnmatchcase(name, pattern)
+
+
+def open_reader(path: t.Union[str, Path, PathLike]) -> 'ArchiveReader':
+    """
+    获取指定压缩包的读取器（每个进程按路径复用，不会重复解析压缩包的目录）
+    :param path: 压缩包路径
+    :return: ArchiveReader
+    """
+    global _readers_pid
+    key = str(Path(path).absolute())
+    with _readers_lock:
+        # fork 出的子进程与父进程共享文件偏移量，不能复用父进程中已打开的压缩包
+        if _readers_pid != os.getpid():
+            _readers.clear()
+            _readers_pid = os.getpid()
+        reader = _readers.get(key)
+        if reader is None:
+            reader = _readers[key] = ArchiveReader(path)
+    return reader
+
+
+class ArchiveMember(object):
+    __slots__ = ('archive', 'name', 'size', 'offset')
+
+    def __init__(self, archive: t.Union[str, Path, PathLike], name: t.Union[str],
+                 size: t.Optional[int] = None, offset: t.Optional[int] = None):
+        """
+        压缩包中的成员
+        :param archive: 压缩包路径
+        :param name: 成员名称（压缩包中的相对路径）
+        :param size: 成员解压后的大小（字节），未指定时读取时再获取
+        :param offset: tar 成员的数据在压缩包中的偏移量，指定后直接定位读取（无需扫描 tar 的所有成员）
+        """
+        self.archive = str(archive)
+        self.name = name
+        self.size = size
+        self.offset = offset
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {self}>'
+
+    def __str__(self):
+        return f'{self.archive}!/{self.name}'
+
+    def __getstate__(self):
+        return self.archive, self.name, self.size, self.offset
+
+    def __setstate__(self, state):
+        self.archive, self.name, self.size, self.offset = state
+
+    def stat_size(self) -> int:
+        """成员解压后的大小（字节）"""
+        if self.size is None:
+            self.size = open_reader(self.archive).size(self.name)
+        return self.size
+
+    def read_bytes(self) -> bytes:
+        """读取成员的内容"""
+        return open_reader(self.archive).read(self)
+
+
+class ArchiveReader(object):
+    def __init__(self, path: t.Union[str, Path, PathLike]):
+        """
+        压缩包读取器（zip 或者 tar，tar 支持 gz、bz2、xz 压缩）
+        :param path: 压缩包路径
+        """
+        self.path = Path(path)
+        if not self.path.is_file():
+            raise errors.LakeFileNotFoundError(self.path)
+        self._lock = threading.Lock()
+        self._zip: t.Optional[zipfile.ZipFile] = None
+        self._tar: t.Optional[tarfile.TarFile] = None
+        if zipfile.is_zipfile(self.path):
+            self.kind = 'zip'
+            self._zip = zipfile.ZipFile(self.path)
+        elif tarfile.is_tarfile(self.path):
+            self.kind = 'tar'
+            self._tar = tarfile.open(self.path, 'r:*')
+        else:
+            raise errors.LakeArchiveError(self.path, '不是 zip 或者 tar 格式的压缩包')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {str(self.path)} {self.kind}>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def members(self, pattern: t.Union[str] = '*') -> t.List[ArchiveMember]:
+        """
+        列出匹配的文件成员（按在压缩包中的顺序），不安全的成员名称（绝对路径、包含 ..）会被忽略
+        :param pattern: 匹配成员的通配符（规则同 Path.rglob），默认匹配所有文件
+        :return: 成员列表
+        """
+        members = []
+        with self._lock:
+            if self._zip is not None:
+                for info in self._zip.infolist():
+                    name = safe_name(info.filename)
+                    if name is not None and not info.is_dir() and match(name, pattern):
+                        members.append(ArchiveMember(self.path, info.filename, info.file_size))
+            else:
+                for info in self._tar.getmembers():
+                    name = safe_name(info.name)
+                    if name is not None and info.isfile() and not info.issparse() and match(name, pattern):
+                        members.append(ArchiveMember(self.path, info.name, info.size, info.offset_data))
+        return members
+
+    def size(self, name: t.Union[str]) -> int:
+        """成员解压后的大小（字节）"""
+        with self._lock:
+            if self._zip is not None:
+                return self._zip.getinfo(name).file_size
+            return self._tar.getmember(name).size
+
+    def read(self, member: t.Union[ArchiveMember, str]) -> bytes:
+        """
+        读取成员的内容（tar 成员记录了数据偏移量时直接定位读取）
+        :param member: 成员或者成员名称
+        :return: 成员的内容
+        """
+        if isinstance(member, str):
+            member = ArchiveMember(self.path, member)
+        try:
+            if self._zip is not None:
+                # ZipFile 支持多个线程同时读取
+                return self._zip.read(member.name)
+            with self._lock:
+                if member.offset is None:
+                    return self._tar.extractfile(member.name).read()
+                self._tar.fileobj.seek(member.offset)
+                return self._tar.fileobj.read(member.size)
+        except KeyError:
+            raise errors.LakeArchiveError(self.path, f'成员`{member.name}`不存在')
+
+
+class ArchiveWriter(object):
+    def __init__(self, path: t.Union[str, Path, PathLike], compresslevel: t.Optional[int] = None):
+        """
+        压缩包写入器（格式由后缀决定：.zip、.tar、.tar.gz/.tgz、.tar.bz2/.tbz2、.tar.xz/.txz），
+        先写入同目录的临时文件，关闭时原子地替换目标文件（出现异常时丢弃）
+        :param path: 压缩包路径
+        :param compresslevel: 压缩级别，默认使用各格式的默认值
+        """
+        self.path = Path(path)
+        found = write_format(self.path)
+        if found is None:
+            raise errors.LakeArchiveError(self.path, f'无法根据后缀确定压缩包格式，支持：{", ".join(WRITE_FORMATS)}')
+        self.kind, mode = found
+        self.count = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._temp = tempfile.mkstemp(dir=self.path.parent, prefix=f'{self.path.name}.', suffix='.tmp')
+        self._file = os.fdopen(fd, 'w+b')
+        if self.kind == 'zip':
+            self._zip = zipfile.ZipFile(self._file, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        else:
+            kwargs = {} if mode == 'w' or compresslevel is None else {'compresslevel': compresslevel}
+            if mode == 'w:xz' and compresslevel is not None:
+                kwargs = {'preset': compresslevel}
+            self._tar = tarfile.open(fileobj=self._file, mode=mode, **kwargs)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: {str(self.path)} {self.kind} members={self.count}>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(discard=exc_type is not None)
+
+    def write(self, name: t.Union[str], data: t.Union[bytes]):
+        """
+        写入一个成员（可以在多个线程中调用）
+        :param name: 成员名称（压缩包中的相对路径）
+        :param data: 成员的内容
+        """
+        name = safe_name(name)
+        if name is None:
+            raise errors.LakeArchiveError(self.path, '成员名称不能是绝对路径或者包含 ..')
+        with self._lock:
+            if self.kind == 'zip':
+                self._zip.writestr(name, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                info.mode = 0o644
+                self._tar.addfile(info, io.BytesIO(data))
+            self.count += 1
+
+    def close(self, discard: t.Union[bool] = False):
+        """
+        完成写入并替换目标文件
+        :param discard: 开启后丢弃已写入的内容，不替换目标文件
+        """
+        if self._file.closed:
+            return
+        try:
+            if self.kind == 'zip':
+                self._zip.close()
+            else:
+                self._tar.close()
+        finally:
+            self._file.close()
+        if discard:
+            os.unlink(self._temp)
+        else:
+            os.replace(self._temp, self.path)
@@ -15,6 +15,16 @@ class LakeBaseError(Exception):
     def __repr__(self):
         return f'<{self.__class__.__name__}: 0x{id(self):016X}>'
 
+    def __reduce__(self):
+        # 子类的构造参数各不相同，因此按错误信息重建（进程池中抛出的异常需要能被序列化）
+        return _rebuild_error, (self.__class__, self.error_info)
+
+
+def _rebuild_error(error_class: t.Type[LakeBaseError], error_info: t.Union[str]) -> LakeBaseError:
+    error = error_class.__new__(error_class)
+    LakeBaseError.__init__(error, error_info)
+    return error
+
 
 class LakeFileNotFoundError(LakeBaseError, FileNotFoundError):
     def __init__(self, path: t.Union[str, Path, PathLike]):
@@ -54,3 +64,71 @@ class LakeBuilderNotFoundError(LakeContextError):
     def __init__(self, builder: t.Union[str]):
         info = f'树构建器: {builder} 不存在，可尝试运行命令：`pip install {builder}`'
         super().__init__(info)
+
+
+class LakeDocumentTooLargeError(LakeBaseError):
+    def __init__(self, size: t.Union[int], limit: t.Union[int], path: t.Union[str, Path, PathLike] = None):
+        if path is not None:
+            info = f'文件`{str(Path(path).absolute().resolve())}`的大小为 {size} 字节，超过了限制的 {limit} 字节'
+        else:
+            info = f'HTML 内容的长度为 {size} 个字符，超过了限制的 {limit}'
+        super().__init__(info)
+
+
+# 隔离的工作进程中单个文档的转换被中止（超时、超出资源限制或者工作进程异常退出）
+class LakeIsolationError(LakeBaseError):
+    pass
+
+
+class LakeConvertTimeoutError(LakeIsolationError, TimeoutError):
+    def __init__(self, seconds: t.Union[float], path: t.Union[str, Path, PathLike] = None):
+        target = f'文件`{str(Path(path).absolute().resolve())}`' if path is not None else '文档'
+        info = f'{target}的转换超过了 {seconds} 秒'
+        super().__init__(info)
+
+
+class LakeResourceLimitError(LakeIsolationError, MemoryError):
+    def __init__(self, limit: t.Optional[int] = None, path: t.Union[str, Path, PathLike] = None):
+        target = f'文件`{str(Path(path).absolute().resolve())}`' if path is not None else '文档'
+        if limit is not None:
+            info = f'{target}的转换超出了工作进程的内存上限 {limit} 字节'
+        else:
+            info = f'{target}的转换耗尽了可用内存'
+        super().__init__(info)
+
+
+class LakeWorkerCrashError(LakeIsolationError):
+    def __init__(self, exitcode: t.Optional[int], path: t.Union[str, Path, PathLike] = None):
+        target = f'文件`{str(Path(path).absolute().resolve())}`' if path is not None else '文档'
+        info = f'转换{target}时工作进程异常退出（退出码：{exitcode}）'
+        super().__init__(info)
+
+
+class LakeArchiveError(LakeBaseError):
+    def __init__(self, path: t.Union[str, Path, PathLike], reason: t.Union[str]):
+        info = f'压缩包`{str(Path(path).absolute().resolve())}`：{reason}'
+        super().__init__(info)
+
+
+class LakeDaemonError(LakeBaseError):
+    def __init__(self, address: t.Union[str], reason: t.Union[str]):
+        info = f'转换服务`{address}`：{reason}'
+        super().__init__(info)
+
+
+# 转换服务的队列已满（背压），稍后重试
+class LakeDaemonBusyError(LakeDaemonError):
+    pass
+
+
+class LakeAssetFetchError(LakeBaseError):
+    def __init__(self, url: t.Union[str], reason: t.Union[str]):
+        info = f'资源`{url}`下载失败：{reason}'
+        super().__init__(info)
+
+
+class LakeUnknownCardWarning(UserWarning):
+    def __init__(self, card_counts: t.Dict[str, int]):
+        detail = '、'.join(f'{name or "<无名称>"} x{count}' for name, count in card_counts.items())
+        super().__init__(f'存在未适配的 card 类型（已忽略）：{detail}')
+        self.card_counts = dict(card_counts)
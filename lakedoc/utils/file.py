@@ -1,18 +1,29 @@
+import io
 import typing as t
 import time
+import codecs
 from pathlib import Path
 from os import PathLike
 from lakedoc.utils import errors
 
+READ_CHUNK_SIZE = 1024 * 1024
 
-def readfile(path: t.Union[str, Path, PathLike], encoding: t.Union[str] = 'utf-8'):
+
+def readfile(path: t.Union[str, Path, PathLike], encoding: t.Union[str] = 'utf-8',
+             max_bytes: t.Optional[int] = None, strip_newlines: t.Union[bool] = False):
     """
     从指定路径读取字节内容并解码后输出
 
-    :param path: 读取文件的路径（只能传入文件路径）
+    :param path: 读取文件的路径（只能传入文件路径），也可以是压缩包中的成员（lakedoc.utils.archive.ArchiveMember）
     :param encoding: 指定读取文件时的解码格式，默认：utf-8
+    :param max_bytes: 文件大小的上限（字节），超过时在读取前抛出 LakeDocumentTooLargeError，默认不限制
+    :param strip_newlines:
+        开启后分块解码，并在解码的同时删除所有换行符（\r、\n）、去除首尾的空白字符，
+        不会产生完整内容的中间副本，默认关闭
     :return: 指定文件中的内容（字符串）
     """
+    if not isinstance(path, (str, PathLike)):
+        return read_member(path, encoding, max_bytes, strip_newlines)
 
     path = Path(path)
 
@@ -22,34 +33,126 @@ def readfile(path: t.Union[str, Path, PathLike], encoding: t.Union[str] = 'utf-8
     if not path.is_file():
         raise errors.LakeIsNotFileError(path)
 
+    if max_bytes is not None:
+        size = path.stat().st_size
+        if size > max_bytes:
+            raise errors.LakeDocumentTooLargeError(size, max_bytes, path)
+
+    if strip_newlines:
+        return read_stripped(path, encoding)
+
     with open(path, 'rb') as fr:
         content = fr.read().decode(encoding=encoding)
 
     return content
 
 
-def savefile(content: t.Union[str, bytes], path: t.Union[str, Path, PathLike],
-             encoding: t.Union[str] = 'utf-8', suffix: t.Union[str] = 'md'):
+def read_member(member, encoding: t.Union[str] = 'utf-8',
+                max_bytes: t.Optional[int] = None, strip_newlines: t.Union[bool] = False) -> str:
     """
-    将指定内容以字节流形式保存到指定路径
+    读取压缩包中的成员并解码（参数同 `readfile`，大小在读取前按解压后的大小检查）
+    :param member: 压缩包中的成员（ArchiveMember）
+    :return: 成员的内容（字符串）
+    """
+    if max_bytes is not None:
+        size = member.stat_size()
+        if size > max_bytes:
+            raise errors.LakeDocumentTooLargeError(size, max_bytes, str(member))
+
+    data = member.read_bytes()
+    if strip_newlines:
+        return decode_stripped(io.BytesIO(data), encoding)
+    return data.decode(encoding=encoding)
+
+
+def read_stripped(path: t.Union[str, Path, PathLike], encoding: t.Union[str] = 'utf-8') -> str:
+    """
+    分块读取并解码文件，同时删除所有换行符、去除首尾的空白字符
+    （结果与 `content.replace('\n', '').replace('\r', '').strip()` 一致，但只在最后拼接一次完整内容）
+
+    :param path: 读取文件的路径
+    :param encoding: 指定读取文件时的解码格式，默认：utf-8
+    :return: 处理后的内容
+    """
+    with open(path, 'rb') as fr:
+        return decode_stripped(fr, encoding)
+
+
+def decode_stripped(stream: t.BinaryIO, encoding: t.Union[str] = 'utf-8') -> str:
+    """分块读取并解码二进制流，同时删除所有换行符、去除首尾的空白字符（见 `read_stripped`）"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    for block in iter(lambda: stream.read(READ_CHUNK_SIZE), b''):
+        parts.append(decoder.decode(block).replace('\n', '').replace('\r', ''))
+    parts.append(decoder.decode(b'', final=True).replace('\n', '').replace('\r', ''))
+
+    # 首尾的空白字符可能跨越多个块，仅处理首尾的块
+    while parts and not parts[0].strip():
+        parts.pop(0)
+    while parts and not parts[-1].strip():
+        parts.pop()
+    if parts:
+        parts[0] = parts[0].lstrip()
+        parts[-1] = parts[-1].rstrip()
+    return ''.join(parts)
+
+
+def savepath(path: t.Union[str, Path, PathLike], suffix: t.Union[str] = 'md') -> Path:
+    """
+    确定保存文件的实际路径：如果是目录，则在目录中使用时间戳命名
 
-    :param content: 待保存的内容（可以是字符串或者字节串）
     :param path: 指定保存的路径（可以是目录或者文件路径）
-    :param encoding: 保存字符串内容的编码，默认：utf-8
     :param suffix: 文件类型后缀名 比如（md[默认]、txt）
-    :return:
+    :return: 保存文件的路径
     """
     path = Path(path)
 
     if path.is_dir():
         path = path / f'{int(time.time())}.{suffix}'
 
-    if isinstance(content, bytes):
-        data = content
-    elif isinstance(content, str):
-        data = content.encode(encoding=encoding)
+    return path
+
+
+def savefile(content: t.Union[str, bytes, t.Iterable[t.Union[str, bytes]]],
+             path: t.Union[str, Path, PathLike],
+             encoding: t.Union[str] = 'utf-8', suffix: t.Union[str] = 'md'):
+    """
+    将指定内容以字节流形式保存到指定路径
+
+    :param content: 待保存的内容（可以是字符串、字节串，或者由二者组成的列表、迭代器）
+    :param path: 指定保存的路径（可以是目录或者文件路径）
+    :param encoding: 保存字符串内容的编码，默认：utf-8
+    :param suffix: 文件类型后缀名 比如（md[默认]、txt）
+    :return: 写入的字节数
+    """
+    path = savepath(path, suffix)
+
+    if isinstance(content, (str, bytes)):
+        chunks = (content,)
+    elif isinstance(content, (list, tuple, t.Iterator)):
+        chunks = content
     else:
         raise errors.LakeContentTypeError(f'参数 content', 'str/bytes', str(type(content)))
 
+    # 逐块增量编码并写入，不在内存中拼接完整的内容
+    encoder = codecs.getincrementalencoder(encoding)()
+    written = 0
     with open(path, 'wb') as fw:
-        fw.write(data)
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = encoder.encode(chunk)
+                elif not isinstance(chunk, bytes):
+                    raise errors.LakeContentTypeError(f'参数 content', 'str/bytes', str(type(chunk)))
+                fw.write(chunk)
+                written += len(chunk)
+            tail = encoder.encode('', final=True)
+            fw.write(tail)
+            written += len(tail)
+        except BaseException:
+            # 逐块写入的过程中出错时，不保留不完整的文件
+            fw.close()
+            path.unlink()
+            raise
+
+    return written
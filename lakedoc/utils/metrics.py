@@ -0,0 +1,154 @@
+"""
+转换过程的性能指标
+
+上下文（LakeContext）注册了钩子后，每次转换都会收集一个 ConvertMetrics 对象（各阶段耗时、节点数量、
+各类 card 的数量、输入/输出字节数）并传给钩子；未注册钩子时不会收集任何数据
+"""
+
+import time
+import typing as t
+from collections import Counter
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+_active = ContextVar('lakedoc_metrics', default=None)
+_disabled = nullcontext()
+
+
+class StageTimer(object):
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: 'ConvertMetrics', name: t.Union[str]):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.metrics
+
+    def __exit__(self, *exc_info):
+        stages = self.metrics.stages
+        stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class ConvertMetrics(object):
+    """单次转换的性能指标"""
+
+    def __init__(self, target_type: t.Union[str] = None, converter: t.Union[str] = None):
+        self.target_type = target_type
+        self.converter = converter
+        self.source: t.Optional[str] = None
+        self.stages: t.Dict[str, float] = {}
+        self.nodes = 0
+        self.cards: t.Counter[str] = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.cached = False
+        self.error: t.Optional[str] = None
+
+    def __repr__(self):
+        return (f'<{self.__class__.__name__}: {self.converter} {self.seconds * 1000:.1f}ms '
+                f'nodes={self.nodes} in={self.bytes_in} out={self.bytes_out}>')
+
+    def stage(self, name: t.Union[str]) -> StageTimer:
+        return StageTimer(self, name)
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'target_type': self.target_type,
+            'converter': self.converter,
+            'source': self.source,
+            'stages': dict(self.stages),
+            'nodes': self.nodes,
+            'cards': dict(self.cards),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'seconds': self.seconds,
+            'cached': self.cached,
+            'error': self.error,
+        }
+
+
+class MetricsAggregator(object):
+    """
+    汇总多次转换的性能指标，可直接作为钩子注册到上下文：context.add_hook(MetricsAggregator())
+    """
+
+    def __init__(self, slowest: t.Union[int] = 10):
+        """
+        :param slowest: 保留耗时最长的文档数量，默认：10
+        """
+        self.slowest_limit = slowest
+        self.count = 0
+        self.errors = 0
+        self.cached = 0
+        self.seconds = 0.0
+        self.nodes = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.stages: t.Dict[str, float] = {}
+        self.cards: t.Counter[str] = Counter()
+        self.slowest: t.List[t.Tuple[float, t.Optional[str]]] = []
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}: count={self.count} {self.seconds:.2f}s>'
+
+    def __call__(self, metrics: ConvertMetrics):
+        self.add(metrics)
+
+    def add(self, metrics: ConvertMetrics):
+        self.count += 1
+        self.errors += metrics.error is not None
+        self.cached += metrics.cached
+        self.seconds += metrics.seconds
+        self.nodes += metrics.nodes
+        self.bytes_in += metrics.bytes_in
+        self.bytes_out += metrics.bytes_out
+        for name, seconds in metrics.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.cards.update(metrics.cards)
+        if self.slowest_limit:
+            self.slowest.append((metrics.seconds, metrics.source))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self.slowest_limit:]
+
+    def summary(self) -> t.Dict[str, t.Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'cached': self.cached,
+            'seconds': self.seconds,
+            'nodes': self.nodes,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'stages': dict(self.stages),
+            'cards': dict(self.cards),
+            'slowest': list(self.slowest),
+        }
+
+
+def current() -> t.Optional[ConvertMetrics]:
+    """获取当前正在收集的性能指标，未开启时返回 None"""
+    return _active.get()
+
+
+def stage(name: t.Union[str]):
+    """
+    统计某个阶段的耗时，未开启收集时返回空的上下文管理器
+    :param name: 阶段名称（parse、merge、render_styles、walk、add_title、save 等）
+    """
+    metrics = _active.get()
+    if metrics is None:
+        return _disabled
+    return StageTimer(metrics, name)
+
+
+def activate(metrics: t.Optional[ConvertMetrics]):
+    """开始在当前线程/协程中收集指定的性能指标，返回用于 `deactivate` 的令牌"""
+    return _active.set(metrics)
+
+
+def deactivate(token):
+    _active.reset(token)
@@ -1,11 +1,8 @@
 import typing as t
 import re
 import json
+from functools import lru_cache
 from urllib.parse import unquote, quote
-from colorama import init, Fore, Style
-
-# 初始化 colorama
-init()
 
 
 def extract_integer(text: t.Union[str], default_: t.Union[int] = 0):
@@ -21,15 +18,13 @@ def extract_integer(text: t.Union[str], default_: t.Union[int] = 0):
     return int(value) if value != '' else default_
 
 
-def color_string(text: str, color: str = 'black') -> str:
-    """
-    将输入字符串转换为带有指定颜色的终端字符串
+@lru_cache(maxsize=None)
+def terminal_colors() -> t.Dict[str, str]:
+    """导入并初始化 colorama（仅在第一次输出彩色字符串时执行），返回颜色名称与终端颜色码的映射"""
+    from colorama import init, Fore, Style
 
-    :param text: 输入的字符串
-    :param color: 指定的颜色，默认是黑色
-    :return: 带有颜色的终端字符串
-    """
-    colors = {
+    init()
+    return {
         'black': Fore.BLACK,
         'red': Fore.RED,
         'green': Fore.GREEN,
@@ -40,8 +35,19 @@ def color_string(text: str, color: str = 'black') -> str:
         'white': Fore.WHITE,
         'reset': Style.RESET_ALL
     }
-    color_code = colors.get(color, Fore.BLACK)
-    return f'{color_code}{text}{Style.RESET_ALL}'
+
+
+def color_string(text: str, color: str = 'black') -> str:
+    """
+    将输入字符串转换为带有指定颜色的终端字符串
+
+    :param text: 输入的字符串
+    :param color: 指定的颜色，默认是黑色
+    :return: 带有颜色的终端字符串
+    """
+    colors = terminal_colors()
+    color_code = colors.get(color, colors['black'])
+    return f'{color_code}{text}{colors["reset"]}'
 
 
 def decode_card_value(value: str) -> dict: